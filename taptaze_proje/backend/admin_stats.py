@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Admin paneli istatistikleri.
+
+Sayaçlar sipariş ve ürün yazma yollarında artırılır, /api/admin/stats bunları
+okur. Sayaçları sıfırdan hesaplamak için:
+    python admin_stats.py --reconcile
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from pymongo import DESCENDING, UpdateOne
+
+from order_archive import archive_collections
+
+logger = logging.getLogger("taptaze.stats")
+
+TOTALS_ID = "totals"
+
+
+# --- İSTATİSTİK SAYAÇLARI ---
+# stats_counters: tek belge, toplam sipariş/ürün ve duruma göre sipariş sayısı
+# stats_daily:    gün başına ciro ve sipariş (_id = "YYYY-MM-DD")
+# stats_skus:     ürün başına satılan miktar ve ciro (_id = product_id)
+class AdminStats:
+    def __init__(self, db, days: int = 30, top_n: int = 10):
+        self.db = db
+        self.days = days
+        self.top_n = top_n
+
+    async def ensure_indexes(self):
+        await self.db.stats_skus.create_index([("quantity", DESCENDING)], name="quantity")
+
+    # --- YAZMA YOLLARI ---
+    async def record_order(self, order: dict):
+        created_at = order.get("created_at") or datetime.utcnow()
+        day = created_at.strftime("%Y-%m-%d")
+        amount = float(order.get("total_amount") or 0)
+
+        await self.db.stats_counters.update_one(
+            {"_id": TOTALS_ID},
+            {"$inc": {"total_orders": 1, f"orders_by_status.{order.get('status')}": 1}},
+            upsert=True,
+        )
+        await self.db.stats_daily.update_one(
+            {"_id": day}, {"$inc": {"orders": 1, "revenue": amount}}, upsert=True
+        )
+        updates = [
+            UpdateOne(
+                {"_id": item["product_id"]},
+                {
+                    "$inc": {
+                        "quantity": item["quantity"],
+                        "revenue": item.get("line_total", item["quantity"] * item["price"]),
+                    },
+                    "$set": {"name": item.get("product_name")},
+                },
+                upsert=True,
+            )
+            for item in order.get("items", [])
+        ]
+        if updates:
+            await self.db.stats_skus.bulk_write(updates, ordered=False)
+
+    async def record_status_change(self, old_status: str, new_status: str):
+        if old_status == new_status:
+            return
+        await self.db.stats_counters.update_one(
+            {"_id": TOTALS_ID},
+            {"$inc": {f"orders_by_status.{old_status}": -1, f"orders_by_status.{new_status}": 1}},
+            upsert=True,
+        )
+
+    async def record_products(self, delta: int):
+        if delta:
+            await self.db.stats_counters.update_one(
+                {"_id": TOTALS_ID}, {"$inc": {"total_products": delta}}, upsert=True
+            )
+
+    # --- OKUMA ---
+    async def snapshot(self) -> dict:
+        totals = await self.db.stats_counters.find_one({"_id": TOTALS_ID}) or {}
+        since = (datetime.utcnow() - timedelta(days=self.days - 1)).strftime("%Y-%m-%d")
+        daily = await self.db.stats_daily.find({"_id": {"$gte": since}}).sort("_id", 1).to_list(self.days)
+        top = await self.db.stats_skus.find().sort("quantity", DESCENDING).limit(self.top_n).to_list(self.top_n)
+        return {
+            "total_orders": totals.get("total_orders", 0),
+            "total_products": totals.get("total_products", 0),
+            "orders_by_status": {k: v for k, v in totals.get("orders_by_status", {}).items() if v},
+            "revenue_by_day": [{"day": d["_id"], "orders": d["orders"], "revenue": d["revenue"]} for d in daily],
+            "top_products": [
+                {"product_id": s["_id"], "name": s.get("name"), "quantity": s["quantity"], "revenue": s["revenue"]}
+                for s in top
+            ],
+            "reconciled_at": totals.get("reconciled_at"),
+        }
+
+    # --- MUTABAKAT ---
+    # Sayaçlar bir yerde kaçırılırsa (elle silinen sipariş, script ile eklenen ürün)
+    # aggregation ile sıfırdan hesaplanıp üzerine yazılır.
+    async def reconcile(self) -> dict:
+        # Arşive taşınmış siparişler de sayılır (order_archive.py)
+        union = [{"$unionWith": name} for name in await archive_collections(self.db)]
+        by_status = await self.db.orders.aggregate(union + [
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]).to_list(None)
+        daily = await self.db.orders.aggregate(union + [
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "orders": {"$sum": 1},
+                "revenue": {"$sum": "$total_amount"},
+            }},
+        ]).to_list(None)
+        skus = await self.db.orders.aggregate(union + [
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": "$items.product_id",
+                "name": {"$last": "$items.product_name"},
+                "quantity": {"$sum": "$items.quantity"},
+                # Kasa indirimli satırlarda line_total, eski siparişlerde miktar x fiyat
+                "revenue": {"$sum": {"$ifNull": ["$items.line_total", {"$multiply": ["$items.quantity", "$items.price"]}]}},
+            }},
+        ]).to_list(None)
+        total_products = await self.db.products.count_documents({})
+
+        totals = {
+            "_id": TOTALS_ID,
+            "total_orders": sum(s["count"] for s in by_status),
+            "total_products": total_products,
+            "orders_by_status": {str(s["_id"]): s["count"] for s in by_status},
+            "reconciled_at": datetime.utcnow(),
+        }
+        await self.db.stats_counters.replace_one({"_id": TOTALS_ID}, totals, upsert=True)
+        await self.db.stats_daily.delete_many({})
+        # Tarihsiz eski siparişler _id'si None olan bir gün üretir
+        daily = [d for d in daily if d["_id"]]
+        if daily:
+            await self.db.stats_daily.insert_many(daily)
+        await self.db.stats_skus.delete_many({})
+        if skus:
+            await self.db.stats_skus.insert_many(skus)
+        logger.info("İstatistikler yeniden hesaplandı: %d sipariş, %d ürün", totals["total_orders"], total_products)
+        return totals
+
+    async def reconcile_if_missing(self):
+        if await self.db.stats_counters.find_one({"_id": TOTALS_ID}, {"_id": 1}) is None:
+            await self.reconcile()
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Admin istatistik sayaçları.")
+    parser.add_argument("--reconcile", action="store_true", help="Sayaçları siparişlerden yeniden hesapla")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    uri = os.environ.get('MONGO_URL')
+    if not uri:
+        raise SystemExit("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+    stats = AdminStats(AsyncIOMotorClient(uri)[os.environ.get('DB_NAME', 'TaptazeDB')])
+    if args.reconcile:
+        await stats.reconcile()
+    print(await stats.snapshot())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,122 @@
+import logging
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import jwt
+from bson import ObjectId
+from bson.errors import InvalidId
+
+logger = logging.getLogger("taptaze.auth")
+
+ALGORITHM = "HS256"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+# --- OTURUM TOKENLARI ---
+# Erişim tokenı imzalı ve durumsuzdur: doğrulama süreç içinde HMAC kontrolüdür,
+# DB'ye veya bcrypt'e gitmez. Yenileme tokenı her kullanımda döndürülür ve
+# jti'si refresh_tokens koleksiyonunda tutulur; çıkışta veya çalınma şüphesinde
+# silinerek geçersiz kılınabilir. Yenilemede kullanıcı belgesi tekrar okunur;
+# rolü düşürülen ya da silinen kullanıcı eski yetkiyle token almaya devam edemez.
+class TokenService:
+    def __init__(self, secret: str, refresh_tokens, users=None, access_ttl: int = 900, refresh_ttl: int = 86400):
+        self.secret = secret
+        self.refresh_tokens = refresh_tokens
+        self.users = users
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+
+    @classmethod
+    def from_env(cls, refresh_tokens, users=None):
+        secret = os.environ.get('JWT_SECRET')
+        if not secret:
+            # Her açılışta yeni anahtar: yeniden başlatınca oturumlar düşer, worker'lar arası geçmez
+            logger.warning("JWT_SECRET tanımlı değil, geçici bir anahtar üretildi.")
+            secret = secrets.token_urlsafe(32)
+        return cls(
+            secret,
+            refresh_tokens,
+            users=users,
+            access_ttl=int(os.environ.get('ACCESS_TOKEN_TTL', '900')),
+            refresh_ttl=int(os.environ.get('REFRESH_TOKEN_TTL', '86400')),
+        )
+
+    def _encode(self, claims: dict, ttl: int) -> str:
+        now = int(time.time())
+        return jwt.encode({**claims, "iat": now, "exp": now + ttl}, self.secret, algorithm=ALGORITHM)
+
+    def _decode(self, token: str, token_type: str) -> dict:
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[ALGORITHM],
+                                options={"require": ["exp", "sub", "type"]})
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e))
+        if claims["type"] != token_type:
+            raise InvalidToken("yanlış token tipi")
+        return claims
+
+    async def issue(self, user: dict) -> dict:
+        claims = {
+            "sub": str(user["_id"]),
+            "name": user.get("name") or user.get("full_name"),
+            "email": user["email"],
+            "role": user.get("role", "customer"),
+        }
+        jti = uuid.uuid4().hex
+        await self.refresh_tokens.insert_one({
+            "_id": jti,
+            "user_id": claims["sub"],
+            "claims": claims,
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.refresh_ttl),
+        })
+        return {
+            "access_token": self._encode({**claims, "type": "access"}, self.access_ttl),
+            "refresh_token": self._encode({"sub": claims["sub"], "jti": jti, "type": "refresh"}, self.refresh_ttl),
+            "token_type": "bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def verify_access(self, token: str) -> dict:
+        return self._decode(token, "access")
+
+    async def refresh(self, token: str) -> dict:
+        claims = self._decode(token, "refresh")
+        # Tek kullanımlık: aynı yenileme tokenıyla ikinci istek reddedilir
+        stored = await self.refresh_tokens.find_one_and_delete({"_id": claims.get("jti"), "user_id": claims["sub"]})
+        if stored is None:
+            raise InvalidToken("yenileme tokenı kullanılmış veya iptal edilmiş")
+        if self.users is None:
+            return await self.issue({**stored["claims"], "_id": stored["claims"]["sub"]})
+        try:
+            user = await self.users.find_one({"_id": ObjectId(claims["sub"])})
+        except InvalidId:
+            user = None
+        if user is None:
+            raise InvalidToken("kullanıcı bulunamadı")
+        return await self.issue(user)
+
+    async def revoke(self, token: str) -> bool:
+        try:
+            claims = self._decode(token, "refresh")
+        except InvalidToken:
+            return False
+        result = await self.refresh_tokens.delete_one({"_id": claims.get("jti"), "user_id": claims["sub"]})
+        return result.deleted_count > 0
+
+    async def revoke_user(self, user_id: str) -> int:
+        result = await self.refresh_tokens.delete_many({"user_id": user_id})
+        return result.deleted_count
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    return token.strip() if scheme.lower() == "bearer" and token else None
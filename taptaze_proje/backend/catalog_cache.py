@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("taptaze.catalog")
+
+CATALOG_COLLECTIONS = ("products", "categories")
+VERSION_ID = "catalog"
+
+
+class Payload(NamedTuple):
+    body: bytes
+    etag: str
+
+
+# --- KATALOG ÖNBELLEĞİ ---
+# Ürün ve kategoriler günde birkaç kez değişiyor; her istekte Atlas'a gitmek yerine
+# serileştirilmiş halleri process içinde tutulur. Değişiklikler sürecin ortak
+# change stream'inden (change_stream.py) gelir, change stream yoksa (standalone
+# Mongo, mongomock) TTL ile yenilenir.
+# Birden fazla worker varsa ve change stream yoksa sürüm belgesiyle senkronize
+# olunur (versions verilirse): yazan worker sayacı artırır, diğerleri kısa
+# aralıklarla okuyup değişen kısmı yeniler. Sayacı artırmayan yazmalar
+# (temiz_veri.py dışındaki araçlar, elle düzenleme) en geç TTL sonunda görülür.
+class CatalogCache:
+    def __init__(
+        self,
+        db,
+        serialize_product: Callable[[dict], dict],
+        serialize_category: Callable[[dict], dict],
+        encode: Callable[[Any], bytes],
+        ttl_seconds: float = 60.0,
+        versions=None,
+        sync_interval: float = 1.0,
+        change_stream=None,
+    ):
+        self.db = db
+        self.serialize_product = serialize_product
+        self.serialize_category = serialize_category
+        self.encode = encode
+        self.ttl_seconds = ttl_seconds
+        self.versions = versions
+        self.sync_interval = sync_interval
+
+        self.change_stream_active = False
+        self.sync_active = False
+        self.version = 0
+        self._products: List[dict] = []
+        self._products_by_category: Dict[str, List[dict]] = {}
+        self._products_by_id: Dict[str, dict] = {}
+        self._categories: List[dict] = []
+        # Hazır JSON çıktıları; katalog veya stok değişince silinir
+        self._encoded: Dict[Tuple[str, Optional[str]], Payload] = {}
+        self._loaded_at: Optional[float] = None
+        self._listeners: List[Callable[[List[dict]], None]] = []
+        self._lock = asyncio.Lock()
+        self.change_stream = change_stream
+        self._fallback_task: Optional[asyncio.Task] = None
+        # Sürüm belgesinde son görülen sayaçlar ve henüz yazılmamış değişiklikler
+        self._seen: Optional[Dict[str, int]] = None
+        self._unpublished: set = set()
+        if change_stream is not None:
+            change_stream.add_listener(self, CATALOG_COLLECTIONS)
+
+    # --- OKUMA ---
+    async def get_products(self, category_id: Optional[str] = None) -> List[dict]:
+        await self._ensure_fresh()
+        if category_id:
+            return self._products_by_category.get(category_id, [])
+        return self._products
+
+    async def get_products_by_ids(self, product_ids: List[str]) -> List[dict]:
+        await self._ensure_fresh()
+        return [self._products_by_id[pid] for pid in product_ids if pid in self._products_by_id]
+
+    async def get_categories(self) -> List[dict]:
+        await self._ensure_fresh()
+        return self._categories
+
+    async def get_products_json(self, category_id: Optional[str] = None, limit: Optional[int] = None) -> Payload:
+        products = await self.get_products(category_id)
+        if limit is not None:
+            products = products[:limit]
+        return self._encoded_for(("products", category_id, limit), products)
+
+    async def get_categories_json(self) -> Payload:
+        return self._encoded_for(("categories", None), await self.get_categories())
+
+    def _encoded_for(self, key, value) -> Payload:
+        payload = self._encoded.get(key)
+        if payload is None:
+            body = self.encode(value)
+            # ETag içerikten türetilir: aynı katalog her worker'da aynı ETag'i üretir
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            payload = self._encoded[key] = Payload(body, etag)
+        return payload
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        if self.change_stream_active:
+            return True
+        # Sürüm belgesiyle senkronda da TTL üst sınır: sayacı artırmayan yazmalar için
+        return time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    async def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+        # Aynı anda gelen istekler Mongo'ya tek bir sorgu atsın
+        async with self._lock:
+            if self._is_fresh():
+                return
+            await self._reload()
+
+    async def _reload(self):
+        loaded_at = time.monotonic()
+        version = self.version
+        categories = await self.db.categories.find().to_list(None)
+        # _id sırası: parametresiz listenin devamı imleçle Mongo'dan okunabilsin
+        products = await self.db.products.find().sort("_id", 1).to_list(None)
+
+        serialized = [self.serialize_product(p) for p in products]
+        by_category: Dict[str, List[dict]] = {}
+        for product in serialized:
+            by_category.setdefault(product["category_id"], []).append(product)
+
+        self._categories = [self.serialize_category(c) for c in categories]
+        self._products = serialized
+        self._products_by_category = by_category
+        self._products_by_id = {p["id"]: p for p in serialized}
+        self._encoded = {}
+        for listener in self._listeners:
+            listener(serialized)
+        # Yükleme sırasında invalidate geldiyse bu veri zaten bayat, işaretleme
+        if version == self.version:
+            self._loaded_at = loaded_at
+
+    # Yeniden yüklemeden sonra tüm ürün listesiyle çağrılır (örn. arama indeksi)
+    def add_listener(self, listener: Callable[[List[dict]], None]):
+        self._listeners.append(listener)
+
+    # --- GEÇERSİZ KILMA ---
+    def invalidate(self):
+        self.version += 1
+        self._loaded_at = None
+        self._encoded = {}
+
+    # Sipariş başına tüm kataloğu yeniden yüklememek için stok yerinde güncellenir.
+    # Change stream ya da sürüm senkronu açıksa stok oradan mutlak değerle gelir;
+    # rezervasyonla bu çağrı arasında o değer uygulanmış olabilir, burada bir daha
+    # düşülürse sipariş iki kez sayılır. O durumda önbelleğe dokunulmaz, ürünün
+    # beklenen hali (olaylar için) kopya olarak döner.
+    def adjust_stock(self, product_id: str, delta: float) -> Optional[dict]:
+        product = self._products_by_id.get(product_id)
+        if product is None:
+            return None
+        if self.change_stream_active or self.sync_active:
+            return {**product, "stock": product["stock"] + delta}
+        product["stock"] += delta
+        self._encoded = {}
+        return product
+
+    # Bu worker'daki bir yazmayı diğer worker'lara duyurur. Change stream varsa
+    # değişikliği herkes zaten oradan görür; yoksa bir sonraki senkronizasyonda yazılır.
+    def publish(self, stock_only: bool = False):
+        if not stock_only:
+            self.invalidate()
+        if self.versions is not None and not self.change_stream_active:
+            self._unpublished.add("stock" if stock_only else "catalog")
+
+    # --- CHANGE STREAM (change_stream.py) ---
+    def apply_change(self, change: dict):
+        description = change.get("updateDescription") or {}
+        updated = description.get("updatedFields") or {}
+        if (
+            change.get("operationType") == "update"
+            and change["ns"]["coll"] == "products"
+            and set(updated) == {"stock"}
+            and not description.get("removedFields")
+        ):
+            product = self._products_by_id.get(str(change["documentKey"]["_id"]))
+            if product is not None:
+                product["stock"] = updated["stock"]
+                self._encoded = {}
+                return
+        self.invalidate()
+
+    def change_stream_opened(self):
+        self.change_stream_active = True
+        # Bağlantı koptuğu sırada kaçan değişiklikler olabilir
+        self.invalidate()
+
+    def change_stream_lost(self, reason: str, permanent: bool):
+        self.change_stream_active = False
+        self.invalidate()
+        if permanent:
+            # Replica set değil veya sürücü desteklemiyor: sürüm belgesi ya da sadece TTL
+            self._start_fallback(reason)
+
+    def _start_fallback(self, reason: str):
+        if self._fallback_task is None:
+            self._fallback_task = asyncio.create_task(self._fallback(reason))
+
+    async def start(self):
+        if self.change_stream is None:
+            self._start_fallback("Change stream kullanılmıyor")
+
+    async def stop(self):
+        if self._fallback_task is not None:
+            self._fallback_task.cancel()
+            try:
+                await self._fallback_task
+            except asyncio.CancelledError:
+                pass
+            self._fallback_task = None
+        self.change_stream_active = False
+        self.sync_active = False
+
+    # --- SÜRÜM BELGESİYLE SENKRONİZASYON ---
+    async def _fallback(self, reason: str):
+        if self.versions is None:
+            logger.warning("%s, TTL (%ss) ile devam.", reason, self.ttl_seconds)
+            return
+        logger.warning("%s, katalog sürümü %ss aralıkla Mongo'dan izlenecek.", reason, self.sync_interval)
+        while True:
+            try:
+                await self._sync()
+            except PyMongoError as e:
+                # Senkronizasyon yokken önbellek TTL'e döner
+                self.sync_active = False
+                logger.warning("Katalog sürümü okunamadı: %s", e)
+            await asyncio.sleep(self.sync_interval)
+
+    async def _sync(self):
+        pending, self._unpublished = self._unpublished, set()
+        try:
+            if pending:
+                doc = await self.versions.find_one_and_update(
+                    {"_id": VERSION_ID}, {"$inc": {field: 1 for field in pending}},
+                    upsert=True, return_document=ReturnDocument.AFTER,
+                )
+            else:
+                doc = await self.versions.find_one({"_id": VERSION_ID}) or {}
+        except PyMongoError:
+            self._unpublished |= pending
+            raise
+        current = {"catalog": doc.get("catalog", 0), "stock": doc.get("stock", 0)}
+
+        if self._seen is None:
+            # İlk okumadan önce kaçmış değişiklik olabilir
+            self.invalidate()
+        else:
+            # Kendi katalog artışımız tek başınaysa yeniden yüklemeye gerek yok. Kendi
+            # stok değişikliklerimiz ise önbelleğe yazılmadı (adjust_stock), okunmalı.
+            changed = {
+                field for field, value in current.items()
+                if value != self._seen[field] + (1 if field in pending else 0)
+            }
+            if "catalog" in changed:
+                self.invalidate()
+            elif "stock" in changed or "stock" in pending:
+                await self._reload_stock()
+        self._seen = current
+        self.sync_active = True
+
+    # Stok değişikliğinde tüm katalog yerine sadece stok alanı okunur
+    async def _reload_stock(self):
+        if self._loaded_at is None:
+            return
+        async for doc in self.db.products.find({}, {"stock": 1}):
+            product = self._products_by_id.get(str(doc["_id"]))
+            if product is not None:
+                product["stock"] = doc.get("stock")
+        self._encoded = {}
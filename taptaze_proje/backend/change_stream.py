@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger("taptaze.changes")
+
+
+class Listener(NamedTuple):
+    target: object              # change_stream_opened / change_stream_lost / apply_change
+    collections: Tuple[str, ...]
+    match: dict
+    fields: Tuple[str, ...]     # fullDocument'tan istenen alanlar
+
+
+# --- PAYLAŞILAN CHANGE STREAM ---
+# Katalog önbelleği ve anlık olaylar aynı koleksiyonları izliyor. Her biri kendi
+# change stream'ini açınca süreç başına iki imleç, iki bağlantı ve aynı
+# değişikliğin iki kez okunması demekti. Süreç başına tek stream açılır:
+# dinleyicilerin filtreleri tek $match'te birleşir, gelen değişiklik koleksiyonuna
+# göre ilgili dinleyicilere dağıtılır. Koparsa retry_seconds sonra tekrar açılır;
+# sunucu desteklemiyorsa (standalone Mongo, mongomock) dinleyicilere kalıcı
+# olarak bildirilir, her biri kendi yedek yoluna geçer.
+#
+# Dinleyici metodları:
+#   change_stream_opened()                  akış (yeniden) açıldı; arada kaçan değişiklik olabilir
+#   change_stream_lost(reason, permanent)   akış koptu; permanent=True ise bir daha denenmeyecek
+#   apply_change(change)                    loop içinde, bekletmeden işlenmeli
+#                                           (aynı koleksiyondan başka dinleyicinin filtresine
+#                                           takılan değişiklikler de gelebilir)
+class ChangeStreamDispatcher:
+    def __init__(self, db, retry_seconds: float = 5.0):
+        self.db = db
+        self.retry_seconds = retry_seconds
+        self.active = False
+        self._listeners: List[Listener] = []
+        self._task: Optional[asyncio.Task] = None
+
+        self.changes = 0
+        self.reconnects = 0
+
+    def add_listener(self, target, collections: Sequence[str], match: Optional[dict] = None,
+                     fields: Sequence[str] = ()):
+        match = match or {"ns.coll": {"$in": list(collections)}}
+        self._listeners.append(Listener(target, tuple(collections), match, tuple(fields)))
+
+    def _pipeline(self) -> Tuple[list, bool]:
+        clauses = [listener.match for listener in self._listeners]
+        project: Dict[str, int] = {"operationType": 1, "ns": 1, "documentKey": 1, "updateDescription": 1}
+        for listener in self._listeners:
+            for field in listener.fields:
+                project[f"fullDocument.{field}"] = 1
+        pipeline = [{"$match": clauses[0] if len(clauses) == 1 else {"$or": clauses}}, {"$project": project}]
+        # Tam belge (updateLookup) sadece bir dinleyici alan istiyorsa okunur
+        return pipeline, any(listener.fields for listener in self._listeners)
+
+    async def start(self):
+        if self._task is None and self._listeners:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.active = False
+
+    def _notify(self, method: str, *args):
+        for listener in self._listeners:
+            try:
+                getattr(listener.target, method)(*args)
+            except Exception:
+                # Bir dinleyicinin hatası diğerlerini ve akışı durdurmasın
+                logger.exception("Change stream dinleyicisi hata verdi: %s.%s",
+                                 type(listener.target).__name__, method)
+
+    def _dispatch(self, change: dict):
+        self.changes += 1
+        collection = change.get("ns", {}).get("coll")
+        for listener in self._listeners:
+            if collection in listener.collections:
+                try:
+                    listener.target.apply_change(change)
+                except Exception:
+                    logger.exception("Değişiklik işlenemedi: %s", type(listener.target).__name__)
+
+    async def _watch(self):
+        # mongomock gibi sahte istemcilerde watch hiç yok
+        if not hasattr(type(self.db), "watch"):
+            self._notify("change_stream_lost", "Change stream desteklenmiyor", True)
+            return
+        pipeline, lookup = self._pipeline()
+        options = {"full_document": "updateLookup"} if lookup else {}
+        while True:
+            try:
+                async with self.db.watch(pipeline, **options) as stream:
+                    # İmleç tembel açılıyor; desteklenmiyorsa hata burada gelsin
+                    change = await stream.try_next()
+                    self.active = True
+                    self._notify("change_stream_opened")
+                    logger.info("Change stream dinleniyor (%d dinleyici).", len(self._listeners))
+                    if change is not None:
+                        self._dispatch(change)
+                    async for change in stream:
+                        self._dispatch(change)
+            except asyncio.CancelledError:
+                raise
+            except (NotImplementedError, OperationFailure) as e:
+                # Replica set değil veya sürücü desteklemiyor
+                self.active = False
+                self._notify("change_stream_lost", f"Change stream kullanılamıyor: {e}", True)
+                return
+            except PyMongoError as e:
+                self.active = False
+                self.reconnects += 1
+                self._notify("change_stream_lost", f"Change stream koptu: {e}", False)
+                logger.warning("Change stream koptu, %ss sonra tekrar denenecek: %s", self.retry_seconds, e)
+                await asyncio.sleep(self.retry_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "listeners": [type(listener.target).__name__ for listener in self._listeners],
+            "changes": self.changes,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,55 @@
+import logging
+import os
+import secrets
+from typing import MutableMapping, Optional
+
+logger = logging.getLogger("taptaze.deployment")
+
+
+def worker_count(environ: MutableMapping[str, str], default: Optional[int] = None) -> int:
+    # WEB_CONCURRENCY gunicorn/uvicorn'un ortak ayarı; yoksa çekirdek sayısı kadar worker
+    value = environ.get('WEB_CONCURRENCY')
+    if value:
+        return max(1, int(value))
+    return default if default is not None else (os.cpu_count() or 1)
+
+
+# --- ÇOK SÜREÇLİ ÇALIŞMA ---
+# Her worker ayrı bir süreç: önbellek, hız sınırı sayaçları ve bcrypt havuzu
+# süreç içinde kalır. Worker'lar başlamadan önce ortam değişkenleri burada
+# ayarlanır, fork/spawn edilen worker'lar bunları miras alır. Elle verilen
+# değerlerin üzerine yazılmaz.
+def configure_workers(environ: MutableMapping[str, str], workers: int) -> dict:
+    if workers <= 1:
+        return {}
+    defaults = {
+        # Hız sınırı pencereleri tüm worker'larda ortak sayılsın (rate_limit.MongoStore)
+        'RATE_LIMIT_STORE': 'mongo',
+        # Change stream yoksa katalog değişiklikleri sürüm belgesiyle yayılır (catalog_cache.py)
+        'CATALOG_SYNC': 'mongo',
+        # bcrypt çekirdekleri worker'lar arasında paylaştırılır; her worker hepsini açmasın
+        'PASSWORD_POOL_WORKERS': str(max(1, (os.cpu_count() or 1) // workers)),
+    }
+    applied = {}
+    for key, value in defaults.items():
+        if not environ.get(key):
+            environ[key] = applied[key] = value
+    if not environ.get('JWT_SECRET'):
+        # Worker başına ayrı anahtar olursa bir worker'ın verdiği token diğerinde geçmez
+        environ['JWT_SECRET'] = secrets.token_urlsafe(32)
+        applied['JWT_SECRET'] = '***'
+        logger.warning("JWT_SECRET tanımlı değil; tüm worker'lar için geçici bir anahtar üretildi.")
+    if applied:
+        logger.info("%d worker için varsayılanlar: %s", workers, applied)
+    return applied
+
+
+# --- PROXY ARKASINDA İSTEMCİ ADRESİ ---
+# Hız sınırı ve giriş kilidi istemci IP'sine göre sayılır (server.client_ip).
+# Uvicorn X-Forwarded-For'a sadece FORWARDED_ALLOW_IPS'teki adreslerden gelen
+# bağlantılarda güvenir; varsayılan 127.0.0.1. Render/Nginx gibi başka bir
+# adresteki proxy arkasında bu ayar verilmezse bütün istemciler proxy'nin IP'si
+# görünür ve aynı sınırı paylaşır. Proxy'nin adresi (ya da adresleri virgülle;
+# sadece proxy'den erişilebilen kurulumlarda "*") verilmeli.
+def forwarded_allow_ips(environ: MutableMapping[str, str]) -> str:
+    return environ.get('FORWARDED_ALLOW_IPS') or '127.0.0.1'
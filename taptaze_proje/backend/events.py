@@ -0,0 +1,197 @@
+import asyncio
+import itertools
+import logging
+import os
+import weakref
+from typing import AsyncIterator, Optional, Set
+
+from serialization import dumps
+
+logger = logging.getLogger("taptaze.events")
+
+TOPICS = ("orders", "stock")
+# Takılan tüketiciye gönderilen son olay; istemci yeniden bağlanıp durumu baştan okumalı
+SLOW_CONSUMER = b"event: dropped\ndata: {\"reason\": \"slow_consumer\"}\n\n"
+HEARTBEAT = b": ping\n\n"
+
+# Paylaşılan change stream'e (change_stream.py) eklenen filtre ve tam belgeden istenen alanlar
+WATCH_COLLECTIONS = ("orders", "products")
+WATCH_MATCH = {"$or": [
+    {"ns.coll": "orders", "operationType": "insert"},
+    {"ns.coll": "orders", "operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+    {"ns.coll": "products", "operationType": "update", "updateDescription.updatedFields.stock": {"$exists": True}},
+]}
+WATCH_FIELDS = ("status", "user_id", "total_amount", "created_at", "name", "stock")
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, topics: Set[str], user_id: Optional[str], admin: bool, buffer: int):
+        self.topics = topics
+        self.user_id = user_id
+        self.admin = admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = False
+
+    def wants(self, topic: str, owner: Optional[str]) -> bool:
+        if topic not in self.topics:
+            return False
+        # Sipariş olayları sadece sahibine ve yöneticiye gider
+        return topic != "orders" or self.admin or (owner is not None and owner == self.user_id)
+
+    def offer(self, payload: bytes) -> bool:
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            # Tampon doldu: bekleyenler atılır, bağlantı son bir uyarıyla kapanır
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(SLOW_CONSUMER)
+            return False
+
+
+# --- ANLIK OLAYLAR ---
+# Mobil uygulama ve yönetici paneli sipariş durumunu ve azalan stoğu sorgulamak
+# yerine SSE ile dinler. Değişiklikler katalog önbelleğiyle paylaşılan, süreç
+# başına tek change stream'den gelir; her olay bir kez JSON'a çevrilip tüm
+# abonelerin kuyruğuna bırakılır. Kuyruklar
+# sınırlıdır; yetişemeyen abone bekletilmez, bağlantısı kesilir.
+# Change stream yoksa (standalone Mongo, mongomock) olaylar bu süreçteki yazma
+# yollarından publish() ile gelir; o durumda sadece aynı worker'ın aboneleri görür.
+class EventHub:
+    def __init__(self, buffer: int = 100, max_subscribers: int = 10000,
+                 low_stock_threshold: float = 5.0, heartbeat: float = 15.0, change_stream=None):
+        self.buffer = buffer
+        self.max_subscribers = max_subscribers
+        self.low_stock_threshold = low_stock_threshold
+        self.heartbeat = heartbeat
+
+        self.change_stream_active = False
+        self._subscribers: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        if change_stream is not None:
+            change_stream.add_listener(self, WATCH_COLLECTIONS, WATCH_MATCH, WATCH_FIELDS)
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls, change_stream=None, registry=None):
+        hub = cls(
+            buffer=int(os.environ.get('EVENT_BUFFER', '100')),
+            max_subscribers=int(os.environ.get('EVENT_MAX_SUBSCRIBERS', '10000')),
+            low_stock_threshold=float(os.environ.get('LOW_STOCK_THRESHOLD', '5')),
+            heartbeat=float(os.environ.get('EVENT_HEARTBEAT', '15')),
+            change_stream=change_stream,
+        )
+        if registry is not None:
+            registry.gauge_function("taptaze_event_subscribers", "Bağlı SSE aboneleri",
+                                    lambda: len(hub._subscribers))
+            registry.counter_function("taptaze_event_dropped_consumers_total",
+                                      "Yetişemediği için bağlantısı kesilen aboneler", lambda: hub.dropped)
+        return hub
+
+    # --- YAYIN ---
+    def _broadcast(self, topic: str, event: str, data: dict, owner: Optional[str] = None):
+        if not self._subscribers:
+            return
+        self.published += 1
+        payload = b"id: %d\nevent: %s\ndata: %s\n\n" % (next(self._ids), event.encode(), dumps(data))
+        for subscription in self._subscribers:
+            if subscription.dropped or not subscription.wants(topic, owner):
+                continue
+            if subscription.offer(payload):
+                self.delivered += 1
+            else:
+                self.dropped += 1
+
+    # Yazma yolları çağırır; change stream açıksa aynı olay oradan gelecek
+    def publish(self, topic: str, event: str, data: dict, owner: Optional[str] = None):
+        if not self.change_stream_active:
+            self._broadcast(topic, event, data, owner)
+
+    def order_created(self, order_id: str, order: dict):
+        self.publish("orders", "order_created", {
+            "id": order_id, "status": order.get("status"), "total_amount": order.get("total_amount"),
+            "created_at": order.get("created_at"),
+        }, owner=order.get("user_id"))
+
+    def order_status(self, order_id: str, status: str, owner: Optional[str]):
+        self.publish("orders", "order_status", {"id": order_id, "status": status}, owner=owner)
+
+    def stock_changed(self, product_id: str, stock: Optional[float], name: Optional[str] = None):
+        if stock is not None and stock <= self.low_stock_threshold:
+            self.publish("stock", "low_stock", {"product_id": product_id, "name": name, "stock": stock})
+
+    # --- ABONELİK ---
+    def subscribe(self, topics: Set[str], user_id: Optional[str], admin: bool) -> AsyncIterator[bytes]:
+        # Sınır kontrolü ve kayıt arada await olmadan yapılır; eşzamanlı bağlantılar sınırı aşamaz
+        if len(self._subscribers) >= self.max_subscribers:
+            raise TooManySubscribers()
+        subscription = Subscription(topics, user_id, admin, self.buffer)
+        self._subscribers.add(subscription)
+        stream = self._stream(subscription)
+        # Yanıt başlamadan kopan istemcide üretici hiç çalışmaz, finally'si de çalışmaz
+        weakref.finalize(stream, self._subscribers.discard, subscription)
+        return stream
+
+    async def _stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        # finally bağlantı kapanınca kaydı siler
+        try:
+            # Tarayıcı EventSource koparsa 3 sn sonra yeniden bağlansın
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Proxy'ler boş bağlantıyı kapatmasın, kopan istemci fark edilsin
+                    yield HEARTBEAT
+                    continue
+                yield payload
+                if payload is SLOW_CONSUMER:
+                    return
+        finally:
+            self._subscribers.discard(subscription)
+
+    # --- CHANGE STREAM (change_stream.py) ---
+    def apply_change(self, change: dict):
+        collection = change["ns"]["coll"]
+        doc = change.get("fullDocument") or {}
+        object_id = str(change["documentKey"]["_id"])
+        updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+        if collection == "orders":
+            if change["operationType"] == "insert":
+                self._broadcast("orders", "order_created", {
+                    "id": object_id, "status": doc.get("status"), "total_amount": doc.get("total_amount"),
+                    "created_at": doc.get("created_at"),
+                }, owner=doc.get("user_id"))
+            elif "status" in updated:
+                self._broadcast("orders", "order_status", {"id": object_id, "status": updated["status"]},
+                                owner=doc.get("user_id"))
+        elif collection == "products":
+            stock = updated.get("stock")
+            if stock is not None and stock <= self.low_stock_threshold:
+                self._broadcast("stock", "low_stock", {"product_id": object_id, "name": doc.get("name"), "stock": stock})
+
+    def change_stream_opened(self):
+        self.change_stream_active = True
+
+    def change_stream_lost(self, reason: str, permanent: bool):
+        self.change_stream_active = False
+        if permanent:
+            logger.warning("%s, olaylar sadece bu süreçten yayılacak.", reason)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "change_stream_active": self.change_stream_active,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_consumers": self.dropped,
+        }
@@ -0,0 +1,30 @@
+# Üretimde çok süreçli çalıştırma:
+#     cd backend && gunicorn -c gunicorn.conf.py server:app
+#
+# Worker sayısı WEB_CONCURRENCY ile, yoksa çekirdek sayısı kadar. Paylaşılan
+# durum ayarları (hız sınırı, katalog senkronizasyonu, JWT anahtarı) için
+# deployment.py. Atlas bağlantı sınırı: worker sayısı x MONGO_MAX_POOL_SIZE.
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment import configure_workers, forwarded_allow_ips, worker_count  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = worker_count(os.environ)
+worker_class = "uvicorn.workers.UvicornWorker"
+# UvicornWorker X-Forwarded-For'a sadece bu adreslerden güvenir (deployment.py)
+forwarded_allow_ips = forwarded_allow_ips(os.environ)
+
+# Uygulama her worker'da ayrı kurulur: Motor istemcisi ve arka plan görevleri
+# fork'tan sonra, worker'ın kendi event loop'unda açılmalı
+preload_app = False
+
+# bcrypt ağır istekleri ve mail kuyruğunun kapanışı için
+timeout = int(os.environ.get('WORKER_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('WORKER_GRACEFUL_TIMEOUT', '20'))
+keepalive = 5
+
+configure_workers(os.environ, workers)
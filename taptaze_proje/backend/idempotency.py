@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+import orjson
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from serialization import dumps
+
+logger = logging.getLogger("taptaze.idempotency")
+
+MAX_KEY_LENGTH = 255
+
+
+class InvalidIdempotencyKey(Exception):
+    pass
+
+
+class IdempotencyConflict(Exception):
+    # Aynı anahtar farklı bir istek gövdesiyle kullanılmış
+    pass
+
+
+class IdempotencyInProgress(Exception):
+    # Başka bir süreç aynı isteği hâlâ işliyor
+    pass
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: bytes
+    expires_at: float   # time.monotonic() cinsinden, sadece ön bellek için
+
+
+# --- TEKRARLANAN İSTEKLER ---
+# Zayıf bağlantıdaki mobil uygulama yanıt gelmeyince POST /orders ve /register'ı
+# tekrar gönderiyor; her tekrar yeni sipariş, yeni bcrypt ve yeni mail demekti.
+# İstemci Idempotency-Key başlığı gönderirse ilk istek çalışır, yanıtı
+# idempotency_keys koleksiyonuna yazılır (TTL index süresi dolanı siler) ve aynı
+# anahtarla gelen tekrarlar bu yanıtı alır. Aynı süreçte eşzamanlı gelen
+# kopyalar işi tekrar başlatmaz, çalışan isteğin sonucunu bekler; başka
+# worker'daki kopya "pending" kaydı tamamlanana kadar yoklar. Hata veren istek
+# saklanmaz, tekrar denenince yeniden çalışır. Tamamlanan yanıtlar ayrıca
+# süreç içi LRU ön bellekte tutulur.
+class IdempotencyStore:
+    def __init__(self, collection, ttl_seconds: float = 86400.0, lock_seconds: float = 60.0,
+                 cache_size: int = 10000, wait_seconds: float = 30.0, poll_interval: float = 0.05):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.cache_size = cache_size
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._cache: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+        self.executed = 0
+        self.replayed = 0
+        self.coalesced = 0
+        self.conflicts = 0
+
+    @classmethod
+    def from_env(cls, collection, registry=None):
+        store = cls(
+            collection,
+            ttl_seconds=float(os.environ.get('IDEMPOTENCY_TTL', '86400')),
+            lock_seconds=float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '60')),
+            cache_size=int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000')),
+            wait_seconds=float(os.environ.get('IDEMPOTENCY_WAIT', '30')),
+        )
+        if registry is not None:
+            registry.counter_function("taptaze_idempotent_replays_total",
+                                      "Saklanan yanıtla cevaplanan tekrar istekler",
+                                      lambda: store.replayed + store.coalesced)
+        return store
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        # Alan sırası farklı gelse de aynı gövde aynı özeti versin. Özet tuzsuz ve
+        # koleksiyonda saklanıyor; parola gibi gizli alanlar çağıran tarafta çıkarılmalı.
+        body = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return hashlib.sha256(body).hexdigest()
+
+    # --- ÇALIŞTIRMA ---
+    async def run(self, scope: str, key: str, payload: Any,
+                  handler: Callable[[], Awaitable[Any]]) -> Tuple[StoredResponse, bool]:
+        """Yanıtı ve tekrar mı olduğunu döner; handler en fazla bir kez çalışır."""
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise InvalidIdempotencyKey()
+        record_id = f"{scope}:{key}"
+        fingerprint = self.fingerprint(payload)
+
+        stored = self._cached(record_id)
+        if stored is not None:
+            self._check(stored.fingerprint, fingerprint)
+            self.replayed += 1
+            return stored, True
+
+        inflight = self._inflight.get(record_id)
+        if inflight is not None:
+            self._check(inflight[0], fingerprint)
+            self.coalesced += 1
+            stored, _ = await asyncio.shield(inflight[1])
+            return stored, True
+
+        # İstemci bağlantıyı kesse de iş yarıda kalmaz; sonuç tekrar için saklanır
+        task = asyncio.create_task(self._execute(record_id, fingerprint, handler))
+        self._inflight[record_id] = (fingerprint, task)
+        task.add_done_callback(lambda _: self._inflight.pop(record_id, None))
+        return await asyncio.shield(task)
+
+    def _check(self, stored: str, fingerprint: str):
+        if stored != fingerprint:
+            self.conflicts += 1
+            raise IdempotencyConflict()
+
+    async def _execute(self, record_id: str, fingerprint: str, handler) -> Tuple[StoredResponse, bool]:
+        stored = await self._claim(record_id, fingerprint)
+        if stored is not None:
+            self.replayed += 1
+            return stored, True
+        try:
+            result = await handler()
+        except BaseException:
+            await self._abandon(record_id)
+            raise
+        self.executed += 1
+        stored = StoredResponse(fingerprint, 200, dumps(result), time.monotonic() + self.ttl_seconds)
+        self._remember(record_id, stored)
+        try:
+            await self.collection.update_one({"_id": record_id, "owner": self.owner}, {"$set": {
+                "state": "done", "status_code": stored.status_code, "body": stored.body,
+                "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+            }})
+        except PyMongoError:
+            # İş yapıldı; kayıt yazılamazsa sadece bu sürecin ön belleği tekrarı yakalar
+            logger.exception("Idempotency yanıtı kaydedilemedi: %s", record_id)
+        return stored, False
+
+    async def _claim(self, record_id: str, fingerprint: str) -> Optional[StoredResponse]:
+        # Kayıt bizimse None, başka bir istek tamamlamışsa onun yanıtı döner
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            now = datetime.utcnow()
+            try:
+                await self.collection.insert_one({
+                    "_id": record_id, "fingerprint": fingerprint, "state": "pending", "owner": self.owner,
+                    "expires_at": now + timedelta(seconds=self.lock_seconds),
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+            doc = await self.collection.find_one({"_id": record_id})
+            if doc is None:
+                # Arada silindi (hata veren istek ya da TTL); tekrar sahiplenmeyi dene
+                continue
+            self._check(doc["fingerprint"], fingerprint)
+            if doc["state"] == "done":
+                remaining = (doc["expires_at"] - now).total_seconds()
+                stored = StoredResponse(fingerprint, doc["status_code"], bytes(doc["body"]),
+                                        time.monotonic() + min(remaining, self.ttl_seconds))
+                self._remember(record_id, stored)
+                return stored
+            if doc["expires_at"] < now:
+                # Sahibi yanıtı yazamadan çökmüş; kilit devralınır
+                await self.collection.delete_one({"_id": record_id, "state": "pending", "owner": doc["owner"]})
+                continue
+            if time.monotonic() > deadline:
+                raise IdempotencyInProgress()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _abandon(self, record_id: str):
+        try:
+            await self.collection.delete_one({"_id": record_id, "state": "pending", "owner": self.owner})
+        except PyMongoError:
+            # Silinemezse kilit süresi dolunca bir sonraki deneme devralır
+            logger.exception("Idempotency kilidi bırakılamadı: %s", record_id)
+
+    # --- ÖN BELLEK ---
+    def _cached(self, record_id: str) -> Optional[StoredResponse]:
+        stored = self._cache.get(record_id)
+        if stored is None:
+            return None
+        if stored.expires_at < time.monotonic():
+            del self._cache[record_id]
+            return None
+        self._cache.move_to_end(record_id)
+        return stored
+
+    def _remember(self, record_id: str, stored: StoredResponse):
+        self._cache[record_id] = stored
+        self._cache.move_to_end(record_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "conflicts": self.conflicts,
+            "in_flight": len(self._inflight),
+            "cached": len(self._cache),
+            "ttl_seconds": self.ttl_seconds,
+        }
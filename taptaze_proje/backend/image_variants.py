@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Ürün ve kategori görselleri için boyutlandırılmış varyantlar.
+
+    /img/thumb/domates.485876c1ff.webp   -> 160 px, WebP
+    /img/card/domates.485876c1ff.jpeg    -> 400 px, JPEG
+
+Varyantlar ilk istekte üretilir ve içerik adresli bir disk önbelleğinde
+tutulur. Hepsini önceden üretmek için:
+    python image_variants.py
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from static_assets import STATIC_URL_RE, FingerprintedStaticFiles
+
+SIZES = {"thumb": 160, "card": 400, "detail": 1000}
+FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 60}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+IMAGE_SUFFIXES = {".jpeg", ".jpg", ".png", ".webp"}
+VARIANT_RE = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{10})\.(?P<fmt>[a-z]+)$")
+
+
+class VariantNotFound(Exception):
+    pass
+
+
+def available_formats():
+    # AVIF, Pillow libavif ile derlenmediyse kullanılamaz
+    from PIL import features
+    return [fmt for fmt in FORMATS if fmt != "avif" or features.check("avif")]
+
+
+def render_variant(source: Path, target: Path, max_size: int, fmt: str):
+    # Pillow sadece varyant üretilirken yüklenir; sunucu açılışını yavaşlatmaz
+    from PIL import Image
+    pil_format, _, options = FORMATS[fmt]
+    with Image.open(source) as image:
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        if not has_alpha:
+            image = image.convert("RGB")
+        elif fmt != "jpeg":
+            # WebP/AVIF saydamlığı taşır; PNG'nin saydam kenarları korunur
+            image = image.convert("RGBA")
+        else:
+            # JPEG saydamlık taşımaz: saydam alanlar siyah değil beyaz zeminle dolsun
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        image.save(tmp, pil_format, **options)
+    os.replace(tmp, target)
+
+
+# --- VARYANT ÖNBELLEĞİ ---
+# Dosya adı kaynağın içerik özetini taşır (domates.<özet>-thumb.webp); kaynak
+# değişirse yeni ad oluşur, eski dosya LRU ile zamanla silinir. Toplam boyut
+# max_bytes'ı geçince en uzun süredir kullanılmayan varyantlar atılır. Atılan
+# dosya hemen silinmez: o an FileResponse ile gönderiliyor olabilir, unlink_delay
+# sonra silinir.
+class ImageVariants:
+    def __init__(self, static_files: FingerprintedStaticFiles, cache_dir: Path, max_bytes: int = 200 * 1024 * 1024,
+                 unlink_delay: float = 60.0):
+        self.static_files = static_files
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.unlink_delay = unlink_delay
+        self._formats: Optional[List[str]] = None
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Önbellekten atılmış, silinme zamanını bekleyen dosyalar
+        self._doomed: "OrderedDict[str, float]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def formats(self) -> List[str]:
+        if self._formats is None:
+            self._formats = available_formats()
+        return self._formats
+
+    def _scan(self):
+        if self._scanned:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = [p for p in self.cache_dir.iterdir() if p.is_file() and not p.name.endswith(".tmp")]
+        for path in sorted(files, key=lambda p: p.stat().st_atime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._total_bytes += size
+        self._scanned = True
+
+    def _sources(self) -> Dict[Tuple[str, str], str]:
+        return {
+            (name.rpartition(".")[0], digest): name
+            for name, digest in self.static_files.manifest.items()
+            if Path(name).suffix.lower() in IMAGE_SUFFIXES
+        }
+
+    def variant_urls(self, image_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+        if not image_url:
+            return None
+        match = STATIC_URL_RE.match(image_url)
+        if not match:
+            return None
+        name = match.group("path")
+        # Adres zaten parmak izliyse orijinal adı bul
+        original = self.static_files.resolve(name) or name
+        digest = self.static_files.manifest.get(original)
+        if digest is None or Path(original).suffix.lower() not in IMAGE_SUFFIXES:
+            return None
+        base = match.group("prefix")[: -len("static/")] + "img"
+        stem = original.rpartition(".")[0]
+        return {
+            size: {fmt: f"{base}/{size}/{stem}.{digest}.{fmt}" for fmt in self.formats}
+            for size in SIZES
+        }
+
+    async def get(self, size: str, filename: str) -> Tuple[Path, str]:
+        match = VARIANT_RE.match(filename)
+        if size not in SIZES or not match or match.group("fmt") not in self.formats:
+            raise VariantNotFound(filename)
+        source_name = self._sources().get((match.group("stem"), match.group("digest")))
+        if source_name is None:
+            raise VariantNotFound(filename)
+
+        self._scan()
+        key = f"{match.group('stem').replace('/', '_')}.{match.group('digest')}-{size}.{match.group('fmt')}"
+        path = self.cache_dir / key
+        if key in self._entries and path.exists():
+            self.hits += 1
+            self._entries.move_to_end(key)
+            os.utime(path)
+            return path, FORMATS[match.group("fmt")][1]
+
+        # Aynı varyant için eşzamanlı istekler tek bir üretimi bekler. Bekleyen
+        # istemci koparsa üretim iptal olmasın, diğerleri ve önbellek etkilenmesin.
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = self._inflight[key] = asyncio.ensure_future(asyncio.to_thread(
+                render_variant, self.static_files.root / source_name, path, SIZES[size], match.group("fmt")
+            ))
+            future.add_done_callback(lambda f: self._rendered(key, path, f))
+        await asyncio.shield(future)
+        return path, FORMATS[match.group("fmt")][1]
+
+    def _rendered(self, key: str, path: Path, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._add(key, path.stat().st_size)
+
+    def _add(self, key: str, size: int):
+        # Silinmeyi bekleyen eski kopyanın yerine yenisi yazıldı
+        self._doomed.pop(key, None)
+        self._entries[key] = size
+        self._total_bytes += size
+        now = time.monotonic()
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_size = self._entries.popitem(last=False)
+            self._total_bytes -= old_size
+            self.evictions += 1
+            self._doomed[old_key] = now + self.unlink_delay
+        self._purge(now)
+
+    def _purge(self, now: float):
+        while self._doomed:
+            key, deadline = next(iter(self._doomed.items()))
+            if deadline > now:
+                break
+            del self._doomed[key]
+            try:
+                (self.cache_dir / key).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def pregenerate(self):
+        for (stem, digest), _ in self._sources().items():
+            for size in SIZES:
+                for fmt in self.formats:
+                    await self.get(size, f"{stem}.{digest}.{fmt}")
+
+    def stats(self) -> dict:
+        return {
+            "formats": self.formats,
+            "files": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "pending_unlink": len(self._doomed),
+        }
+
+
+def from_env(static_files: FingerprintedStaticFiles, root_dir: Path) -> ImageVariants:
+    return ImageVariants(
+        static_files,
+        cache_dir=Path(os.environ.get('IMAGE_CACHE_DIR', root_dir / "image_cache")),
+        max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_MB', '200')) * 1024 * 1024,
+    )
+
+
+if __name__ == "__main__":
+    root = Path(__file__).parent
+    variants = from_env(FingerprintedStaticFiles(directory=root / "static"), root)
+    started = time.perf_counter()
+    asyncio.run(variants.pregenerate())
+    print(f"🖼️  {variants.misses} varyant üretildi ({variants.stats()['bytes'] / 1024:.0f} KB, "
+          f"{time.perf_counter() - started:.1f} sn) -> {variants.cache_dir}")
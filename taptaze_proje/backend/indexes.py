@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Index kurulumu ve sorgu planı kontrolü.
+
+Sunucu açılışında otomatik çalışır; elle çalıştırmak için:
+    python indexes.py [--strict]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger("taptaze.indexes")
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "products": [
+        # Kategori filtresi ve kategori içinde _id ile sayfalama
+        IndexModel([("category_id", ASCENDING), ("_id", ASCENDING)], name="category_id"),
+        # ?sort=name / ?sort=price: (anahtar, _id) ile sayfalama (PRODUCT_SORT_KEYS, pagination.py)
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+        IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+        IndexModel([("category_id", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)], name="category_id_name_id"),
+        IndexModel([("category_id", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)], name="category_id_price_id"),
+        # temiz_veri.py toplu yüklemede ürünleri sku ile eşleştirir
+        IndexModel([("sku", ASCENDING)], name="sku_unique", unique=True,
+                   partialFilterExpression={"sku": {"$exists": True}}),
+    ],
+    "orders": [
+        # Sipariş listeleri created_at azalan, eşitlikte _id ile sayfalanır (pagination.py)
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="status_created_at_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_id_created_at_id", partialFilterExpression={"user_id": {"$exists": True}}),
+        # Arşivleyici teslim edilmiş eski siparişleri bununla bulur (order_archive.py)
+        IndexModel([("status", ASCENDING), ("delivered_at", ASCENDING)], name="status_delivered_at",
+                   partialFilterExpression={"delivered_at": {"$exists": True}}),
+    ],
+    "mail_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        # Gönderilen / vazgeçilen mailler saklama süresi dolunca silinir (mail_dispatcher.py)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "job_locks": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "idempotency_keys": [
+        # Saklanan yanıtlar ve süresi dolmuş kilitler (idempotency.py)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "refresh_tokens": [
+        # Süresi dolan yenileme tokenlarını Mongo kendisi siler
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+}
+
+
+def hot_queries():
+    # (koleksiyon, filtre, sıralama) - server.py'deki sık çalışan sorgular
+    return [
+        ("users", {"email": "ornek@taptaze.com"}, None),
+        ("products", {"category_id": "000000000000000000000000"}, None),
+        ("products", {"category_id": "000000000000000000000000"}, {"_id": 1}),
+        ("products", {}, {"name": 1, "_id": 1}),
+        ("products", {}, {"price": 1, "_id": 1}),
+        ("products", {"category_id": "000000000000000000000000"}, {"name": 1, "_id": 1}),
+        ("products", {"category_id": "000000000000000000000000"}, {"price": 1, "_id": 1}),
+        ("orders", {}, {"created_at": -1, "_id": -1}),
+        ("orders", {"status": "Beklemede"}, {"created_at": -1, "_id": -1}),
+        ("orders", {"user_id": "000000000000000000000000"}, {"created_at": -1, "_id": -1}),
+        ("orders", {"status": "Teslim Edildi", "delivered_at": {"$lt": datetime.utcnow()}}, {"delivered_at": 1}),
+        ("mail_outbox", {"status": "pending", "next_attempt_at": {"$lte": datetime.utcnow()}}, {"next_attempt_at": 1}),
+    ]
+
+
+# Yerine yenisi gelen index'ler; RAM'de boşuna yer tutmasınlar diye silinir
+OBSOLETE_INDEXES = {
+    "orders": ["created_at", "status_created_at"],
+}
+
+
+class IndexCheckFailed(Exception):
+    pass
+
+
+async def drop_obsolete_indexes(db):
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info("Eski index silindi: %s.%s", collection, name)
+
+
+async def ensure_indexes(db):
+    failures = []
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # Örn. users içinde aynı e-postadan birden fazla kayıt varsa unique index kurulamaz
+            failures.append(f"{collection}: {e}")
+            logger.error("%s index'leri oluşturulamadı: %s", collection, e)
+    # Yenileri kurulduktan sonra; arada index'siz sorgu kalmasın
+    try:
+        await drop_obsolete_indexes(db)
+    except OperationFailure as e:
+        logger.warning("Eski index'ler silinemedi: %s", e)
+    return failures
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def verify_query_plans(db):
+    problems = []
+    for collection, filter_, sort in hot_queries():
+        command = {"find": collection, "filter": filter_}
+        if sort:
+            command["sort"] = sort
+        try:
+            explain = await db.command("explain", command, verbosity="queryPlanner")
+        except Exception as e:  # mongomock gibi taklitler explain desteklemez
+            logger.warning("explain çalıştırılamadı (%s): %s", collection, e)
+            continue
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in set(_stages(winning)):
+            problems.append(f"{collection} {filter_} {sort or ''}".strip())
+    for problem in problems:
+        logger.error("COLLSCAN: %s", problem)
+    return problems
+
+
+async def bootstrap(db, strict: bool = False):
+    problems = await ensure_indexes(db)
+    problems += await verify_query_plans(db)
+    if problems and strict:
+        raise IndexCheckFailed("; ".join(problems))
+    if not problems:
+        logger.info("Index'ler hazır, sık sorgular index kullanıyor.")
+    return problems
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Index'leri oluşturur ve sorgu planlarını kontrol eder.")
+    parser.add_argument("--strict", action="store_true", help="COLLSCAN bulunursa hata koduyla çık")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    uri = os.environ.get('MONGO_URL')
+    if not uri:
+        raise SystemExit("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+    db = AsyncIOMotorClient(uri)[os.environ.get('DB_NAME', 'TaptazeDB')]
+    try:
+        problems = await bootstrap(db, strict=args.strict)
+    except IndexCheckFailed as e:
+        raise SystemExit(f"Index kontrolü başarısız: {e}")
+    print("✅ Index'ler tamam." if not problems else f"⚠️ {len(problems)} sorun bulundu.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
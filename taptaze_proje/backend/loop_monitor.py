@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("taptaze.loop")
+
+
+def _collapsed(frame) -> str:
+    # flamegraph.pl / speedscope "collapsed stack" biçimi: kök;...;yaprak
+    names = []
+    while frame is not None:
+        names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# --- EVENT LOOP İZLEYİCİ ---
+# Loop içinde bir kalp atışı coroutine'i, dışarıda bir gözcü thread'i çalışır.
+# Kalp atışı eşikten uzun süre gelmezse loop o an kilitlidir; gözcü thread
+# loop thread'inin o anki yığınını loglar, yani suçlu kod kilit sürerken yakalanır.
+# Yavaş istek profili için aynı thread loop'tan yığın örnekleri toplar ve
+# örnekleri o an çalışan asyncio task'ına göre ilgili isteğe yazar.
+class LoopMonitor:
+    def __init__(self, threshold: float = 0.1, interval: float = 0.02, sample_interval: float = 0.005,
+                 slow_request: Optional[float] = None, profile_dir: Optional[Path] = None, lag_metric=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.slow_request = slow_request
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.lag_metric = lag_metric
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = time.monotonic()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._samples: Dict[asyncio.Task, Counter] = {}
+
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.profiles_written = 0
+
+    @classmethod
+    def from_env(cls, registry=None, root_dir: Optional[Path] = None) -> Optional["LoopMonitor"]:
+        # Kapalıyken hiçbir maliyeti yok; üretimde kısa süreliğine LOOP_MONITOR=1 ile açılır
+        if os.environ.get('LOOP_MONITOR') != '1':
+            return None
+        slow_ms = os.environ.get('SLOW_REQUEST_PROFILE_MS')
+        lag_metric = registry.histogram(
+            "taptaze_event_loop_lag_seconds", "Event loop gecikmesi",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+        ) if registry is not None else None
+        return cls(
+            threshold=int(os.environ.get('LOOP_LAG_THRESHOLD_MS', '100')) / 1000,
+            sample_interval=int(os.environ.get('PROFILE_SAMPLE_MS', '5')) / 1000,
+            slow_request=int(slow_ms) / 1000 if slow_ms else None,
+            profile_dir=Path(os.environ.get('PROFILE_DIR', (root_dir or Path('.')) / "profiles")),
+            lag_metric=lag_metric,
+        )
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+        logger.warning("Loop izleyici açık: eşik %d ms, yavaş istek profili %s",
+                       self.threshold * 1000, f"{self.slow_request * 1000:.0f} ms" if self.slow_request else "kapalı")
+
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = max(now - expected, 0.0)
+            self.max_lag = max(self.max_lag, lag)
+            if self.lag_metric is not None:
+                self.lag_metric.observe(value=lag)
+
+    def _watch(self):
+        reported = False
+        tick = min(self.sample_interval, self.interval) if self.slow_request else self.interval
+        while not self._stop.wait(tick):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            if self._samples:
+                # asyncio'nun o an çalışan task kaydı; loop boştayken None döner
+                task = asyncio.tasks._current_tasks.get(self._loop)
+                samples = self._samples.get(task)
+                if samples is not None:
+                    samples[_collapsed(frame)] += 1
+
+            stalled = time.monotonic() - self._beat
+            if stalled > self.threshold + self.interval:
+                if not reported:
+                    reported = True
+                    self.stalls += 1
+                    logger.warning("Event loop %.0f ms'dir kilitli, o anki yığın:\n%s",
+                                   stalled * 1000, "".join(traceback.format_stack(frame)))
+            else:
+                reported = False
+
+    # --- YAVAŞ İSTEK PROFİLİ ---
+    def begin_request(self) -> Optional[asyncio.Task]:
+        if self.slow_request is None:
+            return None
+        task = asyncio.current_task()
+        if task is not None:
+            self._samples[task] = Counter()
+        return task
+
+    def end_request(self, task: Optional[asyncio.Task], label: str, duration: float):
+        if task is None:
+            return
+        samples = self._samples.pop(task, None)
+        if not samples or duration < self.slow_request:
+            return
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_")[:60]
+        path = self.profile_dir / f"{stamp}-{safe_label}-{duration * 1000:.0f}ms.collapsed"
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.profiles_written += 1
+        logger.warning("Yavaş istek %s (%.0f ms), profil: %s", label, duration * 1000, path)
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "slow_request_ms": self.slow_request * 1000 if self.slow_request else None,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "profiles_written": self.profiles_written,
+        }
+
+
+class SlowRequestProfiler:
+    # ASGI middleware; örnekleri LoopMonitor toplar, burada sadece istek sınırları işaretlenir.
+    # Uzun yaşayan akışlar (SSE) doğası gereği "yavaş" olduğu için profillenmez.
+    def __init__(self, app, monitor: LoopMonitor, skip_paths=("/api/events",)):
+        self.app = app
+        self.monitor = monitor
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        task = self.monitor.begin_request()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            label = f"{scope['method']} {scope['path']}"
+            self.monitor.end_request(task, label, time.perf_counter() - started)
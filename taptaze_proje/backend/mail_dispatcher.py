@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("taptaze.mail")
+
+BREVO_URL = "https://api.brevo.com/v3/smtp/email"
+
+
+class MailTransportError(Exception):
+    # permanent: tekrar denemek işe yaramaz (bozuk adres, geçersiz istek)
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+# --- TAŞIYICILAR ---
+# Her taşıyıcı aynı konu/şablonu paylaşan bir grup maili tek çağrıda gönderir.
+# Mesaj: {"to": str, "subject": str, "html": str, "params": dict}
+class BrevoTransport:
+    name = "brevo"
+
+    def __init__(self, api_key: str, sender_email: str, sender_name: str = "Taptaze App",
+                 max_concurrency: int = 4, timeout: float = 10.0):
+        self.api_key = api_key
+        self.sender = {"name": sender_name, "email": sender_email}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Bağlantılar havuzda tutulur, her mailde yeni TLS el sıkışması yapılmaz.
+        # İstemci ilk gönderimde kurulur; sertifika yükleme açılışı yavaşlatmasın.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                headers={"accept": "application/json", "api-key": self.api_key or ""},
+            )
+        return self._client
+
+    async def send_batch(self, messages: List[dict]):
+        first = messages[0]
+        # Brevo messageVersions ile aynı şablonu farklı alıcı/parametrelerle tek istekte gönderir
+        payload = {
+            "sender": self.sender,
+            "subject": first["subject"],
+            "htmlContent": first["html"],
+            "messageVersions": [
+                {"to": [{"email": m["to"]}], "params": m.get("params") or {}} for m in messages
+            ],
+        }
+        try:
+            response = await self.client.post(BREVO_URL, json=payload)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            # 4xx isteğin kendisinde sorun demek; 408 ve 429 geçici
+            status = e.response.status_code
+            permanent = 400 <= status < 500 and status not in (408, 429)
+            raise MailTransportError(f"Brevo API Hatası: {e}", permanent=permanent) from e
+        except httpx.HTTPError as e:
+            raise MailTransportError(f"Brevo API Hatası: {e}") from e
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class FakeTransport:
+    name = "fake"
+
+    def __init__(self, max_concurrency: int = 4, latency: float = 0.0, failure_rate: float = 0.0):
+        self.max_concurrency = max_concurrency
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent: List[dict] = []
+        self.batches = 0
+
+    async def send_batch(self, messages: List[dict]):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise MailTransportError("Sahte taşıyıcı hatası")
+        # Brevo gibi: tek bozuk adres tüm isteği reddettirir
+        if any("@" not in m["to"] for m in messages):
+            raise MailTransportError("Sahte taşıyıcı: geçersiz adres", permanent=True)
+        self.batches += 1
+        self.sent.extend(messages)
+
+    async def aclose(self):
+        pass
+
+
+# --- MAİL GÖNDERİCİ ---
+# Mailler önce Mongo'daki outbox koleksiyonuna yazılır, arka plandaki işçi
+# bunları gruplar halinde gönderir. Başarısız gönderimler üstel bekleme ile
+# tekrar denenir; sunucu yeniden başlasa da kuyruk kaybolmaz.
+# Gönderilen ve vazgeçilen maillerin params'ı (doğrulama kodu) hemen silinir,
+# kaydın kendisi retention_seconds sonra TTL indeksiyle (indexes.py) silinir.
+class MailDispatcher:
+    def __init__(self, db, transport, batch_size: int = 50, max_attempts: int = 5,
+                 base_delay: float = 2.0, max_delay: float = 300.0, poll_interval: float = 5.0,
+                 stale_after: float = 120.0, retention_seconds: float = 7 * 86400):
+        self.outbox = db.mail_outbox
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.retention_seconds = retention_seconds
+
+        self._semaphore = asyncio.Semaphore(transport.max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def enqueue(self, to: str, subject: str, html: str, params: Optional[dict] = None):
+        now = datetime.utcnow()
+        await self.outbox.insert_one({
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "params": params or {},
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        })
+        self._wakeup.set()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.transport.aclose()
+
+    async def _run(self):
+        try:
+            await self._expire_finished()
+        except Exception as e:
+            logger.exception("Eski mail kayıtları temizlenemedi: %s", e)
+        while True:
+            try:
+                await self._release_stale()
+                while await self._dispatch_once():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Mail kuyruğu işlenemedi: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _release_stale(self):
+        # Gönderim sırasında çöken işçilerin kilitlediği mailleri geri al
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        await self.outbox.update_many(
+            {"status": "sending", "claimed_at": {"$lt": cutoff}},
+            {"$set": {"status": "pending"}, "$unset": {"claim": ""}},
+        )
+
+    async def _expire_finished(self):
+        # Saklama süresi eklenmeden önce bitmiş kayıtlar: kod silinir, TTL'e bağlanır
+        await self.outbox.update_many(
+            {"status": {"$in": ["sent", "failed"]}, "expires_at": {"$exists": False}},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=self.retention_seconds)},
+             "$unset": {"params": ""}},
+        )
+
+    async def _claim(self) -> List[dict]:
+        now = datetime.utcnow()
+        due = {"status": "pending", "next_attempt_at": {"$lte": now}}
+        candidates = await self.outbox.find(due, {"_id": 1}).sort("next_attempt_at", 1).to_list(self.batch_size)
+        if not candidates:
+            return []
+        # Koşullu güncelleme: başka bir worker aynı maili aldıysa o kayıt burada atlanır
+        token = uuid.uuid4().hex
+        await self.outbox.update_many(
+            {**due, "_id": {"$in": [c["_id"] for c in candidates]}},
+            {"$set": {"status": "sending", "claim": token, "claimed_at": now}},
+        )
+        return await self.outbox.find({"claim": token}).to_list(None)
+
+    async def _dispatch_once(self) -> bool:
+        claimed = await self._claim()
+        if not claimed:
+            return False
+        groups: Dict[tuple, List[dict]] = {}
+        for doc in claimed:
+            groups.setdefault((doc["subject"], doc["html"]), []).append(doc)
+        for docs in groups.values():
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._send_group(docs))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        return True
+
+    async def _send_group(self, docs: List[dict]):
+        try:
+            await self._deliver(docs)
+        finally:
+            self._semaphore.release()
+
+    async def _deliver(self, docs: List[dict]):
+        ids = [d["_id"] for d in docs]
+        started = time.perf_counter()
+        try:
+            await self.transport.send_batch(docs)
+        except MailTransportError as e:
+            if e.permanent and len(docs) > 1:
+                # Bozuk mesaj tüm grubu reddettirdi: tek tek gönderip sadece onu ayır
+                await asyncio.gather(*[self._deliver([doc]) for doc in docs])
+                return
+            await self._schedule_retry(docs, str(e), permanent=e.permanent)
+            return
+        except Exception as e:
+            await self._schedule_retry(docs, str(e))
+            return
+        now = datetime.utcnow()
+        await self.outbox.update_many(
+            {"_id": {"$in": ids}},
+            {"$set": {"status": "sent", "sent_at": now,
+                      "expires_at": now + timedelta(seconds=self.retention_seconds)},
+             "$unset": {"claim": "", "params": ""}},
+        )
+        self.sent += len(docs)
+        logger.info("%s: %d mail gönderildi (%.0f ms)", self.transport.name, len(docs),
+                    (time.perf_counter() - started) * 1000)
+
+    async def _schedule_retry(self, docs: List[dict], error: str, permanent: bool = False):
+        now = datetime.utcnow()
+        for doc in docs:
+            attempts = doc.get("attempts", 0) + 1
+            update = {"attempts": attempts, "last_error": error}
+            unset = {"claim": ""}
+            if permanent or attempts >= self.max_attempts:
+                update["status"] = "failed"
+                update["expires_at"] = now + timedelta(seconds=self.retention_seconds)
+                unset["params"] = ""
+                self.failed += 1
+                logger.error("%s adresine mail gönderilemedi, vazgeçildi: %s", doc["to"], error)
+            else:
+                delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+                delay *= random.uniform(0.8, 1.2)
+                update["status"] = "pending"
+                update["next_attempt_at"] = now + timedelta(seconds=delay)
+                self.retried += 1
+                logger.warning("%s adresine mail gönderilemedi, %.1f sn sonra tekrar: %s", doc["to"], delay, error)
+            await self.outbox.update_one({"_id": doc["_id"]}, {"$set": update, "$unset": unset})
+
+    def stats(self) -> dict:
+        return {
+            "transport": self.transport.name,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "inflight_batches": len(self._inflight),
+        }
+
+
+def transport_from_env(environ):
+    max_concurrency = int(environ.get('MAIL_MAX_CONCURRENCY', '4'))
+    if environ.get('MAIL_TRANSPORT', 'brevo') == 'fake':
+        return FakeTransport(max_concurrency=max_concurrency)
+    return BrevoTransport(
+        api_key=environ.get("BREVO_API_KEY"),
+        sender_email=environ.get("EMAIL_USER"),  # Render'daki e-posta gönderici olarak kullanılır
+        max_concurrency=max_concurrency,
+    )
@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- METRİK TİPLERİ ---
+# prometheus_client'ın ihtiyacımız olan küçük bir alt kümesi. Motor olayları
+# sürücünün thread'lerinden geldiği için güncellemeler kilitle yapılır.
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class GaugeFunction(_Metric):
+    # Değer okuma anında hesaplanır (havuz doluluğu, önbellek boyutu vb.)
+    kind = "gauge"
+
+    def __init__(self, name, help, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(self.fn())}"]
+
+
+class CounterFunction(GaugeFunction):
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge_function(self, name, help, fn) -> GaugeFunction:
+        return self.register(GaugeFunction(name, help, fn))
+
+    def counter_function(self, name, help, fn) -> CounterFunction:
+        return self.register(CounterFunction(name, help, fn))
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# --- HTTP İSTEK METRİKLERİ ---
+# Saf ASGI middleware: BaseHTTPMiddleware'in ek task ve kuyruk maliyeti yok.
+# Rota etiketi, eşleşen rotanın şablonudur (/api/products/{id}); eşleşmeyen
+# adresler tek etikette toplanır ki etiket sayısı sınırsız büyümesin.
+class RequestMetricsMiddleware:
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.latency = registry.histogram(
+            "taptaze_http_request_duration_seconds", "HTTP istek süresi", ("method", "route"))
+        self.responses = registry.counter(
+            "taptaze_http_responses_total", "Durum koduna göre HTTP yanıtları", ("method", "route", "status"))
+        self.in_flight = registry.gauge("taptaze_http_requests_in_flight", "İşlenmekte olan HTTP istekleri")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = scope.get("route")
+            label = getattr(route, "path_format", None) or scope.get("root_path") or "<unmatched>"
+            self.latency.observe(scope["method"], label, value=time.perf_counter() - started)
+            self.responses.inc(scope["method"], label, str(status_code))
+
+
+# --- MONGO KOMUT METRİKLERİ ---
+# pymongo'nun CommandListener'ı Motor'un her komutu için çağrılır: koleksiyon ve
+# işlem bazında süre, dönen belge sayısı ve hatalar.
+class MongoCommandMetrics(monitoring.CommandListener):
+    def __init__(self, registry: Registry):
+        self.latency = registry.histogram(
+            "taptaze_mongo_command_duration_seconds", "Mongo komut süresi", ("collection", "command"))
+        self.documents = registry.counter(
+            "taptaze_mongo_documents_returned_total", "Mongo komutlarının döndürdüğü belgeler",
+            ("collection", "command"))
+        self.failures = registry.counter(
+            "taptaze_mongo_command_failures_total", "Hata dönen Mongo komutları", ("collection", "command"))
+        self._started: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _collection(event) -> str:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        self._started[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def succeeded(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        self.latency.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if cursor:
+            batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+            self.documents.inc(collection, event.command_name, amount=len(batch))
+
+    def failed(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        self.latency.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+        self.failures.inc(collection, event.command_name)
+
+
+class PasswordMetrics:
+    # PasswordPool.observer olarak bağlanır
+    def __init__(self, registry: Registry):
+        self.run = registry.histogram(
+            "taptaze_bcrypt_duration_seconds", "bcrypt çalışma süresi", ("operation",),
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5))
+        self.wait = registry.histogram(
+            "taptaze_bcrypt_queue_seconds", "bcrypt havuz kuyruğunda bekleme", ("operation",))
+
+    def __call__(self, operation: str, wait_seconds: float, run_seconds: float):
+        self.run.observe(operation, value=run_seconds)
+        self.wait.observe(operation, value=wait_seconds)
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from typing import Mapping
+
+from pymongo import monitoring
+
+logger = logging.getLogger("taptaze.mongo")
+
+
+def client_options(environ: Mapping[str, str]) -> dict:
+    # Atlas bağlantı sınırı tüm worker'lar arasında paylaşılır:
+    # worker sayısı x MONGO_MAX_POOL_SIZE sınırın altında kalmalı.
+    return {
+        "appname": environ.get('MONGO_APP_NAME', 'taptaze-api'),
+        "maxPoolSize": int(environ.get('MONGO_MAX_POOL_SIZE', '20')),
+        "minPoolSize": int(environ.get('MONGO_MIN_POOL_SIZE', '2')),
+        "maxIdleTimeMS": int(environ.get('MONGO_MAX_IDLE_MS', '300000')),
+        # Havuz doluysa sonsuza kadar beklemek yerine hata ver
+        "waitQueueTimeoutMS": int(environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+        "serverSelectionTimeoutMS": int(environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "connectTimeoutMS": int(environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        "socketTimeoutMS": int(environ.get('MONGO_SOCKET_TIMEOUT_MS', '20000')),
+    }
+
+
+# --- BAĞLANTI HAVUZU İSTATİSTİKLERİ ---
+# pymongo 4.5 checkout olaylarında süre vermiyor; başlama ve bitiş olayları aynı
+# thread'de geldiği için başlangıç zamanı thread'e özel saklanır.
+class PoolStats(monitoring.ConnectionPoolListener):
+    def __init__(self, registry=None):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.open = 0
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pool_clears = 0
+
+        self.wait_metric = None
+        if registry is not None:
+            self.wait_metric = registry.histogram(
+                "taptaze_mongo_checkout_wait_seconds", "Havuzdan bağlantı alma bekleme süresi",
+                buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.0))
+            registry.gauge_function("taptaze_mongo_connections_open", "Açık Mongo bağlantıları", lambda: self.open)
+            registry.gauge_function("taptaze_mongo_connections_checked_out", "Kullanımdaki Mongo bağlantıları",
+                                    lambda: self.checked_out)
+            registry.counter_function("taptaze_mongo_checkout_failures_total", "Alınamayan bağlantılar",
+                                      lambda: self.checkout_failures)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+        logger.warning("Mongo bağlantı havuzu temizlendi: %s", event.address)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+        logger.warning("Mongo bağlantısı alınamadı (%s, %.0f ms)", event.reason, waited * 1000)
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        if self.wait_metric is not None:
+            self.wait_metric.observe(value=waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> dict:
+        checkouts = self.checkouts or 1
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "created": self.created,
+            "closed": self.closed,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.pool_clears,
+            "avg_wait_ms": round(self.wait_seconds_total / checkouts * 1000, 3),
+            "max_wait_ms": round(self.wait_seconds_max * 1000, 3),
+        }
+
+
+async def warm_up(client) -> float:
+    # İlk isteğin bağlantı kurma maliyetini açılışa taşır (DNS/TLS/SRV + ping)
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    return time.perf_counter() - started
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Teslim edilmiş eski siparişlerin arşivlenmesi.
+
+Sunucu ORDER_ARCHIVE_DAYS tanımlıysa arka planda saatte bir çalıştırır; elle:
+    python order_archive.py --days 90                      # orders_archive_YYYY_MM koleksiyonlarına
+    python order_archive.py --days 90 --mode jsonl --dir arsiv   # arsiv/orders-YYYY-MM.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bson import json_util
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger("taptaze.archive")
+
+DELIVERED = "Teslim Edildi"
+ARCHIVE_PREFIX = "orders_archive_"
+LOCK_ID = "order_archive"
+# Müşterinin sipariş geçmişi arşivden de okunur (server.get_orders)
+ARCHIVE_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="user_id_created_at_id", partialFilterExpression={"user_id": {"$exists": True}}),
+]
+
+
+# --- SİPARİŞ ARŞİVİ ---
+# orders koleksiyonu sadece büyüyordu. Teslim edileli N günden eski siparişler
+# oluşturuldukları aya göre orders_archive_YYYY_MM koleksiyonlarına ya da
+# sıkıştırılmış JSONL dosyalarına taşınır; sıcak koleksiyon ve index'leri
+# RAM'e sığacak kadar küçük kalır. Önce arşive yazılır, sonra silinir: yarıda
+# kesilirse sipariş kaybolmaz, en kötü ihtimalle bir sonraki turda tekrar yazılır
+# (koleksiyonda aynı _id reddedilir, JSONL'de id ile tekilleştirilmeli).
+# Birden fazla worker aynı anda taşımasın diye job_locks'ta süreli kilit alınır.
+class OrderArchiver:
+    def __init__(self, db, older_than_days: int = 90, mode: str = "collection",
+                 directory: Optional[Path] = None, batch_size: int = 500, interval: float = 3600.0):
+        if mode not in ("collection", "jsonl"):
+            raise ValueError(f"Geçersiz arşiv tipi: {mode}")
+        if mode == "jsonl" and directory is None:
+            raise ValueError("JSONL arşivi için klasör gerekli")
+        self.db = db
+        self.older_than_days = older_than_days
+        self.mode = mode
+        self.directory = Path(directory) if directory else None
+        self.batch_size = batch_size
+        self.interval = interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+        self.archived = 0
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+
+    @classmethod
+    def from_env(cls, db, root_dir: Optional[Path] = None) -> Optional["OrderArchiver"]:
+        days = int(os.environ.get('ORDER_ARCHIVE_DAYS', '0'))
+        if days <= 0:
+            return None
+        return cls(
+            db,
+            older_than_days=days,
+            mode=os.environ.get('ORDER_ARCHIVE_MODE', 'collection'),
+            directory=Path(os.environ.get('ORDER_ARCHIVE_DIR', (root_dir or Path('.')) / "archive")),
+            batch_size=int(os.environ.get('ORDER_ARCHIVE_BATCH', '500')),
+            interval=float(os.environ.get('ORDER_ARCHIVE_INTERVAL', '3600')),
+        )
+
+    # --- KİLİT ---
+    async def _acquire(self, ttl: float) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self.db.job_locks.find_one_and_update(
+                {"_id": LOCK_ID, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Kilit başkasında ve süresi dolmamış
+            return False
+        return True
+
+    async def _release(self):
+        await self.db.job_locks.delete_one({"_id": LOCK_ID, "owner": self.owner})
+
+    # --- TAŞIMA ---
+    async def run_once(self) -> int:
+        if not await self._acquire(ttl=max(self.interval, 600)):
+            logger.info("Arşivleme başka bir süreçte çalışıyor, atlandı.")
+            return 0
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=self.older_than_days)
+            moved = 0
+            while True:
+                docs = await self.db.orders.find(
+                    {"status": DELIVERED, "delivered_at": {"$lt": cutoff}}
+                ).sort("delivered_at", 1).limit(self.batch_size).to_list(self.batch_size)
+                if not docs:
+                    break
+                by_month: Dict[str, List[dict]] = defaultdict(list)
+                for doc in docs:
+                    by_month[f"{doc.get('created_at') or doc['delivered_at']:%Y-%m}"].append(doc)
+                for month, group in by_month.items():
+                    await self._write(month, group)
+                await self.db.orders.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+                moved += len(docs)
+            self.archived += moved
+            self.runs += 1
+            self.last_run_at = datetime.utcnow()
+            if moved:
+                logger.info("%d sipariş arşivlendi (%s, %d günden eski)", moved, self.mode, self.older_than_days)
+            return moved
+        finally:
+            await self._release()
+
+    async def _write(self, month: str, docs: List[dict]):
+        if self.mode == "collection":
+            collection = self.db[ARCHIVE_PREFIX + month.replace("-", "_")]
+            await collection.create_indexes(ARCHIVE_INDEXES)
+            try:
+                await collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # Önceki yarım kalmış turdan zaten yazılmış olanlar
+                if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json_util.dumps(doc, ensure_ascii=False) + "\n" for doc in docs).encode("utf-8")
+        path = self.directory / f"orders-{month}.jsonl.gz"
+        # gzip dosyasına ekleme yeni bir gzip üyesi açar; okuyucular hepsini tek akış olarak görür
+        await asyncio.to_thread(self._append, path, lines)
+
+    @staticmethod
+    def _append(path: Path, data: bytes):
+        with gzip.open(path, "ab") as f:
+            f.write(data)
+
+    # --- ARKA PLAN ---
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except (PyMongoError, OSError) as e:
+                logger.exception("Sipariş arşivlenemedi: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "older_than_days": self.older_than_days,
+            "archived": self.archived,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+        }
+
+
+async def archive_collections(db) -> List[str]:
+    names = await db.list_collection_names()
+    return sorted(name for name in names if name.startswith(ARCHIVE_PREFIX))
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Teslim edilmiş eski siparişleri arşivler.")
+    parser.add_argument("--days", type=int, default=90, help="Teslim edileli bu kadar gün geçenler")
+    parser.add_argument("--mode", choices=["collection", "jsonl"], default="collection")
+    parser.add_argument("--dir", default="archive", help="JSONL dosyalarının klasörü")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    uri = os.environ.get('MONGO_URL')
+    if not uri:
+        raise SystemExit("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+    db = AsyncIOMotorClient(uri)[os.environ.get('DB_NAME', 'TaptazeDB')]
+    archiver = OrderArchiver(db, older_than_days=args.days, mode=args.mode, directory=Path(args.dir),
+                             batch_size=args.batch_size)
+    moved = await archiver.run_once()
+    print(f"✅ {moved} sipariş arşivlendi.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
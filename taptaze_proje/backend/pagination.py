@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# --- İMLEÇ (KEYSET) SAYFALAMA ---
+# skip/offset yerine son görülen (sıralama değeri, _id) ikilisinden devam edilir;
+# katalog büyüse de her sayfa index üzerinden aynı maliyetle okunur.
+def encode_cursor(sort_value, last_id: ObjectId) -> str:
+    data = {"v": sort_value, "id": str(last_id)}
+    if isinstance(sort_value, datetime):
+        # Siparişler created_at'e göre sayfalanıyor; tarih JSON'da ISO metni olarak taşınır
+        data = {"v": sort_value.isoformat(), "dt": True, "id": str(last_id)}
+    raw = json.dumps(data, ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[object, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value = datetime.fromisoformat(data["v"]) if data.get("dt") else data["v"]
+        return value, ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def keyset_filter(sort_key: str, cursor: Optional[str], descending: bool = False) -> dict:
+    if not cursor:
+        return {}
+    value, last_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    if sort_key == "_id":
+        return {"_id": {op: last_id}}
+    return {"$or": [
+        {sort_key: {op: value}},
+        {sort_key: value, "_id": {op: last_id}},
+    ]}
+
+
+def build_projection(fields: Optional[Iterable[str]], allowed: Iterable[str]) -> Optional[dict]:
+    if not fields:
+        return None
+    allowed = set(allowed)
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(", ".join(unknown))
+    # id her zaman döner, Mongo'da _id olarak tutuluyor
+    projection = {f: 1 for f in fields if f != "id"}
+    projection["_id"] = 1
+    return projection
+
+
+# unions: aynı şemadaki başka koleksiyonlar (örn. sipariş arşivi) sayfaya
+# $unionWith ile katılır; her biri aynı filtre ve sıralamayla en fazla limit+1
+# belge getirir, birleşim tekrar sıralanıp kesilir.
+async def fetch_page(collection, query: dict, sort_key: str, cursor: Optional[str],
+                     limit: int, projection: Optional[dict],
+                     descending: bool = False, unions: Sequence[str] = ()) -> Tuple[List[dict], Optional[str]]:
+    conditions = [c for c in (query, keyset_filter(sort_key, cursor, descending)) if c]
+    filter_ = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+    if projection is not None and sort_key != "_id":
+        projection = {**projection, sort_key: 1}
+
+    direction = -1 if descending else 1
+    sort = [("_id", direction)] if sort_key == "_id" else [(sort_key, direction), ("_id", direction)]
+    # Bir fazla okuyup sonraki sayfanın olup olmadığını anlıyoruz
+    if unions:
+        page = [{"$match": filter_}, {"$sort": dict(sort)}, {"$limit": limit + 1}]
+        pipeline = page + [{"$unionWith": {"coll": name, "pipeline": page}} for name in unions]
+        pipeline += [{"$sort": dict(sort)}, {"$limit": limit + 1}]
+        if projection is not None:
+            pipeline.append({"$project": projection})
+        docs = await collection.aggregate(pipeline).to_list(limit + 1)
+    else:
+        docs = await collection.find(filter_, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(None if sort_key == "_id" else last.get(sort_key), last["_id"])
+    return docs, next_cursor
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger("taptaze.password")
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+# Process havuzuna gönderilebilmeleri için modül seviyesinde olmalılar
+def _hashpw(password: bytes, rounds: int):
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    return hashed, time.perf_counter() - started
+
+
+def _checkpw(password: bytes, hashed: bytes):
+    started = time.perf_counter()
+    ok = bcrypt.checkpw(password, hashed)
+    return ok, time.perf_counter() - started
+
+
+# --- ŞİFRE HAVUZU ---
+# bcrypt her çağrıda 100-300 ms CPU harcıyor. Event loop'u kilitlememesi için
+# sınırlı bir thread/process havuzunda çalıştırılır; kuyruk doluysa istek
+# beklemek yerine PasswordPoolBusy ile hemen reddedilir.
+class PasswordPool:
+    def __init__(self, workers: int = 2, max_pending: int = 16, rounds: int = 12, mode: str = "thread"):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Geçersiz havuz tipi: {mode}")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.mode = mode
+        self._executor = None
+        # (işlem, bekleme sn, çalışma sn) ile çağrılır; metrics.PasswordMetrics bağlanır
+        self.observer = None
+
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    @classmethod
+    def from_env(cls):
+        workers = int(os.environ.get('PASSWORD_POOL_WORKERS', os.cpu_count() or 2))
+        return cls(
+            workers=workers,
+            max_pending=int(os.environ.get('PASSWORD_POOL_MAX_PENDING', workers * 8)),
+            rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+            mode=os.environ.get('PASSWORD_POOL_MODE', 'thread'),
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, name, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+        total = time.perf_counter() - submitted
+        wait = max(total - run_seconds, 0.0)
+
+        self.calls += 1
+        self.wait_seconds_total += wait
+        self.run_seconds_total += run_seconds
+        self.run_seconds_max = max(self.run_seconds_max, run_seconds)
+        if self.observer is not None:
+            self.observer(name, wait, run_seconds)
+        logger.debug("bcrypt %s: kuyruk %.1f ms, çalışma %.1f ms", name, wait * 1000, run_seconds * 1000)
+        return result
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._submit("hash", _hashpw, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit("verify", _checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def stats(self) -> dict:
+        calls = self.calls or 1
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds_total / calls * 1000, 2),
+            "avg_run_ms": round(self.run_seconds_total / calls * 1000, 2),
+            "max_run_ms": round(self.run_seconds_max * 1000, 2),
+        }
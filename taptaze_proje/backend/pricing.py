@@ -0,0 +1,153 @@
+import math
+import os
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+CRATE_UNIT = "Kasa"
+# Bu birimlerde kesirli miktar (0.5 KG) satılabilir, diğerleri tam sayı
+FRACTIONAL_UNITS = {"KG"}
+PRICE_FIELDS = {"name": 1, "price": 1, "unit_type": 1, "crate_size": 1, "crate_price": 1}
+
+
+class InvalidCart(Exception):
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+# --- SİPARİŞ FİYATLANDIRMA ---
+# İstemcinin gönderdiği fiyat, ürün adı ve toplam tutara güvenilmez; hepsi
+# sunucuda yeniden hesaplanır. Fiyatlar katalog önbelleğindeki anlık görüntüden
+# okunur, önbellekte olmayan ürünler için tek bir $in sorgusu atılır; sepet
+# büyüdükçe DB sorgu sayısı artmaz.
+#
+# Kasa: ürünün crate_size'ı kadar birim (varsayılan CRATE_SIZE) tek kasadır.
+# Kasa fiyatı ürünün crate_price alanından, yoksa birim fiyat x kasa boyu x
+# (1 - CRATE_DISCOUNT) olarak hesaplanır. "Kasa" birimiyle gelen satırlar tam
+# kasa olmalı; normal satırlarda da tam kasalar kasa fiyatından, artan kısım
+# birim fiyattan hesaplanır.
+class OrderPricing:
+    def __init__(self, products, catalog_cache=None, default_crate_size: float = 20.0,
+                 crate_discount: float = 0.0, max_lines: int = 200):
+        self.products = products
+        self.catalog_cache = catalog_cache
+        self.default_crate_size = default_crate_size
+        self.crate_discount = crate_discount
+        self.max_lines = max_lines
+
+        self.priced = 0
+        self.rejected = 0
+        self.db_queries = 0
+
+    @classmethod
+    def from_env(cls, products, catalog_cache=None):
+        # PRICING_SOURCE=db: her siparişte fiyatlar Mongo'dan (önbellek TTL'i kadar bayat fiyat kabul edilemiyorsa)
+        return cls(
+            products,
+            catalog_cache=catalog_cache if os.environ.get('PRICING_SOURCE', 'cache') != 'db' else None,
+            default_crate_size=float(os.environ.get('CRATE_SIZE', '20')),
+            crate_discount=float(os.environ.get('CRATE_DISCOUNT', '0')),
+            max_lines=int(os.environ.get('ORDER_MAX_LINES', '200')),
+        )
+
+    async def _load(self, product_ids: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        if self.catalog_cache is not None:
+            for product in await self.catalog_cache.get_products_by_ids(product_ids):
+                found[product["id"]] = product
+        oids = []
+        for product_id in product_ids:
+            if product_id in found:
+                continue
+            try:
+                oids.append(ObjectId(product_id))
+            except (InvalidId, TypeError):
+                pass
+        if oids:
+            self.db_queries += 1
+            async for doc in self.products.find({"_id": {"$in": oids}}, PRICE_FIELDS):
+                found[str(doc["_id"])] = {**doc, "id": str(doc["_id"])}
+        return found
+
+    async def price(self, items: Iterable[dict]) -> dict:
+        items = list(items)
+        if not items:
+            raise InvalidCart(["Sepet boş."])
+        if len(items) > self.max_lines:
+            raise InvalidCart([f"Sepette en fazla {self.max_lines} satır olabilir."])
+
+        products = await self._load(list(dict.fromkeys(item["product_id"] for item in items)))
+        lines, problems = [], []
+        subtotal = total = 0.0
+        for index, item in enumerate(items, 1):
+            product = products.get(item["product_id"])
+            if product is None:
+                problems.append(f"{index}. satır: ürün bulunamadı ({item['product_id']})")
+                continue
+            try:
+                line = self._price_line(product, item["quantity"], item.get("unit_type"))
+            except ValueError as e:
+                problems.append(f"{index}. satır ({product['name']}): {e}")
+                continue
+            lines.append(line)
+            subtotal += line["quantity"] * line["price"]
+            total += line["line_total"]
+
+        if problems:
+            self.rejected += 1
+            raise InvalidCart(problems)
+        self.priced += 1
+        return {
+            "items": lines,
+            "subtotal": round(subtotal, 2),
+            "discount": round(subtotal - total, 2),
+            "total_amount": round(total, 2),
+        }
+
+    def _price_line(self, product: dict, quantity: float, unit_type: Optional[str]) -> dict:
+        unit = product["unit_type"]
+        price = float(product["price"])
+        quantity = float(quantity)
+        if not math.isfinite(quantity) or quantity <= 0:
+            raise ValueError("miktar sıfırdan büyük olmalı")
+
+        crate_size = float(product.get("crate_size") or self.default_crate_size)
+        crate_price = product.get("crate_price")
+        if crate_price is None:
+            crate_price = round(price * crate_size * (1 - self.crate_discount), 2)
+
+        requested = unit_type or unit
+        crates = quantity / crate_size
+        if requested.casefold() == CRATE_UNIT.casefold():
+            # Kasa satırında miktar birim cinsinden gelir (2 kasa = 40 KG)
+            if abs(crates - round(crates)) > 1e-9:
+                raise ValueError(f"kasa ile alımda miktar {crate_size:g} {unit} katı olmalı")
+            crates = round(crates)
+            line_total = crates * crate_price
+        elif requested.casefold() == unit.casefold():
+            if unit.upper() not in FRACTIONAL_UNITS and quantity != int(quantity):
+                raise ValueError(f"{unit} için miktar tam sayı olmalı")
+            crates = math.floor(crates + 1e-9)
+            line_total = crates * crate_price + (quantity - crates * crate_size) * price
+        else:
+            raise ValueError(f"'{requested}' birimi geçersiz, ürün {unit} ile satılıyor")
+
+        return {
+            "product_id": product["id"],
+            "product_name": product["name"],
+            "quantity": quantity,
+            "price": price,
+            "unit_type": requested,
+            "crates": crates,
+            "line_total": round(line_total, 2),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "source": "cache" if self.catalog_cache is not None else "db",
+            "priced": self.priced,
+            "rejected": self.rejected,
+            "db_queries": self.db_queries,
+        }
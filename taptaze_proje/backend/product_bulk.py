@@ -0,0 +1,272 @@
+import asyncio
+import math
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+OPERATIONS = ("upsert", "price", "stock")
+PRODUCT_FIELDS = ("sku", "name", "category_id", "price", "unit_type", "stock", "description", "image",
+                  "crate_size", "crate_price")
+NUMERIC_FIELDS = ("price", "stock", "crate_size", "crate_price")
+REQUIRED_FIELDS = ("name", "category_id", "price", "unit_type")
+
+
+class InvalidItem(ValueError):
+    pass
+
+
+# NDJSON gövdesi parça parça okunur; bozuk satır tüm yüklemeyi değil sadece kendini düşürür
+async def ndjson_items(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return InvalidItem("geçersiz JSON satırı")
+
+
+# --- TOPLU ÜRÜN YAZMA ---
+# Sabah fiyat/stok güncellemesi yüzlerce ürüne tek tek PUT atmak yerine tek
+# istekte gelir. Kalemler chunk_size'lık parçalara bölünür; her parça için
+# önce tek bir $in sorgusuyla id/sku'lar çözülür, sonra tek bir sırasız
+# bulk_write atılır. Hatalı kalem diğerlerini durdurmaz, sonucu kalem bazında
+# döner. Katalog önbelleği burada değil, çağıran tarafından en sonda bir kez
+# geçersiz kılınır. Stoğu azaltan kalemler süzgeçte "stock >= -delta" koşuluyla
+# ayrı ayrı yazılır; stok sıfırın altına düşecekse kalem başarısız sayılır.
+# Yeni ya da güncellenen ürünün category_id'si categories'te yoksa kalem reddedilir.
+#
+# Kalemler:
+#   {"op": "upsert", "sku": "...", "name": ..., "price": ...}   sku/id yoksa yeni ürün
+#   {"op": "price", "id": "...", "price": 24.9, "crate_price": 450}
+#   {"op": "stock", "sku": "...", "delta": -3}   ya da   "stock": 120
+class ProductBulkWriter:
+    def __init__(self, products, categories=None, chunk_size: int = 500):
+        self.products = products
+        self.categories = categories
+        self.chunk_size = chunk_size
+
+        self.items = 0
+        self.failed = 0
+        self.chunks = 0
+
+    @classmethod
+    def from_env(cls, products, categories=None):
+        return cls(products, categories, chunk_size=int(os.environ.get('PRODUCT_BULK_CHUNK', '500')))
+
+    async def apply(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> dict:
+        summary = {"received": 0, "created": 0, "updated": 0, "failed": 0, "results": []}
+        chunk: List[Tuple[int, Any]] = []
+        async for item in _aiter(items):
+            chunk.append((summary["received"], item))
+            summary["received"] += 1
+            if len(chunk) >= self.chunk_size:
+                await self._write_chunk(chunk, summary)
+                chunk = []
+        if chunk:
+            await self._write_chunk(chunk, summary)
+        self.items += summary["received"]
+        self.failed += summary["failed"]
+        return summary
+
+    async def _write_chunk(self, chunk: List[Tuple[int, Any]], summary: dict):
+        self.chunks += 1
+        results: Dict[int, dict] = {}
+        prepared: List[Tuple[int, dict]] = []
+        for index, item in chunk:
+            try:
+                prepared.append((index, self._validate(item)))
+            except InvalidItem as e:
+                results[index] = {"index": index, "status": "failed", "error": str(e)}
+
+        existing = await self._resolve(prepared)
+        categories = await self._categories(prepared)
+        operations, owners, upserts, guarded = [], [], [], []
+        for index, item in prepared:
+            try:
+                if categories is not None and item.get("category_id") is not None \
+                        and item["category_id"] not in categories:
+                    raise InvalidItem(f"kategori bulunamadı: {item['category_id']!r}")
+                operation, product_id, created = self._operation(item, existing)
+            except InvalidItem as e:
+                results[index] = {"index": index, "status": "failed", "error": str(e)}
+                continue
+            if item["op"] == "stock" and (item.get("delta") or 0) < 0:
+                guarded.append((index, operation))
+            else:
+                operations.append(operation)
+                owners.append(index)
+            results[index] = {"index": index, "status": "created" if created else "updated", "id": product_id}
+            if created and isinstance(operation, UpdateOne):
+                upserts.append((index, product_id, item["sku"]))
+
+        if operations:
+            try:
+                details = (await self.products.bulk_write(operations, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+            for error in details.get("writeErrors", []):
+                index = owners[error["index"]]
+                results[index] = {"index": index, "status": "failed", "error": error.get("errmsg", "yazma hatası")}
+            await self._check_upserts(upserts, details, results)
+        if guarded:
+            # Toplu sonuç hangi kalemin eşleşmediğini söylemez; azaltmalar tek tek ama eşzamanlı
+            written = await asyncio.gather(*[self.products.bulk_write([operation]) for _, operation in guarded],
+                                           return_exceptions=True)
+            for (index, _), result in zip(guarded, written):
+                if isinstance(result, BulkWriteError):
+                    errors = result.details.get("writeErrors") or [{}]
+                    results[index] = {"index": index, "status": "failed",
+                                      "error": errors[0].get("errmsg", "yazma hatası")}
+                elif isinstance(result, BaseException):
+                    raise result
+                elif result.matched_count == 0:
+                    results[index] = {"index": index, "status": "failed", "error": "yetersiz stok"}
+
+        for index, _ in chunk:
+            result = results[index]
+            summary[result["status"]] += 1
+            summary["results"].append(result)
+
+    async def _check_upserts(self, upserts: List[Tuple[int, str, str]], details: dict, results: Dict[int, dict]):
+        # Sku çözüldükten sonra başka bir istek aynı sku'yu eklediyse upsert onu günceller
+        upserted = {str(u["_id"]) for u in details.get("upserted", [])}
+        raced = [(index, sku) for index, product_id, sku in upserts
+                 if results[index]["status"] == "created" and product_id not in upserted]
+        if not raced:
+            return
+        ids = {doc["sku"]: str(doc["_id"])
+               async for doc in self.products.find({"sku": {"$in": [sku for _, sku in raced]}}, {"sku": 1})}
+        for index, sku in raced:
+            results[index].update(status="updated", id=ids.get(sku))
+
+    @staticmethod
+    def _validate(item: Any) -> dict:
+        if isinstance(item, InvalidItem):
+            raise item
+        if not isinstance(item, dict):
+            raise InvalidItem("kalem JSON nesnesi olmalı")
+        op = item.get("op", "upsert")
+        if op not in OPERATIONS:
+            raise InvalidItem(f"geçersiz işlem: {op!r} ({', '.join(OPERATIONS)})")
+        # Gelen _id yok sayılır; ürün "id" ya da "sku" ile seçilir
+        item = {key: value for key, value in item.items() if key != "_id"}
+        item["op"] = op
+        if "id" in item:
+            try:
+                item["_id"] = ObjectId(item["id"])
+            except (InvalidId, TypeError):
+                raise InvalidItem(f"geçersiz ürün id: {item['id']!r}")
+        for field in NUMERIC_FIELDS + ("delta",):
+            if item.get(field) is None:
+                continue
+            value = item[field]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise InvalidItem(f"{field} sayı olmalı")
+            if field != "delta" and value < 0:
+                raise InvalidItem(f"{field} negatif olamaz")
+        if op != "upsert" and "_id" not in item and not item.get("sku"):
+            raise InvalidItem("id ya da sku gerekli")
+        return item
+
+    async def _categories(self, prepared: List[Tuple[int, dict]]) -> Optional[set]:
+        # Parçadaki kategori id'lerinden var olanlar; koleksiyon verilmediyse kontrol yok
+        if self.categories is None:
+            return None
+        oids = set()
+        for _, item in prepared:
+            try:
+                oids.add(ObjectId(item["category_id"]))
+            except (KeyError, InvalidId, TypeError):
+                pass
+        if not oids:
+            return set()
+        return {str(doc["_id"]) async for doc in self.categories.find({"_id": {"$in": list(oids)}}, {"_id": 1})}
+
+    async def _resolve(self, prepared: List[Tuple[int, dict]]) -> Dict[Any, str]:
+        # Parçadaki tüm id ve sku'lar tek sorguda; anahtar ObjectId ya da ("sku", değer)
+        oids = [item["_id"] for _, item in prepared if "_id" in item]
+        skus = [item["sku"] for _, item in prepared if "_id" not in item and item.get("sku")]
+        clauses = []
+        if oids:
+            clauses.append({"_id": {"$in": oids}})
+        if skus:
+            clauses.append({"sku": {"$in": skus}})
+        existing: Dict[Any, str] = {}
+        if clauses:
+            async for doc in self.products.find({"$or": clauses}, {"sku": 1}):
+                existing[doc["_id"]] = str(doc["_id"])
+                if doc.get("sku"):
+                    existing[("sku", doc["sku"])] = str(doc["_id"])
+        return existing
+
+    @staticmethod
+    def _operation(item: dict, existing: Dict[Any, str]) -> Tuple[Any, Optional[str], bool]:
+        op = item["op"]
+        if "_id" in item:
+            key, selector = item["_id"], {"_id": item["_id"]}
+        elif item.get("sku"):
+            key, selector = ("sku", item["sku"]), {"sku": item["sku"]}
+        else:
+            key = selector = None
+        product_id = existing.get(key) if key is not None else None
+
+        if op == "upsert":
+            fields = {field: item[field] for field in PRODUCT_FIELDS if item.get(field) is not None}
+            if product_id is not None:
+                if not fields:
+                    raise InvalidItem("güncellenecek alan yok")
+                return UpdateOne(selector, {"$set": fields}), product_id, False
+            if "_id" in item:
+                raise InvalidItem("ürün bulunamadı")
+            missing = [field for field in REQUIRED_FIELDS if field not in fields]
+            if missing:
+                raise InvalidItem(f"yeni ürün için eksik alan: {', '.join(missing)}")
+            fields.setdefault("stock", 0.0)
+            oid = ObjectId()
+            if selector is None:
+                return InsertOne({"_id": oid, **fields}), str(oid), True
+            # Aynı sku arada eklendiyse upsert onu günceller, kopya oluşmaz
+            return UpdateOne(selector, {"$set": fields, "$setOnInsert": {"_id": oid}}, upsert=True), str(oid), True
+
+        if product_id is None:
+            raise InvalidItem("ürün bulunamadı")
+        if op == "price":
+            fields = {field: item[field] for field in ("price", "crate_price") if item.get(field) is not None}
+            if not fields:
+                raise InvalidItem("price ya da crate_price gerekli")
+            return UpdateOne(selector, {"$set": fields}), product_id, False
+        if (item.get("delta") is None) == (item.get("stock") is None):
+            raise InvalidItem("stock işleminde delta ya da stock alanlarından biri gerekli")
+        if item.get("delta") is None:
+            return UpdateOne(selector, {"$set": {"stock": item["stock"]}}), product_id, False
+        if item["delta"] < 0:
+            # Eşzamanlı satışla yarışsa da stok eksiye düşmez; eşleşmezse yetersiz stok
+            selector = {**selector, "stock": {"$gte": -item["delta"]}}
+        return UpdateOne(selector, {"$inc": {"stock": item["delta"]}}), product_id, False
+
+    def stats(self) -> dict:
+        return {"chunk_size": self.chunk_size, "items": self.items, "failed": self.failed, "chunks": self.chunks}
+
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,153 @@
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from pymongo import ReturnDocument
+
+
+class Limit(NamedTuple):
+    scope: str      # ip | email | route
+    limit: int
+    window: int     # saniye
+
+
+class RateLimited(Exception):
+    def __init__(self, rule: str, scope: str, retry_after: int):
+        super().__init__(f"{rule}/{scope}")
+        self.rule = rule
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+# Varsayılanlar; RATE_LIMIT_<KURAL>="ip=20/60,email=10/600" ile değiştirilebilir
+DEFAULT_RULES = {
+    "login": [Limit("ip", 20, 60), Limit("email", 10, 600), Limit("route", 1200, 60)],
+    "verify": [Limit("ip", 20, 60), Limit("email", 5, 600), Limit("route", 1200, 60)],
+    "register": [Limit("ip", 10, 600), Limit("email", 3, 600), Limit("route", 600, 60)],
+}
+
+
+def parse_rules(spec: str) -> List[Limit]:
+    limits = []
+    for part in spec.split(","):
+        scope, _, value = part.strip().partition("=")
+        count, _, window = value.partition("/")
+        limits.append(Limit(scope.strip(), int(count), int(window)))
+    return limits
+
+
+# --- SAYAÇ DEPOLARI ---
+# Anahtar: "<kural>:<kapsam>:<değer>", pencere numarası: int(zaman / pencere)
+class LocalStore:
+    def __init__(self, sweep_every: int = 10000):
+        self._counts: Dict[tuple, int] = {}
+        self._ops = 0
+        self.sweep_every = sweep_every
+
+    async def incr(self, key: str, window_id: int, window: int) -> int:
+        self._ops += 1
+        if self._ops % self.sweep_every == 0:
+            self._sweep()
+        count = self._counts.get((key, window_id, window), 0) + 1
+        self._counts[(key, window_id, window)] = count
+        return count
+
+    async def get(self, key: str, window_id: int, window: int) -> int:
+        return self._counts.get((key, window_id, window), 0)
+
+    def _sweep(self):
+        now = time.time()
+        # Bir önceki pencereden eski sayaçlar artık hesaba girmez
+        self._counts = {
+            k: v for k, v in self._counts.items() if k[1] >= int(now // k[2]) - 1
+        }
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class MongoStore:
+    # Birden fazla worker/sunucu aynı sayaçları paylaşsın diye; TTL index eski pencereleri siler
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+    async def incr(self, key: str, window_id: int, window: int) -> int:
+        doc = await self.collection.find_one_and_update(
+            {"_id": f"{key}:{window}:{window_id}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(seconds=2 * window)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["count"]
+
+    async def get(self, key: str, window_id: int, window: int) -> int:
+        doc = await self.collection.find_one({"_id": f"{key}:{window}:{window_id}"}, {"count": 1})
+        return doc["count"] if doc else 0
+
+
+# --- KAYAN PENCERE SINIRLAYICI ---
+# Tam kayan pencere yerine iki sabit pencerenin ağırlıklı toplamı kullanılır:
+# sayı = önceki_pencere * (kalan oran) + bu_pencere. Anahtar başına iki sayaç yeter.
+class RateLimiter:
+    def __init__(self, rules: Dict[str, List[Limit]], store=None, enabled: bool = True):
+        self.rules = rules
+        self.store = store or LocalStore()
+        self.enabled = enabled
+        self.allowed: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_env(cls, store=None):
+        rules = dict(DEFAULT_RULES)
+        for name in list(rules):
+            spec = os.environ.get(f"RATE_LIMIT_{name.upper()}")
+            if spec:
+                rules[name] = parse_rules(spec)
+        return cls(rules, store=store, enabled=os.environ.get('RATE_LIMIT_ENABLED', '1') != '0')
+
+    async def _hit(self, key: str, limit: Limit, now: float) -> Optional[int]:
+        window_id = int(now // limit.window)
+        elapsed = (now % limit.window) / limit.window
+        current = await self.store.incr(key, window_id, limit.window)
+        previous = await self.store.get(key, window_id - 1, limit.window)
+        estimated = previous * (1 - elapsed) + current
+        if estimated <= limit.limit:
+            return None
+        # Tahmini bekleme: önceki pencerenin ağırlığı yeterince azalana kadar
+        if previous:
+            needed = (estimated - limit.limit) / previous * limit.window
+            return max(1, math.ceil(min(needed, limit.window * (1 - elapsed))))
+        return max(1, math.ceil(limit.window * (1 - elapsed)))
+
+    async def check(self, rule: str, ip: Optional[str] = None, email: Optional[str] = None):
+        if not self.enabled or rule not in self.rules:
+            return
+        now = time.time()
+        values = {"ip": ip, "email": email.strip().lower() if email else None, "route": "*"}
+        for limit in self.rules[rule]:
+            value = values.get(limit.scope)
+            if value is None:
+                continue
+            retry_after = await self._hit(f"{rule}:{limit.scope}:{value}", limit, now)
+            if retry_after is not None:
+                self.rejected[f"{rule}:{limit.scope}"] += 1
+                raise RateLimited(rule, limit.scope, retry_after)
+        self.allowed[rule] += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "rules": {name: [limit._asdict() for limit in limits] for name, limits in self.rules.items()},
+        }
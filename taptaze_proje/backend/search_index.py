@@ -0,0 +1,327 @@
+import asyncio
+import bisect
+import gc
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# --- TÜRKÇE METİN NORMALİZASYONU ---
+# Önce Türkçe kurallarıyla küçük harfe çevrilir (I -> ı, İ -> i), sonra
+# aksanlar atılır; "SOĞAN", "soğan" ve "sogan" aynı kelimeye düşer.
+_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_FOLD = str.maketrans({
+    "ı": "i", "ş": "s", "ğ": "g", "ç": "c", "ö": "o", "ü": "u",
+    "â": "a", "î": "i", "û": "u", "̇": None,
+})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+NAME = 1
+DESCRIPTION = 2
+
+MIN_FUZZY_LENGTH = 4
+FUZZY_PREFIX_MAX = 8
+# Değişen ürün oranı bunu aşarsa indeks thread'de baştan kurulur
+REBUILD_RATIO = 0.2
+# Artımlı güncellemede bu kadar üründe bir olay döngüsüne dönülür
+APPLY_CHUNK = 200
+
+
+def fold(text: str) -> str:
+    return text.translate(_LOWER).lower().translate(_FOLD)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(fold(text)) if text else []
+
+
+def _deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    # Levenshtein mesafesi <= 1 mi (komşu harf yer değiştirmesi de sayılır)
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+# --- ARAMA İNDEKSİ ---
+# Ters indeks (kelime -> ürün) + sıralı kelime listesi ile önek araması.
+# Her kelime için isimde ve sadece açıklamada geçen ürünler ayrı kümelerde
+# tutulur; sorgu skorları ürün ürün değil, küme işlemleriyle (C hızında)
+# hesaplanır. Yazım hatası toleransı için kelime öneklerinin tek harf
+# silinmiş halleri tutulur (symmetric delete); "domtes" -> "domates" gibi
+# eşleşmeler tüm kelime listesini taramadan bulunur.
+class SearchIndex:
+    def __init__(self):
+        # kelime -> (isminde geçen ürünler, sadece açıklamasında geçen ürünler)
+        self._postings: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._doc_signature: Dict[str, Tuple] = {}
+        self._doc_category: Dict[str, Optional[str]] = {}
+        self._by_category: Dict[Optional[str], Set[str]] = {}
+        self._fuzzy: Dict[str, Set[str]] = {}
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+        self._pending: Optional[List[dict]] = None
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    @staticmethod
+    def _signature(product: dict) -> Tuple:
+        return product.get("name"), product.get("description"), product.get("category_id")
+
+    # --- GÜNCELLEME ---
+    def upsert(self, product: dict):
+        product_id = product["id"]
+        signature = self._signature(product)
+        if self._doc_signature.get(product_id) == signature:
+            return
+        self.remove(product_id)
+
+        fields: Dict[str, int] = {}
+        for token in tokenize(product.get("name")):
+            fields[token] = fields.get(token, 0) | NAME
+        for token in tokenize(product.get("description")):
+            fields[token] = fields.get(token, 0) | DESCRIPTION
+
+        for token, mask in fields.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = (set(), set())
+                self._add_fuzzy_keys(token)
+                self._vocab_dirty = True
+            posting[0 if mask & NAME else 1].add(product_id)
+        self._doc_tokens[product_id] = set(fields)
+        self._doc_signature[product_id] = signature
+        category_id = product.get("category_id")
+        self._doc_category[product_id] = category_id
+        self._by_category.setdefault(category_id, set()).add(product_id)
+
+    def remove(self, product_id: str):
+        for token in self._doc_tokens.pop(product_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting[0].discard(product_id)
+            posting[1].discard(product_id)
+            if not posting[0] and not posting[1]:
+                # Silme anahtarları bırakılır; sorguda boş kelimeler zaten elenir
+                del self._postings[token]
+                self._vocab_dirty = True
+        self._doc_signature.pop(product_id, None)
+        if product_id in self._doc_category:
+            self._by_category[self._doc_category.pop(product_id)].discard(product_id)
+
+    def sync(self, products: Iterable[dict]):
+        # Katalog yeniden yüklendiğinde sadece değişen ürünler yeniden indekslenir
+        seen = set()
+        for product in products:
+            seen.add(product["id"])
+            self.upsert(product)
+        for product_id in [pid for pid in self._doc_tokens if pid not in seen]:
+            self.remove(product_id)
+
+    def _add_fuzzy_keys(self, token: str):
+        if len(token) < MIN_FUZZY_LENGTH - 1:
+            return
+        for length in range(MIN_FUZZY_LENGTH - 1, min(len(token), FUZZY_PREFIX_MAX + 1) + 1):
+            prefix = token[:length]
+            for key in _deletes(prefix) | {prefix}:
+                self._fuzzy.setdefault(key, set()).add(token)
+
+    # --- ARKA PLANDA GÜNCELLEME ---
+    # Katalog yükleme dinleyicisi (catalog_cache.add_listener). 100k üründe ilk
+    # kurulum saniyeler sürüyor; olay döngüsünü tutmamak için fark ve baştan
+    # kurulum thread'de yapılır, az sayıda değişiklik döngüde parça parça
+    # uygulanır. Üst üste gelen yüklemelerde sadece sonuncusu işlenir.
+    def schedule_sync(self, products: List[dict]):
+        self._pending = products
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_pending())
+
+    async def wait_ready(self):
+        # İlk kurulum bitmeden gelen arama boş sonuç dönmesin; sonraki güncellemeler beklenmez
+        if not self._doc_tokens and self._sync_task is not None and not self._sync_task.done():
+            await asyncio.shield(self._sync_task)
+
+    async def stop(self):
+        self._pending = None
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+    async def _sync_pending(self):
+        while self._pending is not None:
+            products, self._pending = self._pending, None
+            # Dinleyiciye verilen liste yerinde değişmesin diye kopyalanır
+            products = list(products)
+            changed, removed = await asyncio.to_thread(self._changes, products)
+            if len(changed) > REBUILD_RATIO * max(len(self), 1):
+                fresh = await asyncio.to_thread(self._build_without_gc, products)
+                self._adopt(fresh)
+                continue
+            for i, product in enumerate(changed, 1):
+                self.upsert(product)
+                if i % APPLY_CHUNK == 0:
+                    await asyncio.sleep(0)
+            for product_id in removed:
+                self.remove(product_id)
+
+    def _changes(self, products: Sequence[dict]) -> Tuple[List[dict], List[str]]:
+        # Thread'de çalışır; indeksi sadece okur (yazan tek yer _sync_pending)
+        signatures = self._doc_signature
+        changed = [p for p in products if signatures.get(p["id"]) != self._signature(p)]
+        seen = {p["id"] for p in products}
+        removed = [pid for pid in list(signatures) if pid not in seen]
+        return changed, removed
+
+    @classmethod
+    def build(cls, products: Iterable[dict]) -> "SearchIndex":
+        index = cls()
+        index.sync(products)
+        index._vocabulary()
+        return index
+
+    @classmethod
+    def _build_without_gc(cls, products: Sequence[dict]) -> "SearchIndex":
+        # Kurulum milyonlarca set/str üretir; arada tetiklenen tam GC turu GIL'i
+        # yüzlerce ms tutup event loop'u durduruyordu. Kurulum boyunca GC kapalı,
+        # sonra indeks dondurulur ki sonraki turlar onu tekrar taramasın.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return cls.build(products)
+        finally:
+            if enabled:
+                gc.freeze()
+                gc.enable()
+
+    def _adopt(self, fresh: "SearchIndex"):
+        self._postings = fresh._postings
+        self._doc_tokens = fresh._doc_tokens
+        self._doc_signature = fresh._doc_signature
+        self._doc_category = fresh._doc_category
+        self._by_category = fresh._by_category
+        self._fuzzy = fresh._fuzzy
+        self._vocab = fresh._vocab
+        self._vocab_dirty = fresh._vocab_dirty
+
+    # --- ARAMA ---
+    def _vocabulary(self) -> List[str]:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        return self._vocab
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        vocab = self._vocabulary()
+        start = bisect.bisect_left(vocab, prefix)
+        end = bisect.bisect_left(vocab, prefix + "\uffff")
+        return vocab[start:end]
+
+    def _fuzzy_tokens(self, term: str) -> Set[str]:
+        prefix = term[:FUZZY_PREFIX_MAX]
+        candidates: Set[str] = set()
+        for key in _deletes(prefix) | {prefix}:
+            candidates |= self._fuzzy.get(key, set())
+        matches = set()
+        for token in candidates:
+            if token not in self._postings:
+                continue
+            # Kelimenin başı, sorgu terimine en fazla bir harf farkla uymalı
+            if any(_within_one_edit(prefix, token[:n]) for n in (len(prefix) - 1, len(prefix), len(prefix) + 1)):
+                matches.add(token)
+        return matches
+
+    def _term_tokens(self, term: str) -> List[Tuple[str, float]]:
+        tokens = [(token, 3.0 if token == term else 2.0) for token in self._prefix_tokens(term)]
+        if not tokens and len(term) >= MIN_FUZZY_LENGTH:
+            tokens = [(token, 1.0) for token in self._fuzzy_tokens(term)]
+        return tokens
+
+    def _term_tiers(self, tokens: List[Tuple[str, float]]) -> Dict[float, Set[str]]:
+        # Skor -> ürünler. Ürün, terimdeki en yüksek skorlu eşleşmesinin katmanında
+        # durur: isimde geçen kelime ağırlığın iki katı, açıklamada geçen bir katı
+        if len(tokens) == 1:
+            # Tek kelimenin iki kümesi zaten ayrık; kopyalamadan kullanılır
+            (token, weight), = tokens
+            name_ids, description_ids = self._postings[token]
+            return {score: ids for score, ids in ((weight * 2.0, name_ids), (weight, description_ids)) if ids}
+        sources = sorted(
+            ((weight * (2.0 if field == 0 else 1.0), token, field) for token, weight in tokens for field in (0, 1)),
+            key=lambda source: -source[0],
+        )
+        tiers: Dict[float, Set[str]] = {}
+        assigned: Set[str] = set()
+        for score, token, field in sources:
+            new = self._postings[token][field] - assigned
+            if new:
+                tiers[score] = tiers[score] | new if score in tiers else new
+                assigned = assigned | new
+        return tiers
+
+    def search(self, query: str, category_id: Optional[str] = None, limit: int = 50) -> List[str]:
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        # Her terim en az bir alanda eşleşmeli (VE); en seçici terimden başlanır
+        plans = []
+        for term in terms:
+            tokens = self._term_tokens(term)
+            if not tokens:
+                return []
+            size = sum(len(self._postings[t][0]) + len(self._postings[t][1]) for t, _ in tokens)
+            plans.append((size, tokens))
+        plans.sort(key=lambda plan: plan[0])
+
+        total: Optional[Dict[float, Set[str]]] = None
+        for _, tokens in plans:
+            tiers = self._term_tiers(tokens)
+            if total is None:
+                total = tiers
+            else:
+                # Skorlar toplanır; kesişim kümelerde yapılır, ürün ürün değil
+                combined: Dict[float, Set[str]] = {}
+                for score, ids in total.items():
+                    for term_score, term_ids in tiers.items():
+                        both = ids & term_ids
+                        if both:
+                            key = score + term_score
+                            combined[key] = combined[key] | both if key in combined else both
+                total = combined
+            if not total:
+                return []
+        return self._rank(total, category_id, limit)
+
+    def _rank(self, tiers: Dict[float, Set[str]], category_id: Optional[str], limit: int) -> List[str]:
+        in_category = self._by_category.get(category_id, set()) if category_id else None
+        ranked: List[str] = []
+        # Yüksek skordan başlanır; eşit skorda ürün kimliği sırası, limit dolunca durulur
+        for score in sorted(tiers, reverse=True):
+            ids = tiers[score] if in_category is None else tiers[score] & in_category
+            needed = limit - len(ranked)
+            ranked.extend(sorted(ids) if len(ids) <= needed else heapq.nsmallest(needed, ids))
+            if len(ranked) >= limit:
+                break
+        return ranked
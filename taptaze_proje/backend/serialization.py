@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Any, Iterable
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+
+
+# --- HIZLI SERİLEŞTİRME ---
+# Okuma yollarında Mongo belgeleri Pydantic modeline çevrilmeden doğrudan JSON'a
+# yazılır; doğrulama sadece yazma isteklerinde (OrderCreate vb.) yapılır.
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def pick(doc: dict, fields: Iterable[str]) -> dict:
+    # Modeldeki alan sırasıyla; eksik opsiyonel alanlar None döner
+    out = {"id": str(doc["_id"])} if "_id" in doc else {"id": doc.get("id")}
+    for field in fields:
+        if field != "id":
+            out[field] = doc.get(field)
+    return out
@@ -1,46 +1,99 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status, Request
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel
-from typing import List, Optional
+import orjson
+from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
-from bson import ObjectId
 from pathlib import Path
-from dotenv import load_dotenv
+import asyncio
+import importlib
+import logging
 import os
-import bcrypt
-import random
-import smtplib
-from email.mime.text import MIMEText
-from fastapi import BackgroundTasks
-import requests
-
-# --- AYARLAR VE BAĞLANTILAR ---
+import secrets
+from admin_stats import AdminStats
+from auth_tokens import InvalidToken, TokenService, bearer_token
+from catalog_cache import CatalogCache, Payload
+from change_stream import ChangeStreamDispatcher
+from events import TOPICS as EVENT_TOPICS, EventHub, TooManySubscribers
+from idempotency import IdempotencyConflict, IdempotencyInProgress, IdempotencyStore, InvalidIdempotencyKey
+from indexes import bootstrap as bootstrap_indexes
+from password_pool import PasswordPool, PasswordPoolBusy
+from rate_limit import MongoStore, RateLimited, RateLimiter
+from order_archive import DELIVERED, OrderArchiver, archive_collections
+from mongo_pool import PoolStats, client_options, warm_up as warm_up_mongo
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MongoCommandMetrics, PasswordMetrics, Registry, RequestMetricsMiddleware
+from search_index import SearchIndex
+from pagination import InvalidCursor, build_projection, encode_cursor, fetch_page
+from pricing import InvalidCart, OrderPricing
+from product_bulk import ProductBulkWriter, ndjson_items
+from serialization import FastJSONResponse, dumps, pick
+from static_assets import IMMUTABLE_CACHE, FingerprintedStaticFiles
+import image_variants as image_variants_module
+from image_variants import VariantNotFound
+from stock_reservation import InvalidProduct, OutOfStock, StockReservation
+
+# --- AYARLAR ---
+# Import sırasında hiçbir bağlantı kurulmaz; her şey create_app() ve lifespan'de.
+# Nadiren gereken alt sistemler (mail, loop izleyici) ilk ihtiyaçta yüklenir.
+logger = logging.getLogger("taptaze.server")
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-uri = os.environ.get('MONGO_URL')
-if not uri:
-    raise ValueError("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+if (ROOT_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(ROOT_DIR / '.env')
+
+PRODUCTS_DEFAULT_LIMIT = int(os.environ.get('PRODUCTS_DEFAULT_LIMIT', '50'))
+PRODUCTS_MAX_LIMIT = int(os.environ.get('PRODUCTS_MAX_LIMIT', '200'))
+PRODUCT_SORT_KEYS = {"id": "_id", "name": "name", "price": "price"}
+ORDERS_DEFAULT_LIMIT = int(os.environ.get('ORDERS_DEFAULT_LIMIT', '50'))
+ORDERS_MAX_LIMIT = int(os.environ.get('ORDERS_MAX_LIMIT', '200'))
+ORDER_STATUSES = ("Beklemede", "Hazırlanıyor", "Yola Çıktı", DELIVERED)
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', '0'))
+
+# Yönetici ekranı token göndermeye başlayana kadar ADMIN_AUTH_REQUIRED=0 ile kapatılabilir
+ADMIN_AUTH_REQUIRED = os.environ.get('ADMIN_AUTH_REQUIRED', '1') != '0'
+# Prometheus'un /metrics'i okurken Bearer olarak gönderdiği sabit token
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
-client = AsyncIOMotorClient(uri)
-db = client[os.environ.get('DB_NAME', 'TaptazeDB')]
 
-app = FastAPI()
+# --- UYGULAMA DURUMU ---
+# create_app() servisleri burada kurar; uç noktalar state üzerinden erişir
+class AppState:
+    client: AsyncIOMotorClient
+    db: object
+    metrics_registry: Registry
+    mongo_pool_stats: PoolStats
+    password_pool: PasswordPool
+    rate_limiter: RateLimiter
+    token_service: TokenService
+    change_stream: ChangeStreamDispatcher
+    static_files: FingerprintedStaticFiles
+    image_variants: "image_variants_module.ImageVariants"
+    catalog_cache: CatalogCache
+    search_index: SearchIndex
+    stock_reservation: StockReservation
+    order_pricing: OrderPricing
+    product_bulk: ProductBulkWriter
+    admin_stats: AdminStats
+    order_archiver: Optional[OrderArchiver] = None
+    events: EventHub
+    idempotency: IdempotencyStore
+    loop_monitor: Optional[object] = None
+    mail_dispatcher: Optional["asyncio.Task"] = None
+    background: List["asyncio.Task"]
 
-# CORS Ayarları
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+state = AppState()
 
 api_router = APIRouter(prefix="/api")
+root_router = APIRouter()
 
 # --- MODELLER VE YARDIMCI FONKSİYONLAR ---
 class UserRegister(BaseModel):
@@ -59,107 +112,228 @@ class UserVerify(BaseModel):
     email: str
     code: str
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 def serialize_doc(doc):
     if doc and "_id" in doc:
         doc["id"] = str(doc["_id"])
         del doc["_id"]
     return doc
 
-# --- MAİL FONKSİYONUNU TLS (587) İLE GÜNCELLE ---
-def send_verification_email(user_email, code):
-    api_key = os.getenv("BREVO_API_KEY")
-    sender_email = os.getenv("EMAIL_USER") # Render'daki e-postanı gönderici olarak alır
-    
-    url = "https://api.brevo.com/v3/smtp/email"
-    headers = {
-        "accept": "application/json",
-        "api-key": api_key,
-        "content-type": "application/json"
-    }
-    
-    # Mailin içeriğini ve kime gideceğini JSON olarak hazırlıyoruz
-    payload = {
-        "sender": {"name": "Taptaze App", "email": sender_email},
-        "to": [{"email": user_email}],
-        "subject": "Taptaze - E-posta Doğrulama",
-        "htmlContent": f"<html><body><h3>Taptaze'ye Hoş Geldin!</h3><p>Hesabını doğrulamak için doğrulama kodun: <strong>{code}</strong></p></body></html>"
-    }
+def client_ip(request: Request) -> Optional[str]:
+    # Proxy arkasında uvicorn X-Forwarded-For'dan gerçek IP'yi yazar (FORWARDED_ALLOW_IPS, deployment.py)
+    return request.client.host if request.client else None
 
+# Idempotency-Key başlığı varsa aynı anahtarla gelen tekrar, ilk yanıtı alır (idempotency.py)
+async def idempotent(scope: str, key: Optional[str], payload: dict, handler):
+    if key is None:
+        return await handler()
     try:
-        # Port engellerini aşan, doğrudan HTTPS üzerinden atılan o sihirli istek:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status() # Eğer Brevo'dan hata dönerse yakalar
-        print(f"Başarılı: {user_email} adresine mail gönderildi!")
-        return True
-    except Exception as e:
-        print(f"Brevo API Hatası: {e}")
-        return False
+        stored, replayed = await state.idempotency.run(scope, key, payload, handler)
+    except InvalidIdempotencyKey:
+        raise HTTPException(status_code=400, detail="Geçersiz Idempotency-Key başlığı.")
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Bu Idempotency-Key farklı bir istek için kullanılmış.")
+    except IdempotencyInProgress:
+        raise HTTPException(status_code=409, detail="Aynı istek hâlâ işleniyor, lütfen birazdan tekrar deneyin.",
+                            headers={"Retry-After": "1"})
+    headers = {"Idempotent-Replayed": "true"} if replayed else {}
+    return Response(content=stored.body, status_code=stored.status_code, media_type="application/json",
+                    headers=headers)
+
+# Şifre havuzu doluysa isteği kuyrukta bekletmek yerine hemen geri çevir
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Sunucu şu an çok yoğun, lütfen birazdan tekrar deneyin."},
+        headers={"Retry-After": "1"},
+    )
+
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Çok fazla deneme yaptınız, lütfen biraz sonra tekrar deneyin."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# --- GÖRSELLER ---
+# Küçük resim / kart / detay boyutları ve WebP/AVIF kodlamaları, ilk istekte üretilir
+@root_router.get("/img/{size}/{filename}")
+async def get_image_variant(size: str, filename: str):
+    try:
+        path, media_type = await state.image_variants.get(size, filename)
+    except VariantNotFound:
+        raise HTTPException(status_code=404, detail="Görsel bulunamadı.")
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": IMMUTABLE_CACHE})
+
+# --- MAİL GÖNDERİMİ ---
+# Mailler outbox koleksiyonuna yazılır, MailDispatcher arka planda toplu gönderir.
+# Modül (httpx dahil) açılıştan sonra ayrı thread'de yüklenir; ilk kayıt isteği
+# gelmeden hazır olur, gelirse de hazır olmasını bekler.
+async def start_mail_dispatcher():
+    module = await asyncio.to_thread(importlib.import_module, "mail_dispatcher")
+    dispatcher = module.MailDispatcher(
+        state.db,
+        module.transport_from_env(os.environ),
+        batch_size=int(os.environ.get('MAIL_BATCH_SIZE', '50')),
+        max_attempts=int(os.environ.get('MAIL_MAX_ATTEMPTS', '5')),
+        retention_seconds=float(os.environ.get('MAIL_OUTBOX_RETENTION_DAYS', '7')) * 86400,
+    )
+    await dispatcher.start()
+    return dispatcher
+
+VERIFICATION_SUBJECT = "Taptaze - E-posta Doğrulama"
+VERIFICATION_HTML = "<html><body><h3>Taptaze'ye Hoş Geldin!</h3><p>Hesabını doğrulamak için doğrulama kodun: <strong>{{ params.code }}</strong></p></body></html>"
+
+async def send_verification_email(user_email, code):
+    dispatcher = await state.mail_dispatcher
+    await dispatcher.enqueue(user_email, VERIFICATION_SUBJECT, VERIFICATION_HTML, {"code": code})
 
 # --- REGISTER FONKSİYONUNU GERÇEK HALİNE GETİR ---
 
 @api_router.post("/register")
-async def register(user: UserRegister, background_tasks: BackgroundTasks): # background_tasks ekledik
-    existing = await db.users.find_one({"email": user.email})
+async def register(user: UserRegister, request: Request, idempotency_key: Optional[str] = Header(None)):
+    # Sınır, idempotency kaydına (Mongo'ya yazma) gelmeden önce uygulanır
+    await state.rate_limiter.check("register", ip=client_ip(request), email=user.email)
+    # Parola özete katılmaz: idempotency_keys'teki tuzsuz SHA-256'dan parola kaba kuvvetle bulunmasın
+    fingerprinted = user.dict(exclude={"password"})
+    return await idempotent("register", idempotency_key, fingerprinted, lambda: register_user(user))
+
+async def register_user(user: UserRegister):
+    existing = await state.db.users.find_one({"email": user.email})
     if existing:
         raise HTTPException(status_code=400, detail="Bu e-posta zaten kayıtlı.")
-    
-    hashed_pw = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
-    v_code = str(random.randint(100000, 999999))
-    
+
+    hashed_pw = await state.password_pool.hash(user.password)
+    v_code = str(100000 + secrets.randbelow(900000))
+
     new_user = user.dict()
-    new_user["password"] = hashed_pw.decode('utf-8')
+    new_user["password"] = hashed_pw
     new_user["is_verified"] = False
     new_user["verification_code"] = v_code
-    
-    await db.users.insert_one(new_user)
-    
-    # KRİTİK DEĞİŞİKLİK: Maili arka planda gönder, kullanıcıyı bekletme!
-    background_tasks.add_task(send_verification_email, user.email, v_code)
-    
+
+    try:
+        result = await state.db.users.insert_one(new_user)
+    except DuplicateKeyError:
+        # Aynı e-postayla eşzamanlı iki kayıt: unique index ikincisini reddeder
+        raise HTTPException(status_code=400, detail="Bu e-posta zaten kayıtlı.")
+
+    # Mail sadece kuyruğa yazılır, gönderimi MailDispatcher yapar
+    try:
+        await send_verification_email(user.email, v_code)
+    except Exception:
+        # Kod hiç gönderilmeyecek: kayıt geri alınır ki tekrar denemek "zaten kayıtlı" demesin
+        logger.exception("Doğrulama maili kuyruğa yazılamadı: %s", user.email)
+        await state.db.users.delete_one({"_id": result.inserted_id})
+        raise HTTPException(status_code=503, detail="Doğrulama kodu gönderilemedi, lütfen tekrar deneyin.",
+                            headers={"Retry-After": "1"})
+
     return {"message": "Doğrulama kodu gönderildi!"}
 
 @api_router.post("/verify")
-async def verify(data: UserVerify):
-    user = await db.users.find_one({"email": data.email})
+async def verify(data: UserVerify, request: Request):
+    await state.rate_limiter.check("verify", ip=client_ip(request), email=data.email)
+    user = await state.db.users.find_one({"email": data.email})
     if user and user.get("verification_code") == data.code:
-        await db.users.update_one(
-            {"email": data.email}, 
+        await state.db.users.update_one(
+            {"email": data.email},
             {"$set": {"is_verified": True}, "$unset": {"verification_code": ""}}
         )
         return {"message": "Hesap doğrulandı!"}
     raise HTTPException(status_code=400, detail="Kod hatalı veya kullanıcı bulunamadı.")
 
 @api_router.post("/login")
-async def login(data: UserLogin):
-    user = await db.users.find_one({"email": data.email})
+async def login(data: UserLogin, request: Request):
+    await state.rate_limiter.check("login", ip=client_ip(request), email=data.email)
+    user = await state.db.users.find_one({"email": data.email})
     if not user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
-    
+
     if not user.get("is_verified"):
         raise HTTPException(status_code=403, detail="Lütfen önce e-posta adresinizi doğrulayın.")
-        
-    if bcrypt.checkpw(data.password.encode('utf-8'), user['password'].encode('utf-8')):
+
+    if await state.password_pool.verify(data.password, user['password']):
         return {
             "message": "Giriş başarılı!",
             "user": {
                 "id": str(user["_id"]),
-                "name": user["name"],
+                "name": user.get("name") or user.get("full_name"),
                 "email": user["email"]
-            }
+            },
+            **await state.token_service.issue(user),
         }
     raise HTTPException(status_code=401, detail="Şifre hatalı.")
 
-@api_router.get("/products")
-async def get_products():
-    products = await db.products.find().to_list(length=100)
-    return {"products": products}
+# --- OTURUM ---
+# Giriş bir kez bcrypt'ten geçer; sonraki istekler Authorization: Bearer <token>
+# ile gelir ve sadece imza kontrolü yapılır. Bağımlılıklar async tanımlı ki
+# threadpool'a atlamadan olay döngüsünde çalışsın.
+async def optional_user(authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    token = bearer_token(authorization)
+    if token is None:
+        return None
+    try:
+        return state.token_service.verify_access(token)
+    except InvalidToken:
+        raise HTTPException(
+            status_code=401,
+            detail="Oturum süresi dolmuş veya geçersiz.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+async def current_user(user: Optional[dict] = Depends(optional_user)) -> dict:
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Bu işlem için giriş yapmanız gerekiyor.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+async def require_admin(user: Optional[dict] = Depends(optional_user)) -> Optional[dict]:
+    if not ADMIN_AUTH_REQUIRED:
+        return user
+    user = await current_user(user)
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Bu işlem için yönetici yetkisi gerekiyor.")
+    return user
 
+# Metrikler havuz, olay döngüsü ve önbellek iç durumunu gösterir; herkese açık değil.
+# METRICS_TOKEN ya da yönetici girişi gerekir (ADMIN_AUTH_REQUIRED=0 iken de).
+async def require_metrics_access(authorization: Optional[str] = Header(None)):
+    token = bearer_token(authorization)
+    if METRICS_TOKEN and token is not None and secrets.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    user = await current_user(await optional_user(authorization))
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Bu işlem için yönetici yetkisi gerekiyor.")
 
+@root_router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def get_metrics():
+    return Response(state.metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@api_router.post("/token/refresh")
+async def refresh_token(data: TokenRefresh):
+    try:
+        return await state.token_service.refresh(data.refresh_token)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Oturum süresi dolmuş, lütfen tekrar giriş yapın.")
+
+@api_router.post("/logout")
+async def logout(data: TokenRefresh):
+    await state.token_service.revoke(data.refresh_token)
+    return {"message": "Çıkış yapıldı."}
+
+@api_router.get("/me")
+async def get_me(user: dict = Depends(current_user)):
+    return {"id": user["sub"], "name": user.get("name"), "email": user["email"], "role": user.get("role")}
 
 class Category(BaseModel):
     id: Optional[str] = None
     name: str
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
 
 class Product(BaseModel):
     id: str
@@ -168,54 +342,625 @@ class Product(BaseModel):
     category_name: Optional[str] = None
     price: float
     unit_type: str
-    stock: int
+    stock: float
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
     description: Optional[str] = None
+    # Kasa ile satış: kasadaki birim sayısı ve kasa fiyatı (pricing.py)
+    crate_size: Optional[float] = None
+    crate_price: Optional[float] = None
 
+PRODUCT_FIELDS = tuple(Product.model_fields)
+
+# Yönetici paneli ürün ekleme/düzenleme formu
+class ProductInput(BaseModel):
+    name: str
+    category_id: str
+    price: float
+    unit_type: str
+    stock: float = 0
+    description: Optional[str] = None
+    image: Optional[str] = None
+    crate_size: Optional[float] = None
+    crate_price: Optional[float] = None
+    sku: Optional[str] = None
+
+CATEGORY_FIELDS = tuple(Category.model_fields)
+
+# Ad, fiyat ve toplam sunucuda yeniden hesaplanır; eski istemciler için alanlar kabul edilir
 class OrderItem(BaseModel):
     product_id: str
-    product_name: str
+    product_name: Optional[str] = None
     quantity: float
-    price: float
-    unit_type: str
+    price: Optional[float] = None
+    unit_type: Optional[str] = None
+
+class OrderStatusUpdate(BaseModel):
+    status: str
+
+class CartQuote(BaseModel):
+    items: List[OrderItem]
 
 class OrderCreate(BaseModel):
     customer_name: str
     customer_phone: str
     delivery_address: str
     items: List[OrderItem]
-    total_amount: float
+    total_amount: Optional[float] = None
 
+# --- KATALOG ÖNBELLEĞİ ---
+def serialize_catalog_item(doc, fields):
+    item = pick(doc, fields)
+    if "image" in item:
+        item["image"] = state.static_files.fingerprint_url(doc.get("image"))
+    if "image_variants" in item:
+        item["image_variants"] = state.image_variants.variant_urls(doc.get("image"))
+    return item
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# Değişmediyse 304 döner; önbellek tazeyse Mongo'ya hiç gidilmez
+def cached_json_response(request: Request, payload: Payload) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}, must-revalidate"}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+# Okuma yolları önbellekteki hazır JSON'u döner; response_model sadece dokümantasyon için
 @api_router.get("/categories", response_model=List[Category])
-async def get_categories():
-    categories = await db.categories.find().to_list(100)
-    return [Category(**serialize_doc(cat)) for cat in categories]
+async def get_categories(request: Request):
+    return cached_json_response(request, await state.catalog_cache.get_categories_json())
 
 @api_router.get("/products", response_model=List[Product])
-async def get_products(category_id: Optional[str] = None):
+async def get_products(
+    request: Request,
+    category_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "id",
+    search: Optional[str] = None,
+):
+    # Parametresiz istek (eski istemciler): önbellekten ilk PRODUCTS_MAX_LIMIT ürün,
+    # devamı X-Next-Cursor ile Mongo'dan sayfalanır
+    if limit is None and cursor is None and fields is None and not search:
+        products = await state.catalog_cache.get_products(category_id)
+        payload = await state.catalog_cache.get_products_json(category_id, PRODUCTS_MAX_LIMIT)
+        response = cached_json_response(request, payload)
+        if len(products) > PRODUCTS_MAX_LIMIT:
+            last_id = products[PRODUCTS_MAX_LIMIT - 1]["id"]
+            response.headers["X-Next-Cursor"] = encode_cursor(last_id, ObjectId(last_id))
+        return response
+
+    if sort not in PRODUCT_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz sıralama: {sort}")
+    limit = min(max(limit or PRODUCTS_DEFAULT_LIMIT, 1), PRODUCTS_MAX_LIMIT)
+    try:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        projection = build_projection(field_list, PRODUCT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Geçersiz alan: {e}")
+    if projection and projection.pop("image_variants", None):
+        # Varyant adresleri Mongo'da değil, image alanından üretilir
+        projection["image"] = 1
+
+    # Arama: bellek içi indeks, sonuçlar alaka sırasıyla
+    if search:
+        await state.catalog_cache.get_products()
+        await state.search_index.wait_ready()
+        product_ids = state.search_index.search(search, category_id=category_id, limit=limit)
+        products = await state.catalog_cache.get_products_by_ids(product_ids)
+        if field_list:
+            products = [pick(p, field_list) for p in products]
+        return FastJSONResponse(content=products)
+
+    # Sayfalı istek: projeksiyon ve keyset koşulu doğrudan Mongo sorgusuna gider
+
     query = {"category_id": category_id} if category_id else {}
-    products = await db.products.find(query).to_list(1000)
-    return [Product(**serialize_doc(p)) for p in products]
+    try:
+        docs, next_cursor = await fetch_page(state.db.products, query, PRODUCT_SORT_KEYS[sort], cursor, limit, projection)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci.")
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    items = [serialize_catalog_item(d, field_list or PRODUCT_FIELDS) for d in docs]
+    return FastJSONResponse(content=items, headers=headers)
+
+# --- SİPARİŞ VE STOK ---
+async def price_cart(items: List[OrderItem]) -> dict:
+    try:
+        return await state.order_pricing.price(item.dict() for item in items)
+    except InvalidCart as e:
+        raise HTTPException(status_code=400, detail=f"Sepet geçersiz: {e}")
+
+# Sepet ekranı güncel fiyatları ve kasa indirimini sipariş vermeden görebilsin
+@api_router.post("/cart/quote")
+async def quote_cart(cart: CartQuote):
+    return await price_cart(cart.items)
 
 @api_router.post("/orders")
-async def create_order(order: OrderCreate):
+async def create_order(order: OrderCreate, user: Optional[dict] = Depends(optional_user),
+                       idempotency_key: Optional[str] = Header(None)):
+    # Anahtarlar kullanıcı başına; başkasının anahtarıyla onun siparişi görülemez
+    scope = f"orders:{user['sub']}" if user is not None else "orders"
+    return await idempotent(scope, idempotency_key, order.dict(), lambda: place_order(order, user))
+
+async def place_order(order: OrderCreate, user: Optional[dict]):
+    priced = await price_cart(order.items)
+    if order.total_amount is not None and abs(order.total_amount - priced["total_amount"]) >= 0.01:
+        logger.info("Sepet tutarı istemciden farklı: %.2f -> %.2f", order.total_amount, priced["total_amount"])
+    try:
+        reserved = await state.stock_reservation.reserve((line["product_id"], line["quantity"]) for line in priced["items"])
+    except InvalidProduct as e:
+        raise HTTPException(status_code=400, detail=f"Geçersiz ürün veya miktar: {e.product_id}")
+    except OutOfStock as e:
+        raise HTTPException(status_code=409, detail=f"Yetersiz stok: {', '.join(e.product_ids)}")
+    for product_id, quantity in reserved.items():
+        product = state.catalog_cache.adjust_stock(product_id, -quantity)
+        if product is not None:
+            state.events.stock_changed(product_id, product["stock"], product.get("name"))
+    state.catalog_cache.publish(stock_only=True)
+
     order_dict = order.dict()
+    order_dict.update(priced)
     order_dict["status"] = "Beklemede"
     order_dict["created_at"] = datetime.utcnow()
-    result = await db.orders.insert_one(order_dict)
-    return {"id": str(result.inserted_id), "status": "Başarılı"}
+    if user is not None:
+        order_dict["user_id"] = user["sub"]
+    try:
+        result = await state.db.orders.insert_one(order_dict)
+    except Exception:
+        # Sipariş yazılamadıysa ayrılan stok geri verilir
+        await state.stock_reservation.release(reserved)
+        for product_id, quantity in reserved.items():
+            state.catalog_cache.adjust_stock(product_id, quantity)
+        state.catalog_cache.publish(stock_only=True)
+        raise
+    try:
+        await state.admin_stats.record_order(order_dict)
+    except Exception:
+        # Sipariş yazıldı; sayaç hatası 500 dönüp istemciye tekrar (kopya sipariş) yaptırmasın.
+        # Kayan sayaçları `admin_stats.py --reconcile` düzeltir.
+        logger.exception("Sipariş istatistiği yazılamadı: %s", result.inserted_id)
+    state.events.order_created(str(result.inserted_id), order_dict)
+    return {"id": str(result.inserted_id), "status": "Başarılı", "total_amount": priced["total_amount"]}
+
+# --- SİPARİŞ LİSTELERİ ---
+# En yeni sipariş önce; (created_at, _id) ile imleçli sayfalama, index'ler indexes.py'de
+def order_query(status: Optional[str] = None, user_id: Optional[str] = None) -> dict:
+    query = {}
+    if status:
+        if status not in ORDER_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Geçersiz sipariş durumu: {status}")
+        query["status"] = status
+    if user_id:
+        query["user_id"] = user_id
+    return query
+
+async def list_orders(query: dict, limit: Optional[int], cursor: Optional[str], archived: bool = False) -> Response:
+    limit = min(max(limit or ORDERS_DEFAULT_LIMIT, 1), ORDERS_MAX_LIMIT)
+    # Arşive taşınmış teslim edilmiş siparişler (koleksiyon modunda, order_archive.py) sayfaya katılır
+    unions = await archive_collections(state.db) if archived else ()
+    try:
+        docs, next_cursor = await fetch_page(state.db.orders, query, "created_at", cursor, limit, None,
+                                             descending=True, unions=unions)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci.")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return FastJSONResponse(content=[serialize_doc(d) for d in docs], headers=headers)
+
+# Müşteri arşivdekiler dahil kendi siparişlerini görür; yönetici (ADMIN_AUTH_REQUIRED=0 iken
+# token göndermeyen eski panel de) sıcak koleksiyondakilerin hepsini
+@api_router.get("/orders")
+async def get_orders(
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    user: Optional[dict] = Depends(optional_user),
+):
+    if user is not None and user.get("role") != "admin":
+        return await list_orders(order_query(status, user_id=user["sub"]), limit, cursor, archived=True)
+    await require_admin(user)
+    return await list_orders(order_query(status), limit, cursor)
+
+# --- ANLIK OLAYLAR (SSE) ---
+# Sipariş durumu ve azalan stok için sorgulama yerine: GET /api/events?topics=orders,stock
+# EventSource başlık gönderemediği için token access_token parametresiyle de verilebilir.
+@api_router.get("/events")
+async def stream_events(
+    topics: str = "orders,stock",
+    access_token: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+):
+    wanted = {t.strip() for t in topics.split(",") if t.strip()}
+    unknown = wanted - set(EVENT_TOPICS)
+    if not wanted or unknown:
+        raise HTTPException(status_code=400, detail=f"Geçersiz konu: {', '.join(sorted(unknown)) or topics}")
+
+    user = await optional_user(authorization or (f"Bearer {access_token}" if access_token else None))
+    # Yetki kapalıyken (eski istemciler) sadece anonim bağlantı tüm siparişleri görür;
+    # giriş yapmış müşteri get_orders'taki gibi kendi siparişleriyle sınırlı kalır
+    if user is not None:
+        admin = user.get("role") == "admin"
+    else:
+        admin = not ADMIN_AUTH_REQUIRED
+    if "orders" in wanted and user is None and not admin:
+        raise HTTPException(
+            status_code=401,
+            detail="Bu işlem için giriş yapmanız gerekiyor.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        stream = state.events.subscribe(wanted, user["sub"] if user else None, admin)
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=503,
+            detail="Sunucu şu an çok yoğun, lütfen birazdan tekrar deneyin.",
+            headers={"Retry-After": "5"},
+        )
+    # X-Accel-Buffering: nginx olayları biriktirmeden iletsin
+    return StreamingResponse(stream, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # --- ADMİN PANELİ ---
-@api_router.get("/admin/stats")
+# Panel sık sık sorguladığı için sayımlar her seferinde değil, sayaçlardan okunur.
+# /api/admin altındaki tüm uçlar yönetici tokenı ister.
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@admin_router.get("/stats")
 async def get_admin_stats():
-    total_orders = await db.orders.count_documents({})
-    total_products = await db.products.count_documents({})
-    return {"total_orders": total_orders, "total_products": total_products}
+    return await state.admin_stats.snapshot()
+
+@admin_router.post("/stats/reconcile")
+async def reconcile_admin_stats():
+    await state.admin_stats.reconcile()
+    return await state.admin_stats.snapshot()
+
+@admin_router.get("/orders")
+async def get_admin_orders(
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    return await list_orders(order_query(status, user_id), limit, cursor)
+
+@admin_router.patch("/orders/{order_id}")
+async def update_order_status(order_id: str, data: OrderStatusUpdate):
+    if data.status not in ORDER_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Geçersiz sipariş durumu: {data.status}")
+    try:
+        oid = ObjectId(order_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Sipariş bulunamadı.")
+
+    now = datetime.utcnow()
+    update = {
+        "$set": {"status": data.status, "updated_at": now},
+        "$push": {"status_history": {"status": data.status, "at": now}},
+    }
+    # Arşivleyici teslim tarihine bakar (order_archive.py)
+    if data.status == DELIVERED:
+        update["$set"]["delivered_at"] = now
+    else:
+        update["$unset"] = {"delivered_at": ""}
+    # Durum zaten aynıysa dokunulmaz; sayaçlar iki kez artmasın
+    old = await state.db.orders.find_one_and_update(
+        {"_id": oid, "status": {"$ne": data.status}}, update,
+        projection={"status": 1, "user_id": 1}, return_document=ReturnDocument.BEFORE,
+    )
+    if old is None:
+        if await state.db.orders.count_documents({"_id": oid}, limit=1) == 0:
+            raise HTTPException(status_code=404, detail="Sipariş bulunamadı.")
+    else:
+        await state.admin_stats.record_status_change(old.get("status"), data.status)
+        state.events.order_status(order_id, data.status, old.get("user_id"))
+    return {"success": True, "id": order_id, "status": data.status}
+
+# --- ÜRÜN YÖNETİMİ ---
+# Her yazmadan sonra katalog önbelleği bu worker'da hemen, diğerlerinde bir
+# sonraki senkronizasyonda yenilenir (catalog_cache.publish)
+def product_oid(product_id: str) -> ObjectId:
+    try:
+        return ObjectId(product_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı.")
+
+# Olmayan kategoriye bağlı ürün vitrinde hiçbir kategoride görünmez
+async def check_category(category_id: str):
+    try:
+        oid = ObjectId(category_id)
+    except (InvalidId, TypeError):
+        oid = None
+    if oid is None or await state.db.categories.count_documents({"_id": oid}, limit=1) == 0:
+        raise HTTPException(status_code=400, detail="Kategori bulunamadı.")
+
+@admin_router.post("/products")
+async def create_product(product: ProductInput):
+    await check_category(product.category_id)
+    doc = product.dict(exclude_none=True)
+    try:
+        await state.db.products.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"Bu sku zaten kayıtlı: {product.sku}")
+    await state.admin_stats.record_products(1)
+    state.catalog_cache.publish()
+    return serialize_catalog_item(doc, PRODUCT_FIELDS)
+
+@admin_router.put("/products/{product_id}")
+async def update_product(product_id: str, product: ProductInput):
+    await check_category(product.category_id)
+    try:
+        doc = await state.db.products.find_one_and_update(
+            {"_id": product_oid(product_id)}, {"$set": product.dict(exclude_none=True)},
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"Bu sku zaten kayıtlı: {product.sku}")
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı.")
+    state.catalog_cache.publish()
+    return serialize_catalog_item(doc, PRODUCT_FIELDS)
+
+@admin_router.delete("/products/{product_id}")
+async def delete_product(product_id: str):
+    result = await state.db.products.delete_one({"_id": product_oid(product_id)})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Ürün bulunamadı.")
+    await state.admin_stats.record_products(-1)
+    state.catalog_cache.publish()
+    return {"success": True, "id": product_id}
+
+# Sabah fiyat/stok listesi: JSON dizi ya da NDJSON (Content-Type: application/x-ndjson).
+# NDJSON akarken işlenir, gövde belleğe alınmaz. Kalem formatı product_bulk.py'de.
+@admin_router.post("/products/bulk")
+async def bulk_products(request: Request):
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = ndjson_items(request.stream())
+    else:
+        try:
+            items = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Geçersiz JSON.")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Ürün listesi (JSON dizi) bekleniyor.")
+    try:
+        summary = await state.product_bulk.apply(items)
+    finally:
+        # Parça başına değil, yükleme sonunda tek seferde (yarıda kesilse de)
+        state.catalog_cache.publish()
+    await state.admin_stats.record_products(summary["created"])
+    return FastJSONResponse(content=summary)
+
+@admin_router.get("/product-bulk")
+async def get_product_bulk_stats():
+    return state.product_bulk.stats()
+
+@admin_router.get("/order-archive")
+async def get_order_archive_stats():
+    if state.order_archiver is None:
+        return {"enabled": False}
+    return {"enabled": True, **state.order_archiver.stats()}
 
+@admin_router.get("/events")
+async def get_event_stats():
+    return {**state.events.stats(), "stream": state.change_stream.stats()}
+
+@admin_router.get("/idempotency")
+async def get_idempotency_stats():
+    return state.idempotency.stats()
+
+@admin_router.get("/password-pool")
+async def get_password_pool_stats():
+    return state.password_pool.stats()
+
+@admin_router.get("/pricing")
+async def get_pricing_stats():
+    return state.order_pricing.stats()
+
+@admin_router.get("/rate-limits")
+async def get_rate_limit_stats():
+    return state.rate_limiter.stats()
+
+@admin_router.get("/mongo-pool")
+async def get_mongo_pool_stats():
+    return state.mongo_pool_stats.stats()
+
+@admin_router.get("/loop-monitor")
+async def get_loop_monitor_stats():
+    if state.loop_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **state.loop_monitor.stats()}
+
+api_router.include_router(admin_router)
+
+
+# --- AÇILIŞ VE KAPANIŞ ---
+# İlk yanıtı geciktirmemek için sadece zorunlu işler beklenir; index kurulumu,
+# istatistik kontrolü, katalog ısıtma ve mail modülü arka planda yapılır.
+async def _run_in_background(name, job):
+    try:
+        await job()
+    except Exception:
+        logger.exception("Açılış işi başarısız: %s", name)
+
+async def _prepare_admin_stats():
+    await state.admin_stats.ensure_indexes()
+    await state.admin_stats.reconcile_if_missing()
+
+async def _warm_catalog():
+    await state.catalog_cache.get_categories()
+    await state.catalog_cache.get_products()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if state.loop_monitor is not None:
+        await state.loop_monitor.start()
+    # Bağlantı ilk istekte değil açılışta kurulur; Mongo'ya ulaşılamazsa sunucu yine açılır
+    try:
+        seconds = await warm_up_mongo(state.client)
+        logger.info("Mongo bağlantısı hazır (%.0f ms)", seconds * 1000)
+    except Exception as e:
+        logger.error("Mongo açılışta bağlanamadı: %s", e)
+
+    # INDEX_STRICT=1 ise COLLSCAN kalan sorgu varsa sunucu açılmaz, bu yüzden beklenir
+    background = {}
+    if os.environ.get('INDEX_STRICT') == '1':
+        await bootstrap_indexes(state.db, strict=True)
+    else:
+        background["indexes"] = lambda: bootstrap_indexes(state.db, strict=False)
+    if isinstance(state.rate_limiter.store, MongoStore):
+        background["rate_limits"] = state.rate_limiter.store.ensure_indexes
+    background["admin_stats"] = _prepare_admin_stats
+    background["catalog"] = _warm_catalog
+
+    await state.catalog_cache.start()
+    await state.change_stream.start()
+    if state.order_archiver is not None:
+        await state.order_archiver.start()
+    state.mail_dispatcher = asyncio.create_task(start_mail_dispatcher())
+    state.background = [asyncio.create_task(_run_in_background(name, job)) for name, job in background.items()]
+    try:
+        yield
+    finally:
+        for task in state.background:
+            task.cancel()
+        await asyncio.gather(*state.background, return_exceptions=True)
+        try:
+            dispatcher = await state.mail_dispatcher
+            await dispatcher.stop()
+        except Exception:
+            logger.exception("Mail gönderici durdurulamadı")
+        await state.change_stream.stop()
+        await state.catalog_cache.stop()
+        await state.search_index.stop()
+        if state.order_archiver is not None:
+            await state.order_archiver.stop()
+        state.password_pool.shutdown()
+        if state.loop_monitor is not None:
+            await state.loop_monitor.stop()
+        # Mongo'yu kullanan her şey durduktan sonra kapatılır
+        state.client.close()
+
+
+# ============ UYGULAMA ============
+def create_app() -> FastAPI:
+    uri = os.environ.get('MONGO_URL')
+    if not uri:
+        raise ValueError("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+
+    # Prometheus metrikleri /metrics altında; Mongo komutları sürücü seviyesinde ölçülür.
+    # Havuz boyutu ve zaman aşımları MONGO_* ortam değişkenlerinden (mongo_pool.py).
+    state.metrics_registry = registry = Registry()
+    state.mongo_pool_stats = PoolStats(registry)
+    state.client = AsyncIOMotorClient(
+        uri, event_listeners=[MongoCommandMetrics(registry), state.mongo_pool_stats], **client_options(os.environ)
+    )
+    state.db = db = state.client[os.environ.get('DB_NAME', 'TaptazeDB')]
+
+    state.password_pool = PasswordPool.from_env()
+    state.password_pool.observer = PasswordMetrics(registry)
+    registry.gauge_function(
+        "taptaze_bcrypt_pending", "bcrypt havuzunda bekleyen/çalışan işler", lambda: state.password_pool.pending)
+    registry.counter_function(
+        "taptaze_bcrypt_rejected_total", "Havuz dolu olduğu için reddedilen bcrypt işleri",
+        lambda: state.password_pool.rejected)
+
+    # Kaba kuvvet / kod tahmini koruması: IP, e-posta ve uç nokta başına kayan pencere.
+    # Kontrol DB sorgusundan ve bcrypt'ten önce yapılır. Varsayılan sayaçlar süreç içidir;
+    # RATE_LIMIT_STORE=mongo ile tüm worker'lar aynı sayaçları paylaşır.
+    state.rate_limiter = RateLimiter.from_env(
+        store=MongoStore(db.rate_limits) if os.environ.get('RATE_LIMIT_STORE') == 'mongo' else None
+    )
+    state.token_service = TokenService.from_env(db.refresh_tokens, db.users)
+
+    # Parmak izli adresler (domates.<özet>.jpeg) bir yıl, eskiler bir saat önbellekte kalır
+    state.static_files = FingerprintedStaticFiles(directory=ROOT_DIR / "static")
+    state.image_variants = image_variants_module.from_env(state.static_files, ROOT_DIR)
+
+    # Katalog önbelleği ve anlık olaylar süreç başına tek change stream'i paylaşır
+    state.change_stream = ChangeStreamDispatcher(db)
+    state.catalog_cache = CatalogCache(
+        db,
+        serialize_product=lambda doc: serialize_catalog_item(doc, PRODUCT_FIELDS),
+        serialize_category=lambda doc: serialize_catalog_item(doc, CATEGORY_FIELDS),
+        encode=dumps,
+        ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL', '60')),
+        # Çok worker'lı çalışmada (gunicorn.conf.py) change stream yoksa sürüm belgesiyle senkron
+        versions=db.cache_versions if os.environ.get('CATALOG_SYNC') == 'mongo' else None,
+        sync_interval=float(os.environ.get('CATALOG_SYNC_INTERVAL', '1')),
+        change_stream=state.change_stream,
+    )
+    # Arama indeksi her katalog yüklemesinden sonra arka planda, sadece değişen ürünlerle güncellenir
+    state.search_index = SearchIndex()
+    state.catalog_cache.add_listener(state.search_index.schedule_sync)
+
+    state.stock_reservation = StockReservation(db.products, coalesce=os.environ.get('STOCK_COALESCE', '1') != '0')
+    # Sipariş fiyatları katalog önbelleğinden; önbellekte olmayanlar tek $in sorgusuyla
+    state.order_pricing = OrderPricing.from_env(db.products, state.catalog_cache)
+    state.admin_stats = AdminStats(db)
+    state.product_bulk = ProductBulkWriter.from_env(db.products, db.categories)
+    # Sipariş durumu / azalan stok olayları (events.py)
+    state.events = EventHub.from_env(state.change_stream, registry)
+    # Tekrar gönderilen sipariş/kayıt istekleri; yanıtlar IDEMPOTENCY_TTL kadar saklanır
+    state.idempotency = IdempotencyStore.from_env(db.idempotency_keys, registry)
+    # ORDER_ARCHIVE_DAYS=90 ile teslim edilmiş eski siparişler aylık arşive taşınır
+    state.order_archiver = OrderArchiver.from_env(db, ROOT_DIR)
+    state.background = []
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(RequestMetricsMiddleware, registry=registry)
+
+    # Hata ayıklama: LOOP_MONITOR=1 loop'u kilitleyen kodun yığınını loglar,
+    # SLOW_REQUEST_PROFILE_MS=500 bu süreyi aşan isteklerin profilini PROFILE_DIR'e yazar
+    state.loop_monitor = None
+    if os.environ.get('LOOP_MONITOR') == '1':
+        from loop_monitor import LoopMonitor, SlowRequestProfiler
+        state.loop_monitor = LoopMonitor.from_env(registry, ROOT_DIR)
+        app.add_middleware(SlowRequestProfiler, monitor=state.loop_monitor)
+
+    # CORS Ayarları
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
+    )
+    app.add_exception_handler(PasswordPoolBusy, password_pool_busy_handler)
+    app.add_exception_handler(RateLimited, rate_limited_handler)
+
+    app.mount("/static", state.static_files, name="static")
+    app.include_router(root_router)
+    app.include_router(api_router)
+    return app
+
+
+def __getattr__(name):
+    # `uvicorn server:app` uygulamayı ilk erişimde kurar; sadece import etmek
+    # (testler, betikler) Mongo'ya bağlanmaz ve MONGO_URL istemez
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# ============ ROUTER'I DAHİL ET ============
-app.include_router(api_router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    from deployment import configure_workers, forwarded_allow_ips, worker_count
+
+    # Geliştirmede tek süreç; WEB_CONCURRENCY=4 ile uvicorn worker'ları (üretimde gunicorn.conf.py)
+    workers = worker_count(os.environ, default=1)
+    proxy = {"proxy_headers": True, "forwarded_allow_ips": forwarded_allow_ips(os.environ)}
+    if workers > 1:
+        configure_workers(os.environ, workers)
+        uvicorn.run("server:app", host="0.0.0.0", port=5000, workers=workers, **proxy)
+    else:
+        uvicorn.run(create_app(), host="0.0.0.0", port=5000, **proxy)
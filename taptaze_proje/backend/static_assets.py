@@ -0,0 +1,71 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+FINGERPRINT_RE = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{10})(?P<suffix>\.[^./]+)$")
+STATIC_URL_RE = re.compile(r"^(?P<prefix>.*?/static/)(?P<path>[^?#]+)$")
+
+
+# --- PARMAK İZLİ STATİK DOSYALAR ---
+# /static/domates.jpeg -> /static/domates.<içerik özeti>.jpeg
+# Özetli adres içerik değişince değiştiği için sonsuza kadar önbelleğe alınabilir;
+# özetsiz eski adresler kısa süreli önbellekle çalışmaya devam eder.
+class FingerprintedStaticFiles(StaticFiles):
+    def __init__(self, directory, max_age: int = 3600, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.root = Path(directory)
+        self.max_age = max_age
+        self._manifest: Optional[Dict[str, str]] = None
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        if self._manifest is None:
+            self._manifest = self.build_manifest()
+        return self._manifest
+
+    def build_manifest(self) -> Dict[str, str]:
+        manifest = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file():
+                digest = hashlib.blake2b(path.read_bytes(), digest_size=5).hexdigest()
+                manifest[path.relative_to(self.root).as_posix()] = digest
+        return manifest
+
+    def refresh(self):
+        self._manifest = None
+
+    def fingerprint(self, name: str) -> str:
+        digest = self.manifest.get(name)
+        if digest is None:
+            return name
+        stem, dot, suffix = name.rpartition(".")
+        return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+    def fingerprint_url(self, url: Optional[str]) -> Optional[str]:
+        # Ürün belgelerindeki tam adresler (Render linki dahil) olduğu gibi korunur
+        if not url:
+            return url
+        match = STATIC_URL_RE.match(url)
+        if not match:
+            return url
+        return match.group("prefix") + self.fingerprint(match.group("path"))
+
+    def resolve(self, path: str) -> Optional[str]:
+        match = FINGERPRINT_RE.match(path)
+        if not match:
+            return None
+        original = match.group("stem") + match.group("suffix")
+        if self.manifest.get(original) == match.group("digest"):
+            return original
+        return None
+
+    async def get_response(self, path: str, scope):
+        original = self.resolve(path)
+        response = await super().get_response(original or path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE if original else f"public, max-age={self.max_age}"
+        return response
@@ -0,0 +1,129 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids: List[str]):
+        super().__init__(", ".join(product_ids))
+        self.product_ids = product_ids
+
+
+class InvalidProduct(Exception):
+    def __init__(self, product_id: str):
+        super().__init__(product_id)
+        self.product_id = product_id
+
+
+# --- STOK REZERVASYONU ---
+# Her satır koşullu $inc ile düşülür ({"stock": {"$gte": miktar}}); stok yetmezse
+# o ana kadar düşülen satırlar geri eklenir. Aynı ürüne aynı anda gelen talepler
+# tek bir güncellemede birleştirilir, böylece sıcak ürünlerde yazma çakışması
+# istek sayısıyla birlikte büyümez.
+class StockReservation:
+    def __init__(self, collection, coalesce: bool = True):
+        self.collection = collection
+        self.coalesce = coalesce
+        self._pending: Dict[ObjectId, List[Tuple[float, asyncio.Future]]] = defaultdict(list)
+        self._flushing: set = set()
+        self._tasks: set = set()
+
+        self.reserved = 0
+        self.rejected = 0
+        self.batches = 0
+
+    @staticmethod
+    def _merge_lines(lines: Iterable[Tuple[str, float]]) -> Dict[ObjectId, float]:
+        merged: Dict[ObjectId, float] = defaultdict(float)
+        for product_id, quantity in lines:
+            try:
+                oid = ObjectId(product_id)
+            except (InvalidId, TypeError):
+                raise InvalidProduct(product_id)
+            if quantity <= 0:
+                raise InvalidProduct(product_id)
+            merged[oid] += quantity
+        return merged
+
+    async def reserve(self, lines: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+        merged = self._merge_lines(lines)
+        oids = sorted(merged)
+        pending = asyncio.gather(*[self._reserve_line(oid, merged[oid]) for oid in oids])
+        try:
+            results = await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # İstek iptal edildi; düşülen stok, işlem bitince geri eklenir
+            pending.add_done_callback(lambda f: self._release_after_cancel(f, oids, merged))
+            raise
+
+        failed = [str(oid) for oid, ok in zip(oids, results) if not ok]
+        if failed:
+            await self.release({str(oid): merged[oid] for oid, ok in zip(oids, results) if ok})
+            self.rejected += 1
+            raise OutOfStock(failed)
+        self.reserved += 1
+        return {str(oid): merged[oid] for oid in oids}
+
+    async def release(self, quantities: Dict[str, float]):
+        for product_id, quantity in quantities.items():
+            await self.collection.update_one({"_id": ObjectId(product_id)}, {"$inc": {"stock": quantity}})
+
+    def _release_after_cancel(self, future: asyncio.Future, oids: List[ObjectId], merged: Dict[ObjectId, float]):
+        if future.cancelled() or future.exception() is not None:
+            return
+        reserved = {str(oid): merged[oid] for oid, ok in zip(oids, future.result()) if ok}
+        if reserved:
+            self._spawn(self.release(reserved))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reserve_line(self, oid: ObjectId, quantity: float) -> bool:
+        if not self.coalesce:
+            return await self._decrement(oid, quantity)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[oid].append((quantity, future))
+        if oid not in self._flushing:
+            self._flushing.add(oid)
+            self._spawn(self._flush(oid))
+        return await future
+
+    async def _flush(self, oid: ObjectId):
+        try:
+            # Bir güncelleme sürerken biriken talepler bir sonraki turda topluca işlenir
+            while self._pending.get(oid):
+                batch = self._pending.pop(oid)
+                try:
+                    await self._apply_batch(oid, batch)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+        finally:
+            self._flushing.discard(oid)
+
+    async def _apply_batch(self, oid: ObjectId, batch: List[Tuple[float, asyncio.Future]]):
+        self.batches += 1
+        total = sum(quantity for quantity, _ in batch)
+        if await self._decrement(oid, total):
+            for _, future in batch:
+                future.set_result(True)
+            return
+        # Toplam stok yetmiyor: talepleri geliş sırasıyla tek tek dene
+        for quantity, future in batch:
+            future.set_result(await self._decrement(oid, quantity))
+
+    async def _decrement(self, oid: ObjectId, quantity: float) -> bool:
+        result = await self.collection.update_one(
+            {"_id": oid, "stock": {"$gte": quantity}},
+            {"$inc": {"stock": -quantity}},
+        )
+        return result.modified_count == 1
+
+    def stats(self) -> dict:
+        return {"reserved": self.reserved, "rejected": self.rejected, "batches": self.batches}
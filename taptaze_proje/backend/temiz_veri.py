@@ -1,152 +1,277 @@
-import pymongo
+#!/usr/bin/env python3
+"""
+Katalog yükleme aracı.
+
+    python temiz_veri.py                          # örnek kataloğu yükler/günceller
+    python temiz_veri.py --file urunler.csv       # CSV veya JSONL'den ürün yükler
+    python temiz_veri.py --file urunler.jsonl --batch-size 5000
+
+Tekrar tekrar çalıştırılabilir: ürünler sku'ya göre upsert edilir (stok sadece
+yeni üründe yazılır, satışla düşen stok ezilmez), yönetici hesabı varsa
+dokunulmaz, siparişler asla silinmez. Yeni ürün için name, kategori, price ve
+unit_type zorunlu; eksik satır sadece var olan ürünü günceller.
+"""
+
+import argparse
+import csv
+import json
 import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+import bcrypt
+import pymongo
 from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from admin_stats import TOTALS_ID
+from catalog_cache import VERSION_ID
+from indexes import INDEXES
+from product_bulk import REQUIRED_FIELDS
 
 # .env dosyasındaki MONGO_URL ve DB_NAME bilgilerini çekiyoruz
-load_dotenv()
+load_dotenv(Path(__file__).parent / '.env')
 
 # --- AYARLAR ---
 # Resimler için Render linkini kullanmalısın ki internetten çekebilsin
 RENDER_URL = "https://taptaze-backend.onrender.com"
 BASE_URL = f"{RENDER_URL}/static"
 
-# --- 1. BULUT VERİTABANI BAĞLANTISI (DÜZELTİLDİ) ---
-# Bilgisayarındaki localhost'u değil, .env içindeki Atlas linkini kullanıyoruz
-MONGO_URI = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME", "TaptazeDB")
-
-client = pymongo.MongoClient(MONGO_URI)
-db = client[DB_NAME]
+PRODUCT_FIELDS = ("sku", "name", "category_id", "price", "unit_type", "stock", "description", "image",
+                  "crate_size", "crate_price")
+NUMERIC_FIELDS = {"price": float, "stock": float, "crate_size": float, "crate_price": float}
 
-# --- 6. ADMİN KULLANICISI OLUŞTURMA (BCRYPT İLE) ---
-import bcrypt
-
-admin_password_plain = "123"  # Değiştirmek istersen buradan yapabilirsin
-hashed_pw = bcrypt.hashpw(admin_password_plain.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-print(f"🔐 Yönetici şifresi (hashlenmiş): {hashed_pw}")
-admin_user = {
-    "full_name": "Talha Ozcan1",
-    "email": "talha1@taptaze.com",  # Buraya kendi mailini yazabilirsin
-    "username": "admin1",           # server.py login için username kullanıyor
-    "password": hashed_pw,
-    "role": "admin"
+# --- ÖRNEK KATALOG ---
+DEMO_CATEGORIES = {
+    "Sebzeler": f"{BASE_URL}/sebze.jpeg",
+    "Meyveler": f"{BASE_URL}/meyve.jpeg",
+    "Salata Malzemeleri": f"{BASE_URL}/salata.jpeg",
 }
 
-# Eğer şifreleme kullanıyorsan server.py üzerinden bir kez kayıt olup 
-# Atlas'tan rolünü admin yapmanı öneririm.
-db.users.insert_one(admin_user)
-print("👑 Yönetici hesabı oluşturuldu: talha@taptaze.com / 123")
-
-# --- 2. TEMİZLİK ---
-db.products.delete_many({})
-db.categories.delete_many({})
-db.orders.delete_many({}) 
-print(f"🧹 {DB_NAME} veritabanı temizlendi...")
-
-# --- 3. KATEGORİ EKLEME ---
-cat_sebze = db.categories.insert_one({
-    "name": "Sebzeler",
-    "image": f"{BASE_URL}/sebze.jpeg" 
-}).inserted_id
-
-cat_meyve = db.categories.insert_one({
-    "name": "Meyveler",
-    "image": f"{BASE_URL}/meyve.jpeg"
-}).inserted_id
-
-cat_salata = db.categories.insert_one({
-    "name": "Salata Malzemeleri",
-    "image": f"{BASE_URL}/salata.jpeg"
-}).inserted_id
-
-print("✅ Kategoriler eklendi.")
-
-# --- 4. ÜRÜN LİSTESİ ---
-products = [
-    {
-        "name": "Domates",
-        "category_id": str(cat_sebze),
-        "price": 25.0,
-        "unit_type": "KG",
-        "stock": 100,
-        "description": "Taze yerli salkım domates",
-        "image": f"{BASE_URL}/domates.jpeg"
-    },
-    {
-        "name": "Patates",
-        "category_id": str(cat_sebze),
-        "price": 15.0,
-        "unit_type": "KG",
-        "stock": 200,
-        "description": "Kızartmalık sarı patates",
-        "image": f"{BASE_URL}/patates.jpeg"
-    },
-    {
-        "name": "Soğan",
-        "category_id": str(cat_sebze),
-        "price": 12.0,
-        "unit_type": "KG",
-        "stock": 150,
-        "description": "Kuru yemeklik soğan",
-        "image": f"{BASE_URL}/sogan.jpeg"
-    },
-    {
-        "name": "Biber",
-        "category_id": str(cat_sebze),
-        "price": 28.0,
-        "unit_type": "KG",
-        "stock": 90,
-        "description": "Dolmalık çarliston biber",
-        "image": f"{BASE_URL}/biber.jpeg"
-    },
-    {
-        "name": "Salatalık",
-        "category_id": str(cat_salata),
-        "price": 20.0,
-        "unit_type": "KG",
-        "stock": 80,
-        "description": "Çıtır Çengelköy salatalığı",
-        "image": f"{BASE_URL}/salatalik.jpeg"
-    },
-    {
-        "name": "Marul",
-        "category_id": str(cat_salata),
-        "price": 10.0,
-        "unit_type": "ADET",
-        "stock": 70,
-        "description": "Kıvırcık marul",
-        "image": f"{BASE_URL}/marul.jpeg"
-    },
-    {
-        "name": "Kivi",
-        "category_id": str(cat_meyve),
-        "price": 45.0,
-        "unit_type": "KG",
-        "stock": 60,
-        "description": "Ekşi tatlı kivi",
-        "image": f"{BASE_URL}/kivi.jpeg"
-    },
-    {
-        "name": "Elma",
-        "category_id": str(cat_meyve),
-        "price": 30.0,
-        "unit_type": "KG",
-        "stock": 50,
-        "description": "Amasya elması",
-        "image": f"{BASE_URL}/elma.jpeg"
-    },
-    {
-        "name": "Muz",
-        "category_id": str(cat_meyve),
-        "price": 55.0,
-        "unit_type": "KG",
-        "stock": 120,
-        "description": "İthal muz",
-        "image": f"{BASE_URL}/muz.jpeg"
-    }
+DEMO_PRODUCTS = [
+    {"name": "Domates", "category": "Sebzeler", "price": 25.0, "unit_type": "KG", "stock": 100,
+     "description": "Taze yerli salkım domates", "image": f"{BASE_URL}/domates.jpeg"},
+    {"name": "Patates", "category": "Sebzeler", "price": 15.0, "unit_type": "KG", "stock": 200,
+     "description": "Kızartmalık sarı patates", "image": f"{BASE_URL}/patates.jpeg"},
+    {"name": "Soğan", "category": "Sebzeler", "price": 12.0, "unit_type": "KG", "stock": 150,
+     "description": "Kuru yemeklik soğan", "image": f"{BASE_URL}/sogan.jpeg"},
+    {"name": "Biber", "category": "Sebzeler", "price": 28.0, "unit_type": "KG", "stock": 90,
+     "description": "Dolmalık çarliston biber", "image": f"{BASE_URL}/biber.jpeg"},
+    {"name": "Salatalık", "category": "Salata Malzemeleri", "price": 20.0, "unit_type": "KG", "stock": 80,
+     "description": "Çıtır Çengelköy salatalığı", "image": f"{BASE_URL}/salatalik.jpeg"},
+    {"name": "Marul", "category": "Salata Malzemeleri", "price": 10.0, "unit_type": "ADET", "stock": 70,
+     "description": "Kıvırcık marul", "image": f"{BASE_URL}/marul.jpeg"},
+    {"name": "Kivi", "category": "Meyveler", "price": 45.0, "unit_type": "KG", "stock": 60,
+     "description": "Ekşi tatlı kivi", "image": f"{BASE_URL}/kivi.jpeg"},
+    {"name": "Elma", "category": "Meyveler", "price": 30.0, "unit_type": "KG", "stock": 50,
+     "description": "Amasya elması", "image": f"{BASE_URL}/elma.jpeg"},
+    {"name": "Muz", "category": "Meyveler", "price": 55.0, "unit_type": "KG", "stock": 120,
+     "description": "İthal muz", "image": f"{BASE_URL}/muz.jpeg"},
 ]
 
-# --- 5. KAYDETME İŞLEMİ ---
-db.products.insert_many(products)
-print(f"🚀 Başarılı! Ürünler {DB_NAME} veritabanına (Atlas) yüklendi.")
-print(f"📷 Resimler {BASE_URL} üzerinden aranacak.")
\ No newline at end of file
+
+def slugify(text: str) -> str:
+    text = text.replace("ı", "i").replace("İ", "I")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+# --- DOSYA OKUMA ---
+# Dosya satır satır okunur, büyük kataloglar belleğe alınmaz
+def read_rows(path: Path):
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.suffix.lower() == ".csv":
+        with path.open(encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        raise SystemExit(f"Desteklenmeyen dosya türü: {path.suffix} (csv veya jsonl olmalı)")
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CatalogImporter:
+    def __init__(self, db, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.category_ids = {}
+        self.rows = 0
+        self.upserted = 0
+        self.modified = 0
+        self.errors = 0
+
+    def category_id(self, name: str, image: str = None) -> str:
+        if name not in self.category_ids:
+            update = {"$setOnInsert": {"name": name}}
+            if image:
+                update["$set"] = {"image": image}
+            doc = self.db.categories.find_one_and_update(
+                {"name": name}, update, upsert=True, return_document=pymongo.ReturnDocument.AFTER
+            )
+            self.category_ids[name] = str(doc["_id"])
+        return self.category_ids[name]
+
+    def to_product(self, row: dict) -> dict:
+        product = {k: row[k] for k in PRODUCT_FIELDS if row.get(k) not in (None, "")}
+        for field, cast in NUMERIC_FIELDS.items():
+            if field in product:
+                product[field] = cast(product[field])
+        if "category_id" not in product:
+            product["category_id"] = self.category_id(row["category"])
+        if "sku" not in product:
+            product["sku"] = f"{product['category_id']}-{slugify(product['name'])}"
+        return product
+
+    def write_batch(self, rows):
+        products = []
+        for row in rows:
+            self.rows += 1
+            try:
+                products.append((self.rows, self.to_product(row)))
+            except (KeyError, ValueError) as e:
+                self.errors += 1
+                print(f"⚠️  Satır {self.rows} atlandı: {e!r}")
+
+        # Eksik alanlı satır sadece var olan ürünü günceller; yeni ürün olarak eklenirse
+        # sipariş fiyatlanırken (pricing.py) patlar. Var olanlar tek sorguyla bulunur.
+        incomplete = [p["sku"] for _, p in products if any(f not in p for f in REQUIRED_FIELDS)]
+        existing = set()
+        if incomplete:
+            existing = {doc["sku"] for doc in self.db.products.find({"sku": {"$in": incomplete}}, {"sku": 1})}
+
+        operations = []
+        for row_number, product in products:
+            missing = [field for field in REQUIRED_FIELDS if field not in product]
+            if missing and product["sku"] not in existing:
+                self.errors += 1
+                print(f"⚠️  Satır {row_number} atlandı: yeni ürün için eksik alan: {', '.join(missing)}")
+                continue
+            # Mevcut üründe stok siparişlerle değişiyor; dosyadaki değer sadece ilk kayıtta yazılır
+            update = {"$set": product}
+            if "stock" in product:
+                update["$setOnInsert"] = {"stock": product.pop("stock")}
+            operations.append(UpdateOne({"sku": product["sku"]}, update, upsert=not missing))
+        if not operations:
+            return
+        try:
+            result = self.db.products.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            self.errors += len(details.get("writeErrors", []))
+        self.upserted += details.get("nUpserted", 0)
+        self.modified += details.get("nModified", 0)
+
+    def run(self, rows):
+        started = time.perf_counter()
+        for batch in batched(rows, self.batch_size):
+            self.write_batch(batch)
+            elapsed = time.perf_counter() - started
+            print(f"   {self.rows} satır, {self.rows / elapsed:,.0f} satır/sn")
+        elapsed = time.perf_counter() - started
+        # Admin paneli sayacı toplu yüklemede güncel kalsın
+        self.db.stats_counters.update_one(
+            {"_id": TOTALS_ID},
+            {"$set": {"total_products": self.db.products.count_documents({})}},
+            upsert=True,
+        )
+        # Çalışan sunucular (CATALOG_SYNC=mongo) kataloğu TTL'i beklemeden yenilesin
+        self.db.cache_versions.update_one({"_id": VERSION_ID}, {"$inc": {"catalog": 1}}, upsert=True)
+        print(f"🚀 {self.rows} satır işlendi ({self.upserted} yeni, {self.modified} güncellendi, "
+              f"{self.errors} hata) - {elapsed:.1f} sn, {self.rows / max(elapsed, 1e-9):,.0f} satır/sn")
+
+
+# Eski sürümün eklediği ürünlerde sku yok; tekrar yüklemede kopya oluşmasın
+def backfill_skus(db):
+    operations = [
+        UpdateOne({"_id": p["_id"]}, {"$set": {"sku": f"{p['category_id']}-{slugify(p['name'])}"}})
+        for p in db.products.find({"sku": {"$exists": False}}, {"name": 1, "category_id": 1})
+    ]
+    if operations:
+        db.products.bulk_write(operations, ordered=False)
+        print(f"🔖 {len(operations)} eski ürüne sku verildi.")
+
+
+# --- YÖNETİCİ HESABI ---
+# Hesap zaten varsa şifresi dahil hiçbir şeye dokunulmaz
+def ensure_admin(db, email: str, password: str):
+    # bcrypt sadece yeni hesap için çalışır
+    if db.users.count_documents({"email": email}, limit=1):
+        print(f"👑 Yönetici hesabı zaten var: {email}")
+        return
+    hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    result = db.users.update_one(
+        {"email": email},
+        {"$setOnInsert": {
+            "name": "Talha Ozcan1",
+            "full_name": "Talha Ozcan1",
+            "email": email,
+            "username": "admin1",
+            "password": hashed_pw,
+            "role": "admin",
+            "is_verified": True,
+        }},
+        upsert=True,
+    )
+    if result.upserted_id:
+        print(f"👑 Yönetici hesabı oluşturuldu: {email}")
+    else:
+        print(f"👑 Yönetici hesabı zaten var: {email}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taptaze katalog yükleme aracı")
+    parser.add_argument("--file", type=Path, help="Ürün dosyası (.csv veya .jsonl); verilmezse örnek katalog")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reset-catalog", action="store_true",
+                        help="Yüklemeden önce ürün ve kategorileri sil (siparişler korunur)")
+    parser.add_argument("--admin-email", default=os.getenv("ADMIN_EMAIL", "talha1@taptaze.com"))
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD", "123"))
+    parser.add_argument("--no-admin", action="store_true", help="Yönetici hesabına dokunma")
+    args = parser.parse_args()
+
+    # Bilgisayarındaki localhost'u değil, .env içindeki Atlas linkini kullanıyoruz
+    mongo_uri = os.getenv("MONGO_URL")
+    if not mongo_uri:
+        raise SystemExit("HATA: MONGO_URL bulunamadı! .env dosyasını kontrol et.")
+    db_name = os.getenv("DB_NAME", "TaptazeDB")
+    db = pymongo.MongoClient(mongo_uri)[db_name]
+    db.products.create_indexes(INDEXES["products"])
+
+    if not args.no_admin:
+        ensure_admin(db, args.admin_email, args.admin_password)
+
+    if args.reset_catalog:
+        db.products.delete_many({})
+        db.categories.delete_many({})
+        print(f"🧹 {db_name} ürün ve kategorileri temizlendi (siparişler korundu)...")
+
+    backfill_skus(db)
+    importer = CatalogImporter(db, batch_size=args.batch_size)
+    if args.file:
+        importer.run(read_rows(args.file))
+    else:
+        for name, image in DEMO_CATEGORIES.items():
+            importer.category_id(name, image)
+        print("✅ Kategoriler eklendi.")
+        importer.run(iter(DEMO_PRODUCTS))
+        print(f"📷 Resimler {BASE_URL} üzerinden aranacak.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,15 @@ Tests all backend endpoints for the grocery delivery app
 
 import requests
 import json
+import os
 import sys
 from datetime import datetime
 
 # Backend URL from frontend .env
 BACKEND_URL = "https://manav-online.preview.emergentagent.com/api"
+# Yönetici hesabı (temiz_veri.py ile oluşturulan); sipariş listesi ve /admin uçları token ister
+ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "talha1@taptaze.com")
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "123")
 
 class BackendTester:
     def __init__(self):
@@ -35,6 +39,22 @@ class BackendTester:
         self.test_results.append(result)
         print(f"{status} {test_name}: {details}")
         
+    def login_admin(self):
+        """POST /api/login ile yönetici tokenı alır ve sonraki isteklere ekler"""
+        print("\n=== Admin Token ===")
+        try:
+            response = self.session.post(f"{BACKEND_URL}/login",
+                                       json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+            if response.status_code == 200 and response.json().get("access_token"):
+                self.admin_token = response.json()["access_token"]
+                self.session.headers["Authorization"] = f"Bearer {self.admin_token}"
+                self.log_test("Admin Token", True, f"Token alındı: {ADMIN_EMAIL}")
+                return True
+            self.log_test("Admin Token", False, f"HTTP {response.status_code}: {response.text}")
+        except Exception as e:
+            self.log_test("Admin Token", False, f"Exception: {str(e)}")
+        return False
+
     def test_seed_data(self):
         """Test POST /api/seed endpoint"""
         print("\n=== Testing Seed Data ===")
@@ -447,6 +467,7 @@ class BackendTester:
         print("=" * 60)
         
         # Run tests in sequence
+        self.login_admin()
         self.test_seed_data()
         self.test_categories()
         self.test_products()
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+# Benchmark'lar backend modüllerini doğrudan import eder
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def make_mongo_client():
+    # BENCH_MONGO_URL verilirse gerçek Mongo, yoksa mongomock-motor kullanılır
+    url = os.environ.get("BENCH_MONGO_URL")
+    if url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(url)
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("BENCH_MONGO_URL tanımlayın ya da `pip install mongomock-motor` ile yerel taklidi kurun.")
+    return AsyncMongoMockClient()
+
+
+def import_server(db_name="TaptazeLoad"):
+    # create_app() Motor istemcisini kurar; mongomock için import'tan önce yamalanır
+    url = os.environ.get("BENCH_MONGO_URL")
+    if url:
+        os.environ["MONGO_URL"] = url
+    else:
+        try:
+            import motor.motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("BENCH_MONGO_URL tanımlayın ya da `pip install mongomock-motor` ile yerel taklidi kurun.")
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+        os.environ["MONGO_URL"] = "mongodb://mongomock"
+    os.environ["DB_NAME"] = db_name
+    import server
+    return server
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def write_json(path, data):
+    if path:
+        Path(path).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Sonuçlar kaydedildi: {path}")
@@ -0,0 +1,25 @@
+# Ayrı süreçte çalışan benchmark'ların (bench_scaling.py, bench_events.py) sunucuya
+# verdiği uygulama; her worker bu modülü ayrı import eder. mongomock'ta her worker'ın
+# kendi bellek içi veritabanı olduğu için hepsi aynı veriyle doldurulur; gerçek
+# Mongo'da veriyi benchmark bir kez yazar.
+import os
+from contextlib import asynccontextmanager
+
+from _common import import_server
+from bench_load import seed
+
+server = import_server()
+app = server.create_app()
+
+if not os.environ.get("BENCH_MONGO_URL"):
+    _lifespan = app.router.lifespan_context
+    _sizes = [int(x) for x in os.environ.get("BENCH_SEED", "8,500,50").split(",")]
+
+    @asynccontextmanager
+    async def _seeded(app):
+        # Index kurulumundan önce doldurulmalı (mongomock kısmi unique index'i desteklemiyor)
+        await seed(server.state.db, *_sizes, server.state.password_pool.rounds)
+        async with _lifespan(app):
+            yield
+
+    app.router.lifespan_context = _seeded
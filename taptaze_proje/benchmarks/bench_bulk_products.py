@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Toplu ürün güncelleme testi: sabah fiyat/stok güncellemesini üç yolla yapar ve
+süreyi, katalog önbelleğinin kaç kez yeniden yüklendiğini ve aynı anda vitrini
+gezen okuyucuların gecikmesini karşılaştırır:
+
+  tek:    ürün başına PUT /api/admin/products/{id} (her biri önbelleği düşürür)
+  json:   tek POST /api/admin/products/bulk, JSON dizi
+  ndjson: tek POST /api/admin/products/bulk, akan NDJSON
+
+    python bench_bulk_products.py --products 500 --readers 4 --json toplu.json
+
+mongomock bulk_write'ı loop içinde senkron çalıştırır; toplu yoldaki okuyucu
+gecikmesi ancak BENCH_MONGO_URL ile gerçek Mongo'da anlamlıdır.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import httpx
+import orjson
+
+from _common import import_server, percentile, write_json
+from bench_load import seed
+
+os.environ.setdefault("MAIL_TRANSPORT", "fake")
+os.environ.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+os.environ["ADMIN_AUTH_REQUIRED"] = "0"
+METHODS = ("tek", "json", "ndjson")
+
+
+def morning_update(products, rng):
+    # Her ürüne yeni fiyat, yarısına stok düzeltmesi
+    items = []
+    for product in products:
+        items.append({"op": "price", "id": product["id"], "price": round(rng.uniform(5, 120), 2)})
+        if rng.random() < 0.5:
+            items.append({"op": "stock", "id": product["id"], "delta": rng.randint(-5, 50)})
+    return items
+
+
+async def apply_one_by_one(client, products, items):
+    by_id = {p["id"]: dict(p) for p in products}
+    for item in items:
+        product = by_id[item["id"]]
+        if item["op"] == "price":
+            product["price"] = item["price"]
+        else:
+            product["stock"] = max(product["stock"] + item["delta"], 0)
+        body = {k: product[k] for k in ("name", "category_id", "price", "unit_type", "stock")}
+        response = await client.put(f"/api/admin/products/{item['id']}", json=body)
+        response.raise_for_status()
+    return {"failed": 0}
+
+
+async def apply_bulk(client, items, ndjson):
+    if ndjson:
+        async def body():
+            for i in range(0, len(items), 200):
+                yield b"".join(orjson.dumps(item) + b"\n" for item in items[i:i + 200])
+        response = await client.post("/api/admin/products/bulk", content=body(),
+                                     headers={"Content-Type": "application/x-ndjson"})
+    else:
+        response = await client.post("/api/admin/products/bulk", json=items)
+    response.raise_for_status()
+    return response.json()
+
+
+async def measure(client, reloads, method, products, items, readers):
+    await client.get("/api/products")
+    reloads.clear()
+
+    done = asyncio.Event()
+    latencies = []
+
+    async def reader():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/api/products")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+    started = time.perf_counter()
+    try:
+        if method == "tek":
+            summary = await apply_one_by_one(client, products, items)
+        else:
+            summary = await apply_bulk(client, items, ndjson=method == "ndjson")
+    finally:
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*reader_tasks)
+    return {
+        "method": method,
+        "items": len(items),
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(len(items) / elapsed, 1),
+        "failed": summary["failed"],
+        "catalog_reloads": len(reloads),
+        "reader_requests": len(latencies),
+        "reader_p50_ms": round(percentile(latencies, 50), 2),
+        "reader_p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+async def run(args):
+    server = import_server("TaptazeBulk")
+    app = server.create_app()
+    # Index kurulumundan önce doldurulmalı (mongomock kısmi unique index'i desteklemiyor)
+    await seed(server.state.db, 8, args.products, 1, 4)
+    # Her katalog yeniden yüklemesinde bir kayıt
+    reloads = []
+    server.state.catalog_cache.add_listener(reloads.append)
+
+    # Okuyucular güncellemeyle araya girebilsin diye gerçek soket üzerinden (bench_load --mode uvicorn gibi)
+    import uvicorn
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serve_task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+    port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=600,
+                               limits=httpx.Limits(max_connections=args.readers + 1))
+    try:
+        products = [{**doc, "id": str(doc["_id"])} async for doc in server.state.db.products.find()]
+        rng = random.Random(args.seed)
+        rows = []
+        for method in args.methods:
+            row = await measure(client, reloads, method, products, morning_update(products, rng), args.readers)
+            rows.append(row)
+            print(f"{method:>6}: {row['items']} kalem {row['seconds']} sn ({row['items_per_second']} kalem/sn), "
+                  f"{row['catalog_reloads']} katalog yüklemesi, okuyucu p95 {row['reader_p95_ms']} ms "
+                  f"({row['reader_requests']} istek), {row['failed']} hata")
+        return rows
+    finally:
+        await client.aclose()
+        uvicorn_server.should_exit = True
+        await serve_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4, help="Güncelleme sırasında vitrini gezen istemci")
+    parser.add_argument("--methods", default=",".join(METHODS), help="Virgülle: tek,json,ndjson")
+    parser.add_argument("--chunk", type=int, default=None, help="PRODUCT_BULK_CHUNK")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+    args.methods = args.methods.split(",")
+    if args.chunk:
+        os.environ["PRODUCT_BULK_CHUNK"] = str(args.chunk)
+
+    rows = asyncio.run(run(args))
+    write_json(args.json, {"products": args.products, "readers": args.readers, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+SSE abone kapasitesi testi: tek bir uvicorn worker'ına kademeli olarak
+binlerce /api/events aboneliği açar, her kademede sunucunun bellek kullanımını
+ve bir sipariş durumu değişikliğinin tüm abonelere ulaşma süresini ölçer.
+
+    python bench_events.py --subscribers 100,1000,5000 --events 20 --json olay.json
+
+Abone başına bir TCP bağlantısı açıldığı için dosya tanımlayıcı sınırı
+(ulimit -n) abone sayısından yüksek olmalı; betik yumuşak sınırı sert sınıra
+kadar kendisi yükseltir. BENCH_MONGO_URL verilirse gerçek Mongo kullanılır.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from _common import percentile, write_json
+from bench_scaling import seed_shared_mongo
+
+BENCH_DIR = Path(__file__).resolve().parent
+# Aynı duruma PATCH olay üretmez; kademeler arasında da sırayla değişmeli
+STATUSES = itertools.cycle(("Hazırlanıyor", "Beklemede"))
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def start_server(port, max_subscribers, timeout):
+    env = dict(os.environ)
+    env.update({
+        "ADMIN_AUTH_REQUIRED": "0",
+        "RATE_LIMIT_ENABLED": "0",
+        "MAIL_TRANSPORT": "fake",
+        "EVENT_MAX_SUBSCRIBERS": str(max_subscribers),
+        "BENCH_SEED": "2,20,1",
+    })
+    env.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "_seeded_app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        cwd=BENCH_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + timeout
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+        while True:
+            if process.poll() is not None or time.perf_counter() > deadline:
+                process.terminate()
+                raise SystemExit("Sunucu açılmadı.")
+            try:
+                if client.get("/api/categories").status_code == 200:
+                    return process
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+
+
+class Subscribers:
+    def __init__(self, port):
+        self.port = port
+        self.connections = []
+        self.tasks = []
+        self.failed = 0
+        self.dropped = 0
+        self.received = 0
+        self.latencies = []
+        self.sent_at = 0.0
+        self.expected = 0
+        self.all_received = asyncio.Event()
+
+    async def _open(self):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            writer.write(b"GET /api/events?topics=orders HTTP/1.1\r\nHost: bench\r\n"
+                         b"Accept: text/event-stream\r\n\r\n")
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise ConnectionError(status)
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+        except (OSError, ConnectionError):
+            self.failed += 1
+            return
+        self.connections.append(writer)
+        self.tasks.append(asyncio.create_task(self._read(reader)))
+
+    async def _read(self, reader):
+        # Gövde chunked geliyor; parça boyu satırları atlanır, olay satırları aynen okunur
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"event: dropped"):
+                self.dropped += 1
+            elif line.startswith(b"event: order_status"):
+                self.latencies.append((time.perf_counter() - self.sent_at) * 1000)
+                self.received += 1
+                if self.received >= self.expected:
+                    self.all_received.set()
+
+    async def grow(self, target, batch=200):
+        while len(self.connections) + self.failed < target:
+            count = min(batch, target - len(self.connections) - self.failed)
+            await asyncio.gather(*[self._open() for _ in range(count)])
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        for writer in self.connections:
+            writer.close()
+
+
+async def broadcast(client, subscribers, order_id, events, timeout):
+    fanout = []
+    subscribers.latencies = []
+    for _ in range(events):
+        subscribers.received = 0
+        subscribers.expected = len(subscribers.connections)
+        subscribers.all_received.clear()
+        subscribers.sent_at = time.perf_counter()
+        response = await client.patch(f"/api/admin/orders/{order_id}", json={"status": next(STATUSES)})
+        response.raise_for_status()
+        try:
+            await asyncio.wait_for(subscribers.all_received.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        fanout.append((time.perf_counter() - subscribers.sent_at) * 1000)
+    return fanout
+
+
+async def run(args, port, pid):
+    subscribers = Subscribers(port)
+    rows = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        product = (await client.get("/api/products")).json()[0]
+        order = (await client.post("/api/orders", json={
+            "customer_name": "Olay Testi", "customer_phone": "0", "delivery_address": "-",
+            "items": [{"product_id": product["id"], "quantity": 1, "unit_type": product["unit_type"]}],
+        })).json()
+        try:
+            for target in args.subscribers:
+                started = time.perf_counter()
+                await subscribers.grow(target)
+                connect_s = time.perf_counter() - started
+                await asyncio.sleep(0.5)
+                fanout = await broadcast(client, subscribers, order["id"], args.events, args.timeout)
+                connected = len(subscribers.connections)
+                row = {
+                    "target": target,
+                    "connected": connected,
+                    "failed": subscribers.failed,
+                    "dropped": subscribers.dropped,
+                    "connect_seconds": round(connect_s, 2),
+                    "server_rss_mb": rss_mb(pid),
+                    "delivery_p50_ms": round(percentile(subscribers.latencies, 50), 2),
+                    "delivery_p99_ms": round(percentile(subscribers.latencies, 99), 2),
+                    "fanout_p50_ms": round(percentile(fanout, 50), 2),
+                    "delivered_ratio": round(len(subscribers.latencies) / max(connected * args.events, 1), 4),
+                }
+                rows.append(row)
+                print(f"{connected:>6} abone ({row['failed']} başarısız): RSS {row['server_rss_mb']} MB, "
+                      f"teslim p50 {row['delivery_p50_ms']} ms / p99 {row['delivery_p99_ms']} ms, "
+                      f"hepsine ulaşma {row['fanout_p50_ms']} ms, teslim oranı {row['delivered_ratio']}")
+        finally:
+            subscribers.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", default="100,1000,5000", help="Virgülle kademeler (toplam abone)")
+    parser.add_argument("--events", type=int, default=20, help="Kademe başına yayınlanacak olay")
+    parser.add_argument("--timeout", type=float, default=10, help="Bir olayın herkese ulaşması için en fazla bekleme")
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+    args.subscribers = [int(x) for x in args.subscribers.split(",")]
+
+    limit = raise_fd_limit()
+    if max(args.subscribers) * 2 + 100 > limit:
+        print(f"Uyarı: dosya tanımlayıcı sınırı {limit}; en büyük kademe açılamayabilir.")
+    if os.environ.get("BENCH_MONGO_URL"):
+        seed_shared_mongo(10)
+
+    port = free_port()
+    process = start_server(port, max(args.subscribers) + 10, args.timeout * 3)
+    idle_rss = rss_mb(process.pid)
+    try:
+        rows = asyncio.run(run(args, port, process.pid))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            # Açık SSE bağlantıları kapanışı bekletebilir
+            process.kill()
+    print(f"Boştaki sunucu: {idle_rss} MB")
+    write_json(args.json, {"idle_rss_mb": idle_rss, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
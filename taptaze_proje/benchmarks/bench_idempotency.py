@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tekrar fırtınası testi: zayıf bağlantıdaki istemcileri taklit eder. Her sipariş
+ve kayıt isteği, ilki bitmeden --retries kez yeniden gönderilir. Idempotency-Key
+başlığı olmadan ve olan iki turda oluşan sipariş sayısını, bcrypt çağrılarını,
+kuyruğa giren mailleri ve toplam süreyi karşılaştırır.
+
+    python bench_idempotency.py --submissions 200 --retries 4 --json tekrar.json
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+
+from _common import import_server, percentile, write_json
+from bench_load import seed
+
+os.environ.setdefault("MAIL_TRANSPORT", "fake")
+os.environ.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+# Havuz doluluk reddi (503) tekrarların boşa harcadığı bcrypt işini gizlemesin
+os.environ.setdefault("PASSWORD_POOL_MAX_PENDING", "100000")
+
+
+async def submit(client, path, body, attempts, delay, use_key, latencies):
+    headers = {"Idempotency-Key": uuid.uuid4().hex} if use_key else {}
+    statuses = []
+
+    async def attempt(i):
+        # Yanıt gelmeden sabrı tükenen istemci aynı isteği tekrar yollar
+        await asyncio.sleep(i * delay)
+        started = time.perf_counter()
+        response = await client.post(path, json=body, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses.append(response.status_code)
+    await asyncio.gather(*[attempt(i) for i in range(attempts)])
+    return statuses
+
+
+async def run_round(server, client, products, args, use_key):
+    db = server.state.db
+    tag = "anahtarlı" if use_key else "anahtarsız"
+    attempts = args.retries + 1
+    product = products[0]
+    bcrypt_before = server.state.password_pool.calls
+    mails_before = await db.mail_outbox.count_documents({})
+    latencies = []
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        submit(client, "/api/orders", {
+            "customer_name": f"{tag} {i}", "customer_phone": "0", "delivery_address": "-",
+            "items": [{"product_id": product, "quantity": 1, "unit_type": "Adet"}],
+        }, attempts, args.retry_delay_ms / 1000, use_key, latencies)
+        for i in range(args.submissions)
+    ] + [
+        submit(client, "/api/register", {
+            "name": "Tekrar", "surname": "Test", "email": f"{tag}-{i}@tekrar.local", "password": "yuk-testi",
+            "phone": "0", "address": "-",
+        }, attempts, args.retry_delay_ms / 1000, use_key, latencies)
+        for i in range(args.submissions)
+    ])
+    elapsed = time.perf_counter() - started
+
+    orders = await db.orders.count_documents({"customer_name": {"$regex": f"^{tag} "}})
+    # Mail dağıtıcısı arka planda; kuyruğa yazılanlar hemen sayılır
+    mails = await db.mail_outbox.count_documents({}) - mails_before
+    statuses = [s for group in results for s in group]
+    return {
+        "idempotency_key": use_key,
+        "requests": len(statuses),
+        "orders_created": orders,
+        "duplicate_orders": orders - args.submissions,
+        "bcrypt_calls": server.state.password_pool.calls - bcrypt_before,
+        "mails_queued": mails,
+        "non_2xx": sum(1 for s in statuses if s >= 300),
+        "seconds": round(elapsed, 3),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+async def run(args):
+    server = import_server("TaptazeIdempotency")
+    app = server.create_app()
+    db = server.state.db
+    # Index kurulumundan önce doldurulmalı (mongomock kısmi unique index'i desteklemiyor)
+    await seed(db, 1, 5, 1, server.state.password_pool.rounds)
+    await db.products.update_many({}, {"$set": {"unit_type": "Adet", "stock": 10 ** 7}})
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tekrar", timeout=60)
+    lifespan = app.router.lifespan_context(app)
+    await lifespan.__aenter__()
+    try:
+        products = [p["id"] for p in (await client.get("/api/products")).json()]
+        rows = []
+        for use_key in (False, True):
+            row = await run_round(server, client, products, args, use_key)
+            rows.append(row)
+            print(f"{'anahtarlı' if use_key else 'anahtarsız':11} {row['requests']} istek: "
+                  f"{row['orders_created']} sipariş ({row['duplicate_orders']} kopya), "
+                  f"{row['bcrypt_calls']} bcrypt, {row['mails_queued']} mail, {row['non_2xx']} hata, "
+                  f"{row['seconds']} sn (p95 {row['p95_ms']} ms)")
+        return {"stats": server.state.idempotency.stats(), "results": rows}
+    finally:
+        await client.aclose()
+        await lifespan.__aexit__(None, None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=200, help="Tur başına sipariş ve kayıt sayısı")
+    parser.add_argument("--retries", type=int, default=4, help="İstek başına tekrar sayısı")
+    parser.add_argument("--retry-delay-ms", type=float, default=5, help="Tekrarlar arası bekleme")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+
+    result = asyncio.run(run(args))
+    write_json(args.json, {"submissions": args.submissions, "retries": args.retries, **result})
+
+
+if __name__ == "__main__":
+    main()
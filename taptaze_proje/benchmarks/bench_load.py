@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Yük testi: server.py uygulamasını süreç içinde (ASGI) ya da uvicorn altında
+ayağa kaldırır ve sanal kullanıcılarla karışık trafik üretir: kategori/ürün
+gezinme, arama, kayıt + doğrulama, giriş ve sipariş. Uç nokta başına p50/p95/p99
+gecikme ve saniyedeki istek sayısını raporlar.
+
+    python bench_load.py --users 50 --duration 30 --json sonuc.json
+    python bench_load.py --mode uvicorn --baseline onceki.json   # gerileme varsa çıkış kodu 1
+
+BENCH_MONGO_URL verilirse gerçek Mongo (TaptazeLoad veritabanı silinip yeniden
+doldurulur), yoksa mongomock-motor kullanılır. mongomock sorguları loop içinde
+senkron çalıştırdığı için mutlak sayılar gerçek Mongo'dan farklıdır; commit'ler
+arası karşılaştırma için aynı ortam kullanılmalı.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import bcrypt
+import httpx
+
+from _common import import_server, percentile, write_json
+
+# Yük testinde hepsi aynı IP'den geldiği için hız sınırı varsayılan olarak kapalı
+os.environ.setdefault("MAIL_TRANSPORT", "fake")
+os.environ.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+
+SCENARIO = {
+    # görev: ağırlık
+    "categories": 10,
+    "products": 20,
+    "products_page": 15,
+    "search": 15,
+    "register": 3,
+    "login": 5,
+    "order": 7,
+}
+SEARCH_TERMS = ["domates", "domtes", "sogan", "biber", "taze", "elma", "organik", "patates", "cilek", "salatalik"]
+PRODUCE = ["Domates", "Patates", "Soğan", "Biber", "Salatalık", "Elma", "Çilek", "Muz", "Havuç", "Marul"]
+
+
+async def seed(db, categories, products, accounts, rounds):
+    for name in ("categories", "products", "users", "orders", "mail_outbox", "refresh_tokens",
+                 "stats_counters", "stats_daily", "stats_skus"):
+        await db[name].delete_many({})
+    rng = random.Random(1)
+    category_ids = [
+        str(cid) for cid in (await db.categories.insert_many(
+            [{"name": f"Kategori {i}", "image": ""} for i in range(categories)]
+        )).inserted_ids
+    ]
+    docs = []
+    for i in range(products):
+        category = category_ids[i % categories]
+        name = f"{rng.choice(['Taze', 'Organik', 'Yerli'])} {rng.choice(PRODUCE)} {i}"
+        docs.append({
+            "name": name,
+            "sku": f"{category}-yuk-{i}",
+            "category_id": category,
+            "category_name": f"Kategori {i % categories}",
+            "price": round(rng.uniform(5, 120), 2),
+            "unit_type": rng.choice(["KG", "Adet", "Demet"]),
+            "stock": 10 ** 9,
+            "image": "",
+            "description": f"{name} açıklaması",
+        })
+    await db.products.insert_many(docs)
+
+    # Tüm hesaplar aynı şifreyi paylaşır; hash bir kez hesaplanır
+    hashed = bcrypt.hashpw(b"yuk-testi", bcrypt.gensalt(rounds=rounds)).decode()
+    emails = [f"hesap{i}@yuk.local" for i in range(accounts)]
+    await db.users.insert_many([
+        {"name": "Yük", "surname": "Test", "email": email, "password": hashed, "phone": "0",
+         "address": "-", "is_verified": True}
+        for email in emails
+    ])
+    products = [
+        {"id": str(d["_id"]), "name": d["name"], "price": d["price"], "unit_type": d["unit_type"]}
+        for d in await db.products.find({}, {"name": 1, "price": 1, "unit_type": 1}).to_list(None)
+    ]
+    return category_ids, products, emails
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, name, request, expected=(200,)):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            if self.recording:
+                self.errors[name] += 1
+            return None
+        if self.recording:
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+            self.statuses[name][response.status_code] += 1
+            if response.status_code not in expected:
+                self.errors[name] += 1
+        return response
+
+
+async def virtual_user(client, db, recorder, rng, category_ids, products, emails, deadline, think):
+    etag = None
+    tasks, weights = zip(*SCENARIO.items())
+    while time.perf_counter() < deadline:
+        task = rng.choices(tasks, weights)[0]
+        if task == "categories":
+            await recorder.call("GET /api/categories", client.get("/api/categories"))
+        elif task == "products":
+            # Gerçek istemci gibi ETag ile yeniden doğrular
+            headers = {"If-None-Match": etag} if etag else {}
+            response = await recorder.call("GET /api/products", client.get("/api/products", headers=headers),
+                                           expected=(200, 304))
+            if response is not None and response.headers.get("etag"):
+                etag = response.headers["etag"]
+        elif task == "products_page":
+            params = {"category_id": rng.choice(category_ids), "limit": 20}
+            for _ in range(rng.randint(1, 3)):
+                response = await recorder.call("GET /api/products?category_id", client.get("/api/products", params=params))
+                cursor = response.headers.get("x-next-cursor") if response is not None else None
+                if not cursor:
+                    break
+                params["cursor"] = cursor
+        elif task == "search":
+            await recorder.call("GET /api/products?search",
+                                client.get("/api/products", params={"search": rng.choice(SEARCH_TERMS)}))
+        elif task == "register":
+            email = f"yeni-{uuid.uuid4().hex[:12]}@yuk.local"
+            response = await recorder.call("POST /api/register", client.post("/api/register", json={
+                "name": "Yeni", "surname": "Kullanıcı", "email": email, "password": "yuk-testi",
+                "phone": "0", "address": "-",
+            }))
+            if response is not None and response.status_code == 200:
+                user = await db.users.find_one({"email": email}, {"verification_code": 1})
+                await recorder.call("POST /api/verify", client.post("/api/verify", json={
+                    "email": email, "code": user["verification_code"],
+                }))
+        elif task == "login":
+            await recorder.call("POST /api/login", client.post("/api/login", json={
+                "email": rng.choice(emails), "password": "yuk-testi",
+            }))
+        elif task == "order":
+            items = []
+            for product in rng.sample(products, rng.randint(1, 4)):
+                items.append({"product_id": product["id"], "product_name": product["name"],
+                              "quantity": rng.randint(1, 3), "price": product["price"],
+                              "unit_type": product["unit_type"]})
+            await recorder.call("POST /api/orders", client.post("/api/orders", json={
+                "customer_name": "Yük Testi", "customer_phone": "0", "delivery_address": "-",
+                "items": items, "total_amount": round(sum(i["price"] * i["quantity"] for i in items), 2),
+            }))
+        if think:
+            await asyncio.sleep(rng.uniform(0, think))
+
+
+def summarize(recorder, seconds):
+    endpoints = {}
+    for name in sorted(recorder.latencies):
+        values = recorder.latencies[name]
+        endpoints[name] = {
+            "requests": len(values),
+            "rps": round(len(values) / seconds, 1),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(max(values), 2),
+            "errors": recorder.errors.get(name, 0),
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses[name].items())},
+        }
+    everything = [v for values in recorder.latencies.values() for v in values]
+    total = {
+        "requests": len(everything),
+        "rps": round(len(everything) / seconds, 1),
+        "p50_ms": round(percentile(everything, 50), 2),
+        "p95_ms": round(percentile(everything, 95), 2),
+        "p99_ms": round(percentile(everything, 99), 2),
+        "errors": sum(recorder.errors.values()),
+    }
+    return endpoints, total
+
+
+def compare(result, baseline, tolerance):
+    # p95 %tolerans'tan fazla artar ya da rps aynı oranda düşerse gerileme sayılır
+    regressions = []
+    for name, current in result["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if not old:
+            continue
+        if old["p95_ms"] and current["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {current['p95_ms']} ms")
+        if old["rps"] and current["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {old['rps']} -> {current['rps']}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    server = import_server()
+    app = server.create_app()
+    db = server.state.db
+    category_ids, products, emails = await seed(db, args.categories, args.products, args.accounts,
+                                                server.state.password_pool.rounds)
+
+    recorder = Recorder()
+    uvicorn_server = serve_task = None
+    if args.mode == "uvicorn":
+        import uvicorn
+        uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        serve_task = asyncio.create_task(uvicorn_server.serve())
+        while not uvicorn_server.started:
+            await asyncio.sleep(0.05)
+        port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30,
+                                   limits=httpx.Limits(max_connections=args.users))
+        lifespan = None
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://yuk", timeout=30)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+
+    try:
+        async def phase(seconds, record):
+            recorder.recording = record
+            deadline = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                virtual_user(client, db, recorder, random.Random(args.seed + i), category_ids, products,
+                             emails, deadline, args.think_ms / 1000)
+                for i in range(args.users)
+            ])
+            return time.perf_counter() - started
+
+        if args.warmup:
+            await phase(args.warmup, record=False)
+        elapsed = await phase(args.duration, record=True)
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+        if uvicorn_server is not None:
+            uvicorn_server.should_exit = True
+            await serve_task
+
+    endpoints, total = summarize(recorder, elapsed)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "mode": args.mode,
+            "mongo": "gerçek" if os.environ.get("BENCH_MONGO_URL") else "mongomock",
+            "users": args.users,
+            "duration_s": round(elapsed, 2),
+            "products": args.products,
+            "bcrypt_rounds": server.state.password_pool.rounds,
+            "python": platform.python_version(),
+        },
+        "endpoints": endpoints,
+        "total": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--users", type=int, default=50, help="Eşzamanlı sanal kullanıcı")
+    parser.add_argument("--duration", type=float, default=20, help="Ölçüm süresi (sn)")
+    parser.add_argument("--warmup", type=float, default=2, help="Ölçülmeyen ısınma süresi (sn)")
+    parser.add_argument("--think-ms", type=float, default=0, help="İstekler arası en fazla bekleme")
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--rate-limit", action="store_true", help="Hız sınırını açık bırak")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    parser.add_argument("--baseline", help="Önceki sonuç dosyası; gerileme varsa çıkış kodu 1")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "0"
+
+    result = asyncio.run(run(args))
+    meta, total = result["meta"], result["total"]
+    print(f"{meta['mode']} / {meta['mongo']}: {meta['users']} kullanıcı, {meta['duration_s']} sn, "
+          f"bcrypt {meta['bcrypt_rounds']} tur")
+    print(f"{'uç nokta':34} {'istek':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'hata':>5}")
+    for name, r in result["endpoints"].items():
+        print(f"{name:34} {r['requests']:>7} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['errors']:>5}")
+    print(f"{'TOPLAM':34} {total['requests']:>7} {total['rps']:>8} {total['p50_ms']:>8} "
+          f"{total['p95_ms']:>8} {total['p99_ms']:>8} {total['errors']:>5}")
+    write_json(args.json, result)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("Gerileme tespit edildi:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Önceki sonuca göre gerileme yok.")
+
+
+if __name__ == "__main__":
+    main()
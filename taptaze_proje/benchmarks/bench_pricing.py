@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Sipariş fiyatlandırma testi: 1..200 satırlık sepetleri üç yolla fiyatlandırır
+ve sipariş başına süreyi ve DB sorgu sayısını karşılaştırır:
+
+  naive: her satır için ayrı find_one (eski yaklaşım)
+  db:    tek $in sorgusu (PRICING_SOURCE=db)
+  cache: katalog önbelleğindeki fiyat görüntüsü (varsayılan)
+
+    python bench_pricing.py --sizes 1,10,50,100,200 --orders 200 --json fiyat.json
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bson import ObjectId
+
+from _common import make_mongo_client, percentile, write_json
+from catalog_cache import CatalogCache
+from pricing import OrderPricing
+from serialization import dumps, pick
+
+FIELDS = ("name", "category_id", "price", "unit_type", "stock", "crate_size", "crate_price")
+
+
+async def seed(db, products, seed):
+    await db.products.delete_many({})
+    rng = random.Random(seed)
+    docs = []
+    for i in range(products):
+        doc = {"name": f"Ürün {i}", "category_id": "bench", "price": round(rng.uniform(5, 120), 2),
+               "unit_type": rng.choice(["KG", "Adet", "Demet"]), "stock": 10 ** 6}
+        if i % 3 == 0:
+            doc["crate_size"] = 20.0
+            doc["crate_price"] = round(doc["price"] * 18, 2)
+        docs.append(doc)
+    result = await db.products.insert_many(docs)
+    return [(str(oid), doc["unit_type"]) for oid, doc in zip(result.inserted_ids, docs)]
+
+
+def make_cart(rng, products, size):
+    lines = []
+    for product_id, unit in rng.sample(products, size):
+        quantity = rng.choice([0.5, 1.5, 3]) if unit == "KG" else rng.randint(1, 5)
+        lines.append({"product_id": product_id, "quantity": quantity, "unit_type": unit})
+    return lines
+
+
+async def naive_price(collection, items):
+    # Karşılaştırma için: satır başına bir sorgu
+    total = 0.0
+    for item in items:
+        product = await collection.find_one({"_id": ObjectId(item["product_id"])}, {"price": 1})
+        total += product["price"] * item["quantity"]
+    return round(total, 2), len(items)
+
+
+async def run(db, args):
+    products = await seed(db, args.products, args.seed)
+    cache = CatalogCache(db, lambda d: pick(d, FIELDS), lambda d: pick(d, ("name",)), dumps, ttl_seconds=3600)
+    engines = {
+        "db": OrderPricing(db.products),
+        "cache": OrderPricing(db.products, catalog_cache=cache),
+    }
+    await cache.get_products()
+
+    results = []
+    for size in args.sizes:
+        rng = random.Random(args.seed + size)
+        carts = [make_cart(rng, products, min(size, len(products))) for _ in range(args.orders)]
+        row = {"lines": size}
+        for method in ("naive", "db", "cache"):
+            timings, queries = [], 0
+            for cart in carts:
+                started = time.perf_counter()
+                if method == "naive":
+                    _, used = await naive_price(db.products, cart)
+                else:
+                    engine = engines[method]
+                    before = engine.db_queries
+                    await engine.price(cart)
+                    used = engine.db_queries - before
+                timings.append((time.perf_counter() - started) * 1000)
+                queries += used
+            row[method] = {
+                "p50_ms": round(percentile(timings, 50), 3),
+                "p95_ms": round(percentile(timings, 95), 3),
+                "queries_per_order": round(queries / len(carts), 2),
+            }
+        results.append(row)
+        print(f"{size:>4} satır: " + ", ".join(
+            f"{m} {row[m]['p50_ms']} ms ({row[m]['queries_per_order']} sorgu)" for m in ("naive", "db", "cache")))
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,50,100,200", help="Virgülle sepet satır sayıları")
+    parser.add_argument("--orders", type=int, default=100, help="Boyut başına fiyatlandırılacak sepet")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+    args.sizes = [int(x) for x in args.sizes.split(",")]
+
+    client = make_mongo_client()
+    try:
+        results = await run(client["TaptazeBench"], args)
+    finally:
+        client.close()
+    write_json(args.json, {"orders": args.orders, "products": args.products, "results": results})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Ölçeklenme testi: uygulamayı gunicorn.conf.py ile 1..N worker olarak açar ve
+giriş (bcrypt) ile katalog uçlarının saniyedeki istek sayısını karşılaştırır.
+
+    python bench_scaling.py --workers 1,2,4 --duration 10 --json olcek.json
+
+Yük birden fazla istemci sürecinden üretilir (--clients); tek süreçli istemci
+yüksek worker sayılarında kendisi darboğaz olur. Worker sayısı çekirdek
+sayısını aşarsa ölçeklenme beklenmez. BENCH_MONGO_URL verilirse tüm worker'lar
+aynı gerçek Mongo'yu kullanır, yoksa her worker kendi mongomock kopyasını.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from _common import BACKEND_DIR, make_mongo_client, percentile, write_json
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCENARIOS = ("catalog", "login")
+SEED_SIZES = (8, 500, 50)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_shared_mongo(rounds):
+    from bench_load import seed
+
+    async def _seed():
+        client = make_mongo_client()
+        try:
+            await seed(client["TaptazeLoad"], *SEED_SIZES, rounds)
+        finally:
+            client.close()
+    asyncio.run(_seed())
+
+
+def start_server(workers, port, rounds, timeout):
+    env = dict(os.environ)
+    env.update({
+        "WEB_CONCURRENCY": str(workers),
+        "BCRYPT_ROUNDS": str(rounds),
+        "RATE_LIMIT_ENABLED": "0",
+        "MAIL_TRANSPORT": "fake",
+        "BENCH_SEED": ",".join(map(str, SEED_SIZES)),
+    })
+    env.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", str(BACKEND_DIR / "gunicorn.conf.py"),
+         "--chdir", str(BENCH_DIR), "-b", f"127.0.0.1:{port}", "--log-level", "warning", "_seeded_app:app"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + timeout
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+        while True:
+            if process.poll() is not None or time.perf_counter() > deadline:
+                process.terminate()
+                raise SystemExit("gunicorn açılmadı; `pip install gunicorn` ve çıktıyı kontrol edin.")
+            try:
+                if client.get("/api/categories").status_code == 200:
+                    return process
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+
+
+async def _drive(base_url, scenario, concurrency, seconds, seed):
+    rng = random.Random(seed)
+    emails = [f"hesap{i}@yuk.local" for i in range(SEED_SIZES[2])]
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if scenario == "catalog":
+                        response = await client.get("/api/products")
+                    else:
+                        response = await client.post("/api/login", json={
+                            "email": rng.choice(emails), "password": "yuk-testi"})
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    # 503: bcrypt havuzu dolu, istek reddedildi
+                    errors += 1
+        await asyncio.gather(*[user() for _ in range(concurrency)])
+    return latencies, errors
+
+
+def _client_process(job):
+    return asyncio.run(_drive(*job))
+
+
+def measure(pool, base_url, scenario, clients, concurrency, seconds):
+    jobs = [(base_url, scenario, concurrency, seconds, i) for i in range(clients)]
+    started = time.perf_counter()
+    results = pool.map(_client_process, jobs)
+    elapsed = max(time.perf_counter() - started, seconds)
+    latencies = [v for values, _ in results for v in values]
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=None, help="Virgülle worker sayıları (varsayılan 1..çekirdek)")
+    parser.add_argument("--duration", type=float, default=10, help="Senaryo başına ölçüm süresi (sn)")
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--clients", type=int, default=2, help="Yük üreten istemci süreci")
+    parser.add_argument("--concurrency", type=int, default=32, help="İstemci süreci başına eşzamanlı istek")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60, help="Sunucunun açılması için en fazla bekleme")
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(x) for x in args.workers.split(",")]
+    else:
+        counts = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cpus), cpus})
+    if os.environ.get("BENCH_MONGO_URL"):
+        seed_shared_mongo(args.bcrypt_rounds)
+
+    rows = []
+    with multiprocessing.Pool(args.clients) as pool:
+        for workers in counts:
+            port = free_port()
+            process = start_server(workers, port, args.bcrypt_rounds, args.timeout)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                row = {"workers": workers}
+                for scenario in SCENARIOS:
+                    if args.warmup:
+                        measure(pool, base_url, scenario, args.clients, args.concurrency, args.warmup)
+                    row[scenario] = measure(pool, base_url, scenario, args.clients, args.concurrency,
+                                            args.duration)
+                rows.append(row)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            print(f"{workers:>3} worker: katalog {row['catalog']['rps']} rps (p95 {row['catalog']['p95_ms']} ms), "
+                  f"giriş {row['login']['rps']} rps (p95 {row['login']['p95_ms']} ms)")
+
+    base = rows[0]
+    for row in rows:
+        for scenario in SCENARIOS:
+            first = base[scenario]["rps"]
+            row[scenario]["speedup"] = round(row[scenario]["rps"] / first, 2) if first else None
+
+    print(f"\n{'worker':>6} {'katalog rps':>12} {'x':>6} {'giriş rps':>10} {'x':>6}")
+    for row in rows:
+        print(f"{row['workers']:>6} {row['catalog']['rps']:>12} {row['catalog']['speedup']:>6} "
+              f"{row['login']['rps']:>10} {row['login']['speedup']:>6}")
+    if max(counts) > cpus:
+        print(f"Not: bu makinede {cpus} çekirdek var; üzerindeki worker sayılarında ölçeklenme beklenmez.")
+
+    write_json(args.json, {
+        "meta": {
+            "cpus": cpus,
+            "clients": args.clients,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "mongo": "gerçek" if os.environ.get("BENCH_MONGO_URL") else "mongomock",
+            "python": platform.python_version(),
+        },
+        "results": rows,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Arama indeksi testi: sentetik bir katalog (varsayılan 100k ürün) üzerinde
+indeks kurulum süresini, artımlı güncelleme maliyetini ve sorgu gecikmesini
+(p50/p95/p99) ölçer. Hedef: sorgu başına < 5 ms. Sunucudaki gibi arka planda
+(schedule_sync) kurulurken olay döngüsünün en uzun bekleyişi de ölçülür.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from _common import percentile, write_json
+from search_index import SearchIndex
+
+PRODUCE = ["Domates", "Salkım Domates", "Cherry Domates", "Patates", "Soğan", "Kuru Soğan", "Biber",
+           "Çarliston Biber", "Sivri Biber", "Salatalık", "Marul", "Kıvırcık", "Roka", "Maydanoz",
+           "Kivi", "Elma", "Muz", "Portakal", "Mandalina", "Üzüm", "Çilek", "Ispanak", "Pırasa",
+           "Karnabahar", "Brokoli", "Havuç", "Ihlamur", "Şeftali", "Kayısı", "Kiraz", "Vişne", "Armut",
+           "Ayva", "Nar", "İncir", "Karpuz", "Kavun", "Limon", "Greyfurt", "Kabak", "Patlıcan", "Bezelye"]
+ORIGINS = ["Antalya", "Amasya", "Çengelköy", "İzmir", "Bursa", "Mersin", "Adana", "Ordu", "Giresun",
+           "Malatya", "Aydın", "Manisa", "Konya", "Niğde", "Muğla", "Hatay", "Trabzon", "Rize"]
+ADJECTIVES = ["Taze", "Organik", "Yerli", "İthal", "Günlük", "Seçme", "Ekstra", "Köy", "Sera", "Tarla"]
+
+QUERIES = ["domates", "DOMATES", "domtes", "sogan", "SOĞAN", "soğ", "çilek", "cilek", "ıhlamur",
+           "IHLAMUR", "incir", "İNCİR", "organik elma", "taze amasya elma", "karpz", "patlican",
+           "brok", "seft", "mandal", "köy biber", "sivri", "xyzzy"]
+
+
+def make_products(count, seed):
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCE)} {rng.choice(ORIGINS)} {i % 997}"
+        products.append({
+            "id": f"{i:024x}",
+            "name": name,
+            "category_id": f"kat{i % 12}",
+            "description": f"{rng.choice(ORIGINS)} yöresinden {rng.choice(ADJECTIVES).lower()} ürün, parti {i}",
+        })
+    return products
+
+
+async def background_sync(index, products):
+    # Kurulum sürerken 1 ms'lik uykunun ne kadar geciktiği: olay döngüsü tıkanması
+    stalls = [0.0]
+
+    async def ticker():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - started - 0.001)
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    index.schedule_sync(products)
+    await index._sync_task
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    return elapsed, max(stalls) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+
+    products = make_products(args.products, args.seed)
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.sync(products)
+    build_seconds = time.perf_counter() - started
+    index.search("isinma")  # sıralı kelime listesini hazırla
+
+    # Artımlı güncelleme: ürünlerin %1'i değişmiş gibi tekrar sync
+    for product in products[:: 100]:
+        product["name"] += " Yeni"
+    started = time.perf_counter()
+    index.sync(products)
+    resync_seconds = time.perf_counter() - started
+
+    # Sunucudaki yol: katalog dinleyicisi schedule_sync, iş thread'de ve parça parça
+    background = SearchIndex()
+    bg_build_seconds, bg_build_stall = asyncio.run(background_sync(background, products))
+    for product in products[:: 100]:
+        product["name"] += " Yeni"
+    bg_resync_seconds, bg_resync_stall = asyncio.run(background_sync(background, products))
+
+    latencies = []
+    per_query = {}
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            hits = index.search(query, limit=50)
+            elapsed = (time.perf_counter() - t0) * 1000
+            latencies.append(elapsed)
+            per_query.setdefault(query, (len(hits), []))[1].append(elapsed)
+
+    result = {
+        "products": args.products,
+        "build_seconds": round(build_seconds, 2),
+        "resync_seconds": round(resync_seconds, 3),
+        "background_build_seconds": round(bg_build_seconds, 2),
+        "background_build_max_stall_ms": round(bg_build_stall, 1),
+        "background_resync_seconds": round(bg_resync_seconds, 3),
+        "background_resync_max_stall_ms": round(bg_resync_stall, 1),
+        "queries": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+    print(f"{args.products} ürün: kurulum {result['build_seconds']} sn, %1 değişiklikle sync {result['resync_seconds']} sn")
+    print(f"Arka planda: kurulum {result['background_build_seconds']} sn (döngü en fazla "
+          f"{result['background_build_max_stall_ms']} ms bekledi), sync {result['background_resync_seconds']} sn "
+          f"(en fazla {result['background_resync_max_stall_ms']} ms)")
+    for query, (hits, values) in per_query.items():
+        print(f"  {query!r:22} {hits:>3} sonuç  p50={percentile(values, 50):.2f} ms")
+    print(f"Sorgu gecikmesi: p50={result['p50_ms']} ms  p95={result['p95_ms']} ms  p99={result['p99_ms']} ms")
+    write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Ürün listesi serileştirme karşılaştırması: eski yol (serialize_doc + Product(**)
++ response_model doğrulaması + json) ile hızlı yol (belgeden doğrudan orjson)
+100, 1k ve 10k ürün için saniyedeki istek sayısını ölçer.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import Response
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from _common import write_json
+from serialization import dumps, pick
+
+
+class Product(BaseModel):
+    id: str
+    name: str
+    category_id: str
+    category_name: Optional[str] = None
+    price: float
+    unit_type: str
+    stock: float
+    image: Optional[str] = None
+    description: Optional[str] = None
+
+
+PRODUCT_FIELDS = tuple(Product.model_fields)
+
+
+def make_docs(count):
+    category_id = str(ObjectId())
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Ürün {i}",
+            "category_id": category_id,
+            "price": 10.0 + i % 50,
+            "unit_type": "KG",
+            "stock": 100,
+            "description": "Taze yerli ürün, günlük toplanmış",
+            "image": f"/static/urun{i}.jpeg",
+        }
+        for i in range(count)
+    ]
+
+
+def serialize_doc(doc):
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def build_app(docs):
+    app = FastAPI()
+
+    @app.get("/old", response_model=List[Product])
+    async def old_path():
+        return [Product(**serialize_doc(d)) for d in docs]
+
+    @app.get("/fast", response_model=List[Product])
+    async def fast_path():
+        return Response(content=dumps([pick(d, PRODUCT_FIELDS) for d in docs]), media_type="application/json")
+
+    cached = dumps([pick(d, PRODUCT_FIELDS) for d in docs])
+
+    @app.get("/cached", response_model=List[Product])
+    async def cached_path():
+        return Response(content=cached, media_type="application/json")
+
+    return app
+
+
+async def measure(client, path, seconds):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = await client.get(path)
+        response.raise_for_status()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        app = build_app(make_docs(size))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            row = {"products": size}
+            for path in ("old", "fast", "cached"):
+                row[path] = round(await measure(client, f"/{path}", args.seconds), 1)
+        results.append(row)
+        print(f"{size:>6} ürün  eski={row['old']:>8} istek/sn  hızlı={row['fast']:>8}  "
+              f"önbellekli={row['cached']:>8}  (x{row['fast'] / row['old']:.1f} / x{row['cached'] / row['old']:.1f})")
+    write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
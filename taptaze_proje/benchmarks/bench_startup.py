@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Soğuk açılış testi: temiz bir Python sürecinde `import server` süresini ve
+uvicorn'un başlatılmasından ilk başarılı yanıta kadar geçen süreyi
+(time-to-first-response) ölçer.
+
+    python bench_startup.py --runs 5 --import-budget-ms 600 --json acilis.json
+
+Import süresi bütçeyi aşarsa çıkış kodu 1 olur; CI'da gerilemeyi yakalamak için.
+BENCH_MONGO_URL verilirse sunucu gerçek Mongo'ya, yoksa mongomock-motor'a bağlanır.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from _common import BACKEND_DIR, write_json
+
+IMPORT_PROBE = "import time; t = time.perf_counter(); import server; print((time.perf_counter() - t) * 1000)"
+MONGOMOCK_PATCH = (
+    "import motor.motor_asyncio, mongomock_motor; "
+    "motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient; "
+)
+
+
+def server_env():
+    env = dict(os.environ)
+    env.setdefault("MAIL_TRANSPORT", "fake")
+    env.setdefault("JWT_SECRET", "bench-" + "x" * 32)
+    if os.environ.get("BENCH_MONGO_URL"):
+        env["MONGO_URL"] = os.environ["BENCH_MONGO_URL"]
+    else:
+        env["MONGO_URL"] = "mongodb://mongomock"
+    return env
+
+
+def measure_import():
+    # MONGO_URL olmadan da import edilebilmeli
+    env = {k: v for k, v in os.environ.items() if k != "MONGO_URL"}
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _importtime(code):
+    env = {k: v for k, v in os.environ.items() if k != "MONGO_URL"}
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        # "import time: self | cumulative | <2 boşluk>modül" -> sadece server'ın doğrudan import'ları
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].startswith("   ") and not parts[2].startswith("    "):
+            rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return rows
+
+
+def top_imports(limit):
+    # Yorumlayıcının kendi açılışında (site, .pth) yüklenenler sayılmaz
+    baseline = {name for _, name in _importtime("pass")}
+    rows = [row for row in _importtime("import server") if row[1] not in baseline]
+    return sorted(rows, reverse=True)[:limit]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_response(timeout):
+    port = free_port()
+    launcher = "" if os.environ.get("BENCH_MONGO_URL") else MONGOMOCK_PATCH
+    launcher += f"import uvicorn; uvicorn.run('server:app', host='127.0.0.1', port={port}, log_level='warning')"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", launcher], cwd=BACKEND_DIR, env=server_env(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            deadline = started + timeout
+            for name, path in (("categories", "/api/categories"), ("products", "/api/products")):
+                while True:
+                    if time.perf_counter() > deadline or process.poll() is not None:
+                        raise SystemExit("Sunucu açılmadı ya da zaman aşımı.")
+                    try:
+                        if client.get(path).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.005)
+                result[f"first_{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            # Isınmış sunucuda aynı istek, karşılaştırma için
+            t0 = time.perf_counter()
+            client.get("/api/products")
+            result["warm_products_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="Ortanca import süresi bunu aşarsa çıkış kodu 1")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    responses = [measure_first_response(args.timeout) for _ in range(args.runs)]
+
+    result = {
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(imports), 1),
+        "import_ms_min": round(min(imports), 1),
+        "first_categories_ms_median": statistics.median(r["first_categories_ms"] for r in responses),
+        "first_products_ms_median": statistics.median(r["first_products_ms"] for r in responses),
+        "warm_products_ms_median": statistics.median(r["warm_products_ms"] for r in responses),
+        "top_imports_ms": {name: round(ms, 1) for ms, name in top_imports(8)},
+    }
+    print(f"import server: ortanca {result['import_ms_median']} ms (en iyi {result['import_ms_min']} ms)")
+    for name, ms in result["top_imports_ms"].items():
+        print(f"  {name:28} {ms:>7} ms")
+    print(f"İlk yanıt (süreç başlangıcından): /api/categories {result['first_categories_ms_median']} ms, "
+          f"/api/products {result['first_products_ms_median']} ms; ısınmış /api/products "
+          f"{result['warm_products_ms_median']} ms")
+    write_json(args.json, result)
+
+    if args.import_budget_ms is not None and result["import_ms_median"] > args.import_budget_ms:
+        print(f"Import bütçesi aşıldı: {result['import_ms_median']} ms > {args.import_budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
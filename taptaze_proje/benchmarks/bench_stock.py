@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Stok rezervasyonu eşzamanlılık testi: birkaç ürüne aynı anda binlerce sipariş
+gönderir, saniyedeki sipariş sayısını ve fazla satış (oversell) miktarını raporlar.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from _common import make_mongo_client, write_json
+from stock_reservation import OutOfStock, StockReservation
+
+
+async def run(db, orders, skus, stock, max_qty, coalesce, seed):
+    await db.products.delete_many({})
+    result = await db.products.insert_many(
+        [{"name": f"Ürün {i}", "stock": stock} for i in range(skus)]
+    )
+    product_ids = [str(oid) for oid in result.inserted_ids]
+    engine = StockReservation(db.products, coalesce=coalesce)
+    rng = random.Random(seed)
+
+    sold = {pid: 0 for pid in product_ids}
+    accepted = rejected = 0
+
+    async def place_order():
+        nonlocal accepted, rejected
+        lines = [(pid, rng.randint(1, max_qty)) for pid in rng.sample(product_ids, rng.randint(1, skus))]
+        try:
+            reserved = await engine.reserve(lines)
+        except OutOfStock:
+            rejected += 1
+            return
+        accepted += 1
+        for pid, quantity in reserved.items():
+            sold[pid] += quantity
+
+    started = time.perf_counter()
+    await asyncio.gather(*[place_order() for _ in range(orders)])
+    elapsed = time.perf_counter() - started
+
+    remaining = {str(d["_id"]): d["stock"] for d in await db.products.find().to_list(None)}
+    oversell = sum(max(sold[pid] - stock, 0) for pid in product_ids)
+    mismatched = sum(1 for pid in product_ids if remaining[pid] + sold[pid] != stock)
+    return {
+        "coalesce": coalesce,
+        "orders": orders,
+        "accepted": accepted,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "orders_per_second": round(orders / elapsed, 1),
+        "update_batches": engine.batches,
+        "oversell": oversell,
+        "stock_mismatches": mismatched,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--skus", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--max-qty", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    args = parser.parse_args()
+
+    db = make_mongo_client()["TaptazeBench"]
+    results = []
+    for coalesce in (False, True):
+        r = await run(db, args.orders, args.skus, args.stock, args.max_qty, coalesce, args.seed)
+        results.append(r)
+        print(f"birleştirme={'açık' if coalesce else 'kapalı':6} "
+              f"{r['orders_per_second']:>9} sipariş/sn  kabul={r['accepted']} red={r['rejected']} "
+              f"güncelleme={r['update_batches']} oversell={r['oversell']} tutarsız={r['stock_mismatches']}")
+    write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
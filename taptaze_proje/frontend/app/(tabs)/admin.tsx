@@ -60,7 +60,7 @@ export default function AdminScreen() {
       setIsLoggedIn(true);
       loadData();
     } catch (error) {
-      Alert.alert('Hata', 'Giriş başarısız. Kullanıcı adı veya şifre yanlış.');
+      Alert.alert('Hata', 'Giriş başarısız. E-posta veya şifre yanlış.');
     } finally {
       setLoading(false);
     }
@@ -148,7 +148,7 @@ export default function AdminScreen() {
           <Text style={styles.loginTitle}>Yönetici Paneli</Text>
           <View style={styles.inputContainer}>
             <Ionicons name="person-outline" size={20} color="#666" style={styles.inputIcon} />
-            <TextInput style={styles.loginInput} placeholder="Kullanıcı Adı" value={username} onChangeText={setUsername} autoCapitalize="none" />
+            <TextInput style={styles.loginInput} placeholder="E-posta" value={username} onChangeText={setUsername} autoCapitalize="none" keyboardType="email-address" />
           </View>
           <View style={styles.inputContainer}>
             <Ionicons name="lock-closed-outline" size={20} color="#666" style={styles.inputIcon} />
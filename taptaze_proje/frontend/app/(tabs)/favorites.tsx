@@ -32,9 +32,11 @@ export default function FavoritesScreen() {
         return;
       }
 
-      const allProducts = await productService.getAll();
-      const favProducts = allProducts.filter((p: Product) => savedIds.includes(p.id));
-      setFavorites(favProducts);
+      // Tüm katalog yerine sadece favoriler; silinmiş ürünler atlanır
+      const favProducts = await Promise.all(
+        savedIds.map((id: string) => productService.getById(id).catch(() => null))
+      );
+      setFavorites(favProducts.filter((p): p is Product => p !== null));
     } catch (e) {
       console.error(e);
     } finally {
@@ -18,6 +18,8 @@ export default function HomeScreen() {
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState('');
   const [refreshing, setRefreshing] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // --- FAVORİ STATE'İ (YENİ EKLENDİ) ---
   const [favoriteIds, setFavoriteIds] = useState<string[]>([]);
@@ -32,11 +34,12 @@ export default function HomeScreen() {
 
   const fetchData = async () => {
     try {
-      const [prodData, catData] = await Promise.all([
-        productService.getAll(undefined, search),
+      const [page, catData] = await Promise.all([
+        productService.getPage({ search }),
         categoryService.getAll()
       ]);
-      setProducts(prodData);
+      setProducts(page.items);
+      setNextCursor(page.nextCursor);
       setCategories(catData);
     } catch (error) {
       console.error('Veri hatası:', error);
@@ -46,6 +49,21 @@ export default function HomeScreen() {
     }
   };
 
+  // Liste sonuna gelindikçe sonraki sayfa
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await productService.getPage({ cursor: nextCursor });
+      setProducts(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Veri hatası:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // --- FAVORİ YÜKLEME VE KAYDETME FONKSİYONLARI (YENİ) ---
   const loadFavorites = async () => {
     try {
@@ -208,6 +226,9 @@ export default function HomeScreen() {
             </View>
           )}
           contentContainerStyle={styles.listContent}
+          onEndReached={loadMore}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={loadingMore ? <ActivityIndicator color="#4CAF50" /> : null}
           refreshControl={
             <RefreshControl refreshing={refreshing} onRefresh={onRefresh} colors={['#4CAF50']} />
           }
@@ -20,6 +20,8 @@ export default function CategoryProductsScreen() {
   const [products, setProducts] = useState<Product[]>([]);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { addItem } = useCart(); // addToCart yerine addItem kullanıyoruz (Context'e göre)
 
   useEffect(() => {
@@ -28,8 +30,9 @@ export default function CategoryProductsScreen() {
 
   const loadProducts = async () => {
     try {
-      const data = await productService.getAll(id as string);
-      setProducts(data);
+      const page = await productService.getPage({ categoryId: id as string });
+      setProducts(page.items);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Ürünler yüklenemedi:', error);
     } finally {
@@ -38,6 +41,20 @@ export default function CategoryProductsScreen() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await productService.getPage({ categoryId: id as string, cursor: nextCursor });
+      setProducts(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Ürünler yüklenemedi:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRefresh = () => {
     setRefreshing(true);
     loadProducts();
@@ -102,6 +119,9 @@ export default function CategoryProductsScreen() {
         numColumns={2}
         columnWrapperStyle={styles.productRow}
         contentContainerStyle={styles.productList}
+        onEndReached={loadMore}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={loadingMore ? <ActivityIndicator color="#4CAF50" /> : null}
         refreshControl={
           <RefreshControl refreshing={refreshing} onRefresh={handleRefresh} colors={['#4CAF50']} />
         }
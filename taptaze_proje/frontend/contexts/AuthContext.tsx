@@ -1,6 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import { adminService } from '../services/api';
+import { adminService, restoreTokens } from '../services/api';
 
 interface AuthContextType {
   isAdminLoggedIn: boolean;
@@ -24,7 +24,8 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
   const checkAdminStatus = async () => {
     try {
       const adminData = await AsyncStorage.getItem(ADMIN_STORAGE_KEY);
-      if (adminData) {
+      // Token yoksa (eski sürümden kalan kayıt) tekrar giriş istenir
+      if (adminData && await restoreTokens()) {
         const { username } = JSON.parse(adminData);
         setIsAdminLoggedIn(true);
         setAdminUsername(username);
@@ -55,6 +56,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
   const logout = async () => {
     try {
+      await adminService.logout();
       await AsyncStorage.removeItem(ADMIN_STORAGE_KEY);
       setIsAdminLoggedIn(false);
       setAdminUsername(null);
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import AsyncStorage from '@react-native-async-storage/async-storage';
 import Constants from 'expo-constants';
 
 const API_URL = "https://taptaze-backend.onrender.com";
@@ -11,6 +12,50 @@ const api = axios.create({
   },
 });
 
+// Oturum tokenları: sipariş listesi ve /admin uçları Authorization başlığı ister.
+// Erişim tokenı kısa ömürlü; 401 gelirse yenileme tokenıyla bir kez yenilenir.
+const TOKEN_STORAGE_KEY = '@taptaze_tokens';
+type Tokens = { access_token: string; refresh_token: string };
+let tokens: Tokens | null = null;
+
+export const setTokens = async (value: Tokens | null) => {
+  tokens = value ? { access_token: value.access_token, refresh_token: value.refresh_token } : null;
+  if (tokens) {
+    await AsyncStorage.setItem(TOKEN_STORAGE_KEY, JSON.stringify(tokens));
+  } else {
+    await AsyncStorage.removeItem(TOKEN_STORAGE_KEY);
+  }
+};
+
+export const restoreTokens = async () => {
+  const stored = await AsyncStorage.getItem(TOKEN_STORAGE_KEY);
+  tokens = stored ? JSON.parse(stored) : null;
+  return tokens !== null;
+};
+
+api.interceptors.request.use((config) => {
+  if (tokens) {
+    config.headers.Authorization = `Bearer ${tokens.access_token}`;
+  }
+  return config;
+});
+
+api.interceptors.response.use(undefined, async (error: any) => {
+  const config = error.config;
+  if (error.response?.status !== 401 || !tokens || !config || config._retried || config.url === '/token/refresh') {
+    throw error;
+  }
+  config._retried = true;
+  try {
+    const response = await api.post('/token/refresh', { refresh_token: tokens.refresh_token });
+    await setTokens(response.data);
+  } catch (refreshError) {
+    await setTokens(null);
+    throw error;
+  }
+  return api(config);
+});
+
 // Kategori servisleri
 export const categoryService = {
   getAll: async () => {
@@ -20,13 +65,34 @@ export const categoryService = {
 };
 
 // Ürün servisleri
+// Liste ekranları sayfa sayfa ve sadece kartta gösterilen alanlarla okur;
+// açıklama ve görsel varyantları ürün detayında gelir
+export const PRODUCT_PAGE_SIZE = 50;
+const LIST_FIELDS = 'id,name,category_id,category_name,price,unit_type,stock,image,crate_size,crate_price';
+
+type ProductPageOptions = { categoryId?: string; search?: string; cursor?: string | null; limit?: number };
+
+const getProductPage = async ({ categoryId, search, cursor, limit = PRODUCT_PAGE_SIZE }: ProductPageOptions = {}) => {
+  const params = new URLSearchParams({ limit: String(limit), fields: LIST_FIELDS });
+  if (categoryId) params.append('category_id', categoryId);
+  if (search) params.append('search', search);
+  if (cursor) params.append('cursor', cursor);
+  const response = await api.get(`/products?${params.toString()}`);
+  return { items: response.data as any[], nextCursor: (response.headers['x-next-cursor'] as string) || null };
+};
+
 export const productService = {
-  getAll: async (categoryId?: string, search?: string) => {
-    const params = new URLSearchParams();
-    if (categoryId) params.append('category_id', categoryId);
-    if (search) params.append('search', search);
-    const response = await api.get(`/products?${params.toString()}`);
-    return response.data;
+  getPage: getProductPage,
+  // Yönetici paneli tüm kataloğu ister: sunucunun izin verdiği en büyük sayfalarla dolaşılır
+  getAll: async (categoryId?: string) => {
+    const items: any[] = [];
+    let cursor: string | null = null;
+    do {
+      const page = await getProductPage({ categoryId, cursor, limit: 200 });
+      items.push(...page.items);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return items;
   },
   getById: async (id: string) => {
     const response = await api.get(`/products/${id}`);
@@ -56,9 +122,16 @@ export const orderService = {
 
 // Admin servisleri
 export const adminService = {
-  login: async (username: string, password: string) => {
-    const response = await api.post('/admin/login', { username, password });
-    return response.data;
+  login: async (email: string, password: string) => {
+    const response = await api.post('/login', { email, password });
+    await setTokens(response.data);
+    return { ...response.data, success: true, username: response.data.user?.name };
+  },
+  logout: async () => {
+    if (tokens) {
+      await api.post('/logout', { refresh_token: tokens.refresh_token }).catch(() => undefined);
+    }
+    await setTokens(null);
   },
   createProduct: async (productData: any) => {
     const response = await api.post('/admin/products', productData);
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# backend/ modülleri birbirini düz isimle içe aktarıyor (from serialization import dumps)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
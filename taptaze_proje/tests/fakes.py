@@ -0,0 +1,138 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import DuplicateKeyError
+
+
+def _matches(doc: dict, filter_: dict) -> bool:
+    for field, condition in filter_.items():
+        if field == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            for op, operand in condition.items():
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$gte" and not (value is not None and value >= operand):
+                    return False
+                if op == "$lt" and not (value is not None and value < operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k == "_id" or k in projection}
+
+
+class FakeCursor:
+    def __init__(self, collection, docs):
+        self.collection = collection
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.collection._io()
+        for doc in self.docs:
+            yield doc
+
+    def sort(self, key, direction=1):
+        self.docs.sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        await self.collection._io()
+        return self.docs if length is None else self.docs[:length]
+
+
+# Motor koleksiyonunun testlerde kullanılan kısmı. Her çağrı önce loop'a döner;
+# böylece eşzamanlı istekler gerçek sürücüdeki gibi araya girer (mongomock girmez).
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: copy.deepcopy(doc) for doc in docs}
+        self.calls = 0
+
+    async def _io(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+
+    def find(self, filter_=None, projection=None):
+        docs = [_project(d, projection) for d in self.docs.values() if _matches(d, filter_ or {})]
+        return FakeCursor(self, docs)
+
+    async def find_one(self, filter_):
+        await self._io()
+        return next((copy.deepcopy(d) for d in self.docs.values() if _matches(d, filter_)), None)
+
+    async def insert_one(self, doc):
+        await self._io()
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.docs[doc["_id"]] = copy.deepcopy(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, filter_, update):
+        await self._io()
+        doc = next((d for d in self.docs.values() if _matches(d, filter_)), None)
+        if doc is None:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        for field, delta in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + delta
+        doc.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    async def find_one_and_update(self, filter_, update, upsert=False, return_document=None):
+        # Sadece güncellenmiş belgeyi döner (ReturnDocument.AFTER)
+        result = await self.update_one(filter_, update)
+        if not result.matched_count:
+            if not upsert:
+                return None
+            doc = {k: v for k, v in filter_.items() if not isinstance(v, dict)}
+            self.docs[doc["_id"]] = doc
+            await self.update_one({"_id": doc["_id"]}, update)
+        return await self.find_one(filter_)
+
+    async def bulk_write(self, operations, ordered=True):
+        # InsertOne / UpdateOne (upsert dahil); pymongo işlemlerin içini _filter/_doc'ta tutuyor
+        await self._io()
+        result = {"nInserted": 0, "nMatched": 0, "nModified": 0, "upserted": [], "writeErrors": []}
+        for index, operation in enumerate(operations):
+            if isinstance(operation, InsertOne):
+                self.docs[operation._doc["_id"]] = copy.deepcopy(operation._doc)
+                result["nInserted"] += 1
+                continue
+            doc = next((d for d in self.docs.values() if _matches(d, operation._filter)), None)
+            update = operation._doc
+            if doc is None:
+                if not operation._upsert:
+                    continue
+                doc = {k: v for k, v in operation._filter.items() if not isinstance(v, dict)}
+                doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+                doc.setdefault("_id", ObjectId())
+                self.docs[doc["_id"]] = doc
+                result["upserted"].append({"index": index, "_id": doc["_id"]})
+            else:
+                result["nMatched"] += 1
+                result["nModified"] += 1
+            for field, delta in update.get("$inc", {}).items():
+                doc[field] = doc.get(field, 0) + delta
+            doc.update(copy.deepcopy(update.get("$set", {})))
+        return SimpleNamespace(bulk_api_result=result, matched_count=result["nMatched"])
+
+    async def delete_one(self, filter_):
+        await self._io()
+        doc = next((d for d in self.docs.values() if _matches(d, filter_)), None)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
@@ -0,0 +1,162 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+import catalog_cache
+from catalog_cache import VERSION_ID, CatalogCache
+from serialization import dumps
+from tests.fakes import FakeCollection
+
+TOMATO = ObjectId()
+APPLE = ObjectId()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(catalog_cache, "time", clock)
+    return clock
+
+
+def serialize(doc):
+    return {"id": str(doc["_id"]), **{k: v for k, v in doc.items() if k != "_id"}}
+
+
+def make_cache(versions=None, ttl_seconds=60.0):
+    db = SimpleNamespace(
+        products=FakeCollection([
+            {"_id": TOMATO, "name": "Domates", "category_id": "sebze", "stock": 10},
+            {"_id": APPLE, "name": "Elma", "category_id": "meyve", "stock": 5},
+        ]),
+        categories=FakeCollection([{"_id": ObjectId(), "name": "Sebzeler"}]),
+    )
+    return db, CatalogCache(db, serialize, serialize, dumps, ttl_seconds=ttl_seconds, versions=versions)
+
+
+def names(products):
+    return sorted(p["name"] for p in products)
+
+
+def test_concurrent_readers_share_one_load(clock):
+    db, cache = make_cache()
+
+    async def main():
+        return await asyncio.gather(*[cache.get_products() for _ in range(10)])
+
+    results = asyncio.run(main())
+    assert all(names(r) == ["Domates", "Elma"] for r in results)
+    assert db.products.calls == 1   # tek yükleme
+
+
+def test_ttl_reloads_and_category_index(clock):
+    db, cache = make_cache()
+    assert [p["name"] for p in asyncio.run(cache.get_products("sebze"))] == ["Domates"]
+
+    db.products.docs[TOMATO]["name"] = "Salkım Domates"
+    clock.now += 30
+    assert names(asyncio.run(cache.get_products())) == ["Domates", "Elma"]
+    clock.now += 31
+    assert names(asyncio.run(cache.get_products())) == ["Elma", "Salkım Domates"]
+
+
+def test_json_payload_is_cached_until_stock_changes(clock):
+    _, cache = make_cache()
+    first = asyncio.run(cache.get_products_json())
+    assert asyncio.run(cache.get_products_json()) is first
+
+    cache.adjust_stock(str(TOMATO), -3)
+    second = asyncio.run(cache.get_products_json())
+    assert second.etag != first.etag
+    assert asyncio.run(cache.get_products_by_ids([str(TOMATO)]))[0]["stock"] == 7
+
+
+def test_stock_only_change_is_applied_in_place(clock):
+    db, cache = make_cache()
+    cache.change_stream_opened()
+    asyncio.run(cache.get_products())
+    loads = db.products.calls
+
+    cache.apply_change({"operationType": "update", "ns": {"coll": "products"}, "documentKey": {"_id": TOMATO},
+                        "updateDescription": {"updatedFields": {"stock": 2}}})
+    assert asyncio.run(cache.get_products_by_ids([str(TOMATO)]))[0]["stock"] == 2
+    assert db.products.calls == loads
+
+    cache.apply_change({"operationType": "update", "ns": {"coll": "products"}, "documentKey": {"_id": TOMATO},
+                        "updateDescription": {"updatedFields": {"name": "Pembe Domates"}}})
+    asyncio.run(cache.get_products())
+    assert db.products.calls > loads
+
+
+def test_version_bump_invalidates_other_workers(clock):
+    versions = FakeCollection()
+    db, cache = make_cache(versions=versions)
+
+    async def main():
+        await cache._sync()
+        await cache.get_products()
+        db.products.docs[APPLE]["name"] = "Amasya Elması"
+        # Başka bir worker (veya temiz_veri.py) sayacı artırdı
+        await versions.find_one_and_update({"_id": VERSION_ID}, {"$inc": {"catalog": 1}}, upsert=True)
+        await cache._sync()
+        return await cache.get_products()
+
+    assert names(asyncio.run(main())) == ["Amasya Elması", "Domates"]
+
+
+def test_ttl_still_bounds_staleness_in_sync_mode(clock):
+    db, cache = make_cache(versions=FakeCollection())
+
+    async def main():
+        await cache._sync()
+        await cache.get_products()
+        # Sayacı artırmayan yazma: elle Atlas düzenlemesi
+        db.products.docs[APPLE]["name"] = "Amasya Elması"
+        await cache._sync()
+        before = await cache.get_products()
+        clock.now += 61
+        await cache._sync()
+        return before, await cache.get_products()
+
+    before, after = asyncio.run(main())
+    assert cache.sync_active
+    assert names(before) == ["Domates", "Elma"]
+    assert names(after) == ["Amasya Elması", "Domates"]
+
+
+def test_local_stock_adjust_is_skipped_when_the_stream_sends_absolute_values(clock):
+    _, cache = make_cache()
+    cache.change_stream_opened()
+    asyncio.run(cache.get_products())
+
+    # Rezervasyon Mongo'da 10 -> 7 yaptı, stream olayı sipariş yolundan önce geldi
+    cache.apply_change({"operationType": "update", "ns": {"coll": "products"}, "documentKey": {"_id": TOMATO},
+                        "updateDescription": {"updatedFields": {"stock": 7}}})
+    expected = cache.adjust_stock(str(TOMATO), -3)
+    assert expected["stock"] == 4   # sadece olay için; önbellek değişmez
+    assert asyncio.run(cache.get_products_by_ids([str(TOMATO)]))[0]["stock"] == 7
+
+
+def test_own_stock_changes_are_read_back_in_sync_mode(clock):
+    db, cache = make_cache(versions=FakeCollection())
+
+    async def main():
+        await cache._sync()
+        await cache.get_products()
+        db.products.docs[TOMATO]["stock"] = 7
+        cache.adjust_stock(str(TOMATO), -3)
+        cache.publish(stock_only=True)
+        before = (await cache.get_products_by_ids([str(TOMATO)]))[0]["stock"]
+        await cache._sync()
+        return before, (await cache.get_products_by_ids([str(TOMATO)]))[0]["stock"]
+
+    assert asyncio.run(main()) == (10, 7)
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from pymongo import UpdateOne
+
+from temiz_veri import CatalogImporter
+
+
+# temiz_veri.py senkron pymongo kullanıyor; sadece yazılan işlemler kaydedilir
+class Products:
+    def __init__(self, skus=()):
+        self.skus = set(skus)
+        self.operations = []
+
+    def find(self, filter_, projection=None):
+        return [{"sku": sku} for sku in filter_["sku"]["$in"] if sku in self.skus]
+
+    def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+        return SimpleNamespace(bulk_api_result={"nUpserted": 0, "nModified": 0})
+
+
+def run(rows, existing=()):
+    products = Products(existing)
+    importer = CatalogImporter(SimpleNamespace(products=products))
+    importer.write_batch(rows)
+    return importer, products.operations
+
+
+def row(sku, **fields):
+    return {"sku": sku, "name": sku.title(), "category_id": "meyve", **fields}
+
+
+def test_complete_rows_are_upserted_without_overwriting_stock():
+    importer, operations = run([row("ayva", price="40", unit_type="KG", stock="12")])
+    assert importer.errors == 0
+    assert operations == [UpdateOne(
+        {"sku": "ayva"},
+        {"$set": {"sku": "ayva", "name": "Ayva", "category_id": "meyve", "price": 40.0, "unit_type": "KG"},
+         "$setOnInsert": {"stock": 12.0}},
+        upsert=True,
+    )]
+
+
+def test_incomplete_new_product_is_skipped():
+    importer, operations = run([row("ayva"), row("nar", price="30")])
+    assert operations == []
+    assert importer.errors == 2
+
+
+def test_incomplete_row_only_updates_an_existing_product():
+    importer, operations = run([row("elma", price="33")], existing={"elma"})
+    assert importer.errors == 0
+    assert operations == [UpdateOne(
+        {"sku": "elma"}, {"$set": {"sku": "elma", "name": "Elma", "category_id": "meyve", "price": 33.0}},
+        upsert=False,
+    )]
+
+
+def test_unparseable_rows_are_reported():
+    importer, operations = run([row("kivi", price="bedava", unit_type="KG"), {"price": "10"}])
+    assert operations == []
+    assert importer.errors == 2
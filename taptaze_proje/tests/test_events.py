@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from events import HEARTBEAT, SLOW_CONSUMER, EventHub, TooManySubscribers
+
+
+def drain(stream, count):
+    async def main():
+        return [await stream.__anext__() for _ in range(count)]
+    return asyncio.run(main())
+
+
+def pending(hub):
+    return {s.user_id: s.queue.qsize() for s in hub._subscribers}
+
+
+def test_subscriber_limit():
+    hub = EventHub(max_subscribers=2)
+    streams = [hub.subscribe({"stock"}, None, False) for _ in range(2)]
+    with pytest.raises(TooManySubscribers):
+        hub.subscribe({"stock"}, None, False)
+    del streams
+    # Hiç okunmamış akış çöpe gidince kaydı da silinir
+    hub.subscribe({"stock"}, None, False)
+
+
+def test_order_events_reach_only_owner_and_admin():
+    hub = EventHub()
+    streams = [
+        hub.subscribe({"orders"}, "ayse", False),
+        hub.subscribe({"orders"}, "mehmet", False),
+        hub.subscribe({"orders"}, "yonetici", True),
+        hub.subscribe({"stock"}, None, False),
+    ]
+    hub.order_created("o1", {"user_id": "ayse", "status": "pending", "total_amount": 40.0})
+    hub.order_status("o2", "delivered", owner=None)
+    assert pending(hub) == {"ayse": 1, "mehmet": 0, "yonetici": 2, None: 0}
+
+    event = drain(streams[0], 2)[1]
+    assert event.startswith(b"id: 1\nevent: order_created\n")
+    assert b'"id":"o1"' in event
+
+
+def test_low_stock_threshold():
+    hub = EventHub(low_stock_threshold=5)
+    _stream = hub.subscribe({"stock"}, None, False)
+    hub.stock_changed("p1", 12)
+    hub.stock_changed("p1", 4, name="Domates")
+    hub.stock_changed("p1", None)
+    assert pending(hub) == {None: 1}
+
+
+def test_slow_consumer_is_dropped():
+    hub = EventHub(buffer=2)
+    stream = hub.subscribe({"stock"}, None, False)
+    for stock in range(4):
+        hub.stock_changed("p1", stock)
+    assert hub.dropped == 1
+    assert drain(stream, 2) == [b"retry: 3000\n\n", SLOW_CONSUMER]
+    # Uyarıdan sonra akış kapanır ve abone silinir
+    with pytest.raises(StopAsyncIteration):
+        drain(stream, 1)
+    assert hub.stats()["subscribers"] == 0
+
+
+def test_heartbeat_when_idle():
+    hub = EventHub(heartbeat=0.01)
+    stream = hub.subscribe({"stock"}, None, False)
+    assert drain(stream, 2) == [b"retry: 3000\n\n", HEARTBEAT]
+
+
+def test_change_stream_events_are_routed_and_local_publish_is_skipped():
+    hub = EventHub()
+    _streams = [hub.subscribe({"orders", "stock"}, "ayse", False), hub.subscribe({"orders"}, "mehmet", False)]
+    hub.change_stream_opened()
+    # Change stream açıkken yazma yolundaki publish tekrar olay üretmez
+    hub.order_created("o1", {"user_id": "ayse"})
+    assert pending(hub) == {"ayse": 0, "mehmet": 0}
+
+    order_id, product_id = ObjectId(), ObjectId()
+    hub.apply_change({"operationType": "insert", "ns": {"coll": "orders"}, "documentKey": {"_id": order_id},
+                      "fullDocument": {"user_id": "ayse", "status": "pending"}})
+    hub.apply_change({"operationType": "update", "ns": {"coll": "orders"}, "documentKey": {"_id": order_id},
+                      "fullDocument": {"user_id": "mehmet"}, "updateDescription": {"updatedFields": {"status": "delivered"}}})
+    hub.apply_change({"operationType": "update", "ns": {"coll": "products"}, "documentKey": {"_id": product_id},
+                      "fullDocument": {"name": "Domates"}, "updateDescription": {"updatedFields": {"stock": 3}}})
+    hub.apply_change({"operationType": "update", "ns": {"coll": "products"}, "documentKey": {"_id": product_id},
+                      "updateDescription": {"updatedFields": {"stock": 50}}})
+    assert pending(hub) == {"ayse": 2, "mehmet": 1}
@@ -0,0 +1,112 @@
+import asyncio
+
+import orjson
+import pytest
+
+from idempotency import IdempotencyConflict, IdempotencyStore, InvalidIdempotencyKey
+from tests.fakes import FakeCollection
+
+
+class Handler:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("işlem başarısız")
+        return {"id": f"sipariş-{self.calls}"}
+
+
+def test_replay_returns_stored_response():
+    store = IdempotencyStore(FakeCollection())
+    handler = Handler()
+
+    async def main():
+        first = await store.run("orders", "k1", {"total": 10}, handler)
+        second = await store.run("orders", "k1", {"total": 10}, handler)
+        return first, second
+
+    (first, first_replayed), (second, second_replayed) = asyncio.run(main())
+    assert handler.calls == 1
+    assert (first_replayed, second_replayed) == (False, True)
+    assert orjson.loads(second.body) == {"id": "sipariş-1"}
+    assert second.body == first.body
+
+
+def test_concurrent_duplicates_are_coalesced():
+    store = IdempotencyStore(FakeCollection())
+    handler = Handler(delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*[store.run("orders", "k1", {"total": 10}, handler) for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert handler.calls == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True, True]
+    assert store.stats()["coalesced"] == 4
+    assert store.stats()["in_flight"] == 0
+
+
+def test_other_process_replays_from_the_collection():
+    collection = FakeCollection()
+    handler = Handler()
+
+    async def main():
+        await IdempotencyStore(collection).run("orders", "k1", {"total": 10}, handler)
+        # Ayrı worker: ön belleği boş, yanıtı koleksiyondan okur
+        return await IdempotencyStore(collection).run("orders", "k1", {"total": 10}, handler)
+
+    stored, replayed = asyncio.run(main())
+    assert handler.calls == 1
+    assert replayed
+    assert orjson.loads(stored.body) == {"id": "sipariş-1"}
+
+
+def test_payload_order_does_not_matter_but_content_does():
+    store = IdempotencyStore(FakeCollection())
+    handler = Handler()
+
+    async def main():
+        await store.run("orders", "k1", {"a": 1, "b": 2}, handler)
+        _, replayed = await store.run("orders", "k1", {"b": 2, "a": 1}, handler)
+        assert replayed
+        await store.run("orders", "k1", {"a": 1, "b": 3}, handler)
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(main())
+    assert handler.calls == 1
+
+
+def test_failed_request_is_not_stored():
+    collection = FakeCollection()
+    store = IdempotencyStore(collection)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.run("orders", "k1", {}, Handler(fail=True)))
+    assert collection.docs == {}
+
+    handler = Handler()
+    _, replayed = asyncio.run(store.run("orders", "k1", {}, handler))
+    assert handler.calls == 1 and not replayed
+
+
+def test_scopes_do_not_share_keys():
+    store = IdempotencyStore(FakeCollection())
+    handler = Handler()
+
+    async def main():
+        await store.run("orders", "k1", {}, handler)
+        await store.run("register", "k1", {}, handler)
+
+    asyncio.run(main())
+    assert handler.calls == 2
+
+
+@pytest.mark.parametrize("key", ["", "   ", "x" * 256])
+def test_invalid_keys(key):
+    with pytest.raises(InvalidIdempotencyKey):
+        asyncio.run(IdempotencyStore(FakeCollection()).run("orders", key, {}, Handler()))
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+from PIL import Image
+
+import image_variants
+from image_variants import ImageVariants, VariantNotFound
+from static_assets import FingerprintedStaticFiles
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def variants(tmp_path):
+    static = tmp_path / "static"
+    static.mkdir()
+    # Ortası saydam, kenarları kırmızı PNG
+    logo = Image.new("RGBA", (600, 600), (255, 0, 0, 255))
+    logo.paste((0, 0, 0, 0), (200, 200, 400, 400))
+    logo.save(static / "logo.png")
+    Image.new("RGB", (800, 600), (0, 128, 0)).save(static / "domates.jpeg")
+    variants = ImageVariants(FingerprintedStaticFiles(directory=static), tmp_path / "cache")
+    variants._formats = ["webp", "jpeg"]
+    return variants
+
+
+def url(variants, name, size, fmt):
+    return variants.variant_urls(f"/static/{name}")[size][fmt].rsplit("/", 1)[1]
+
+
+def test_variant_is_resized_and_cached(variants):
+    filename = url(variants, "domates.jpeg", "thumb", "webp")
+    path, media_type = asyncio.run(variants.get("thumb", filename))
+    assert media_type == "image/webp"
+    with Image.open(path) as image:
+        assert image.size == (160, 120)
+
+    asyncio.run(variants.get("thumb", filename))
+    assert (variants.hits, variants.misses) == (1, 1)
+
+
+def test_unknown_variants_are_rejected(variants):
+    with pytest.raises(VariantNotFound):
+        asyncio.run(variants.get("thumb", "domates.0000000000.webp"))
+    with pytest.raises(VariantNotFound):
+        asyncio.run(variants.get("huge", url(variants, "domates.jpeg", "thumb", "webp")))
+
+
+def test_png_transparency(variants):
+    path, _ = asyncio.run(variants.get("thumb", url(variants, "logo.png", "thumb", "webp")))
+    with Image.open(path) as image:
+        assert image.mode == "RGBA"
+        assert image.getpixel((80, 80))[3] == 0
+        assert image.getpixel((5, 5))[3] == 255
+
+    # JPEG'de saydam alan beyaz zemin olur
+    path, _ = asyncio.run(variants.get("thumb", url(variants, "logo.png", "thumb", "jpeg")))
+    with Image.open(path) as image:
+        assert image.mode == "RGB"
+        assert all(channel > 240 for channel in image.getpixel((80, 80)))
+
+
+def test_cancelled_requester_does_not_cancel_shared_render(variants, monkeypatch):
+    render = image_variants.render_variant
+
+    def slow_render(*args):
+        time.sleep(0.05)
+        render(*args)
+
+    monkeypatch.setattr(image_variants, "render_variant", slow_render)
+    filename = url(variants, "domates.jpeg", "card", "webp")
+
+    async def main():
+        first = asyncio.create_task(variants.get("card", filename))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(variants.get("card", filename))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    path, _ = asyncio.run(main())
+    assert path.exists()
+    assert variants.misses == 1
+    assert variants.stats()["files"] == 1
+
+
+def test_evicted_files_are_unlinked_after_a_delay(variants, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(image_variants, "time", clock)
+    variants.max_bytes = 1
+
+    first, _ = asyncio.run(variants.get("thumb", url(variants, "domates.jpeg", "thumb", "webp")))
+    asyncio.run(variants.get("card", url(variants, "domates.jpeg", "card", "webp")))
+    # Önbellekten düştü ama gönderimi süren istek için dosya henüz duruyor
+    assert variants.evictions == 1
+    assert first.exists()
+
+    clock.now += variants.unlink_delay + 1
+    asyncio.run(variants.get("detail", url(variants, "domates.jpeg", "detail", "webp")))
+    assert not first.exists()
+    assert variants.stats()["pending_unlink"] == 1
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from pagination import InvalidCursor, build_projection, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trip():
+    oid = ObjectId()
+    assert decode_cursor(encode_cursor("Domates", oid)) == ("Domates", oid)
+    created = datetime(2026, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created, oid)) == (created, oid)
+
+
+@pytest.mark.parametrize("cursor", ["", "bozuk", encode_cursor("x", ObjectId())[:-4]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter_continues_after_last_item():
+    oid = ObjectId()
+    assert keyset_filter("_id", None) == {}
+    assert keyset_filter("_id", encode_cursor(str(oid), oid)) == {"_id": {"$gt": oid}}
+    # Aynı fiyatlı ürünler _id ile ayrılır, sayfa sınırında kaybolmaz
+    assert keyset_filter("price", encode_cursor(25.0, oid), descending=True) == {"$or": [
+        {"price": {"$lt": 25.0}},
+        {"price": 25.0, "_id": {"$lt": oid}},
+    ]}
+
+
+def test_build_projection():
+    allowed = ("id", "name", "price")
+    assert build_projection(None, allowed) is None
+    assert build_projection(["id", "name"], allowed) == {"name": 1, "_id": 1}
+    with pytest.raises(ValueError):
+        build_projection(["name", "password"], allowed)
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from pricing import InvalidCart, OrderPricing
+from tests.fakes import FakeCollection
+
+TOMATO = ObjectId()
+MELON = ObjectId()
+EGG = ObjectId()
+
+
+def catalog():
+    return FakeCollection([
+        {"_id": TOMATO, "name": "Domates", "price": 25.9, "unit_type": "KG"},
+        # Kasa fiyatı tanımlı: 10 KG'lık kasa 45 TL (birimden 5 TL ucuz)
+        {"_id": MELON, "name": "Kavun", "price": 5.0, "unit_type": "KG", "crate_size": 10, "crate_price": 45.0},
+        {"_id": EGG, "name": "Yumurta", "price": 0.1, "unit_type": "ADET", "crate_size": 30},
+    ])
+
+
+def price(items, **kwargs):
+    pricing = OrderPricing(catalog(), **kwargs)
+    return pricing, asyncio.run(pricing.price(items))
+
+
+def line(product_id, quantity, unit_type=None):
+    return {"product_id": str(product_id), "quantity": quantity, "unit_type": unit_type}
+
+
+def test_unit_line_uses_catalog_price():
+    _, priced = price([{**line(TOMATO, 2.5, "KG"), "price": 0.01, "product_name": "Bedava"}])
+    assert priced["items"][0]["price"] == 25.9
+    assert priced["items"][0]["product_name"] == "Domates"
+    assert priced["total_amount"] == 64.75
+
+
+def test_totals_are_rounded_to_cents():
+    # 3 x 0.1 kayan noktada 0.30000000000000004
+    _, priced = price([line(EGG, 3), line(TOMATO, 1.333)])
+    assert priced["items"][0]["line_total"] == 0.3
+    assert priced["items"][1]["line_total"] == 34.52
+    assert priced["total_amount"] == 34.82
+    assert priced["discount"] == 0
+
+
+def test_unknown_products_are_reported_per_line():
+    pricing = OrderPricing(catalog())
+    with pytest.raises(InvalidCart) as e:
+        asyncio.run(pricing.price([line(TOMATO, 1), line(ObjectId(), 1), line("bozuk-id", 1)]))
+    assert len(e.value.problems) == 2
+    assert e.value.problems[0].startswith("2. satır: ürün bulunamadı")
+    assert e.value.problems[1].startswith("3. satır: ürün bulunamadı")
+    assert pricing.stats()["rejected"] == 1
+
+
+def test_crate_line_charges_crate_price():
+    _, priced = price([line(MELON, 20, "Kasa")])
+    assert priced["items"][0]["crates"] == 2
+    assert priced["total_amount"] == 90.0
+    assert priced["subtotal"] == 100.0
+    assert priced["discount"] == 10.0
+
+
+def test_crate_line_must_be_whole_crates():
+    with pytest.raises(InvalidCart) as e:
+        price([line(MELON, 15, "kasa")])
+    assert "10 KG katı olmalı" in e.value.problems[0]
+
+
+def test_unit_line_prices_full_crates_and_remainder():
+    # 25 KG = 2 kasa (90) + 5 KG birim fiyattan (25)
+    _, priced = price([line(MELON, 25, "KG")])
+    assert priced["items"][0]["crates"] == 2
+    assert priced["total_amount"] == 115.0
+
+
+def test_default_crate_price_applies_discount():
+    # crate_price yok: 30 x 0.1 x (1 - 0.1) = 2.7
+    _, priced = price([line(EGG, 60)], crate_discount=0.1)
+    assert priced["items"][0]["crates"] == 2
+    assert priced["total_amount"] == 5.4
+
+
+@pytest.mark.parametrize("item, message", [
+    (line(EGG, 1.5), "tam sayı olmalı"),
+    (line(TOMATO, 1, "ADET"), "birimi geçersiz"),
+    (line(TOMATO, 0), "sıfırdan büyük olmalı"),
+    (line(TOMATO, float("nan")), "sıfırdan büyük olmalı"),
+])
+def test_invalid_quantities_and_units(item, message):
+    with pytest.raises(InvalidCart) as e:
+        price([item])
+    assert message in e.value.problems[0]
+
+
+def test_cart_limits():
+    with pytest.raises(InvalidCart):
+        price([])
+    with pytest.raises(InvalidCart):
+        price([line(TOMATO, 1)] * 3, max_lines=2)
+
+
+def test_cached_products_skip_the_database():
+    class Cache:
+        async def get_products_by_ids(self, ids):
+            return [{"id": str(TOMATO), "name": "Domates", "price": 20.0, "unit_type": "KG"}]
+
+    products = catalog()
+    pricing = OrderPricing(products, catalog_cache=Cache())
+    priced = asyncio.run(pricing.price([line(TOMATO, 1)]))
+    assert priced["total_amount"] == 20.0
+    assert products.calls == 0
+
+    asyncio.run(pricing.price([line(TOMATO, 1), line(MELON, 1)]))
+    assert pricing.stats()["db_queries"] == 1
+
+
+@pytest.mark.parametrize("size", [1, 20, 200])
+def test_one_query_per_order_regardless_of_cart_size(size):
+    ids = [ObjectId() for _ in range(size)]
+    products = FakeCollection([{"_id": oid, "name": "Ürün", "price": 2.0, "unit_type": "ADET"} for oid in ids])
+    pricing = OrderPricing(products)
+    priced = asyncio.run(pricing.price([line(oid, 3) for oid in ids]))
+    assert priced["total_amount"] == 6.0 * size
+    assert products.calls == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from product_bulk import InvalidItem, ProductBulkWriter, ndjson_items
+from tests.fakes import FakeCollection
+
+VEGETABLES = ObjectId()
+TOMATO = ObjectId()
+
+
+def make_writer(**kwargs):
+    products = FakeCollection([
+        {"_id": TOMATO, "sku": "domates", "name": "Domates", "category_id": str(VEGETABLES),
+         "price": 25.0, "unit_type": "KG", "stock": 10.0},
+    ])
+    categories = FakeCollection([{"_id": VEGETABLES, "name": "Sebzeler"}])
+    return products, ProductBulkWriter(products, categories, **kwargs)
+
+
+def apply(items, **kwargs):
+    products, writer = make_writer(**kwargs)
+    return products, writer, asyncio.run(writer.apply(items))
+
+
+def new_product(sku, **fields):
+    return {"sku": sku, "name": sku.title(), "category_id": str(VEGETABLES), "price": 10.0, "unit_type": "KG",
+            **fields}
+
+
+def statuses(summary):
+    return [r["status"] for r in summary["results"]]
+
+
+def test_ndjson_lines_split_across_chunks():
+    async def chunks():
+        yield b'{"sku": "a"}\n{"sk'
+        yield b'u": "b"}\nbozuk\n\n'
+        yield b'{"sku": "c"}'
+
+    async def main():
+        return [item async for item in ndjson_items(chunks())]
+
+    items = asyncio.run(main())
+    assert items[0] == {"sku": "a"} and items[1] == {"sku": "b"} and items[3] == {"sku": "c"}
+    assert isinstance(items[2], InvalidItem)
+
+
+def test_create_and_update_by_sku():
+    products, _, summary = apply([
+        new_product("biber", stock=5),
+        {"sku": "domates", "price": 27.5},
+    ])
+    assert statuses(summary) == ["created", "updated"]
+    created = next(d for d in products.docs.values() if d["sku"] == "biber")
+    assert str(created["_id"]) == summary["results"][0]["id"]
+    assert created["stock"] == 5
+    assert products.docs[TOMATO]["price"] == 27.5
+
+
+def test_new_product_needs_required_fields_and_known_category():
+    _, _, summary = apply([
+        {"sku": "patates", "name": "Patates"},
+        new_product("kabak", category_id=str(ObjectId())),
+    ])
+    assert statuses(summary) == ["failed", "failed"]
+    assert "eksik alan" in summary["results"][0]["error"]
+    assert "kategori bulunamadı" in summary["results"][1]["error"]
+
+
+@pytest.mark.parametrize("item, error", [
+    ({"op": "sil", "sku": "domates"}, "geçersiz işlem"),
+    ({"op": "price", "sku": "domates", "price": -1}, "negatif"),
+    ({"op": "price", "sku": "domates", "price": True}, "sayı olmalı"),
+    ({"op": "stock", "price": 1}, "id ya da sku"),
+    ({"op": "price", "id": "bozuk", "price": 1}, "geçersiz ürün id"),
+    ({"op": "price", "sku": "yok", "price": 1}, "ürün bulunamadı"),
+    ({"op": "stock", "sku": "domates"}, "delta ya da stock"),
+    ("metin", "JSON nesnesi"),
+])
+def test_invalid_items_fail_alone(item, error):
+    products, _, summary = apply([item, {"op": "price", "id": str(TOMATO), "price": 30}])
+    assert statuses(summary) == ["failed", "updated"]
+    assert error in summary["results"][0]["error"]
+    assert products.docs[TOMATO]["price"] == 30
+
+
+def test_stock_decrease_never_goes_negative():
+    products, _, summary = apply([
+        {"op": "stock", "sku": "domates", "delta": -4},
+        {"op": "stock", "sku": "domates", "delta": -20},
+        {"op": "stock", "sku": "domates", "delta": 1},
+    ])
+    assert statuses(summary) == ["updated", "failed", "updated"]
+    assert summary["results"][1]["error"] == "yetersiz stok"
+    assert products.docs[TOMATO]["stock"] == 7
+
+
+def test_each_chunk_resolves_products_in_one_query():
+    products, writer, summary = apply([{"op": "stock", "sku": "domates", "stock": n} for n in range(5)], chunk_size=2)
+    assert summary["updated"] == 5
+    assert writer.stats()["chunks"] == 3
+    # Parça başına: sku çözümleme + bulk_write (kategori sorgusu categories'e gider)
+    assert products.calls == 6
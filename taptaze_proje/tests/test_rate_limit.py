@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+import rate_limit
+from rate_limit import Limit, LocalStore, RateLimited, RateLimiter, parse_rules
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(6000.0)   # 60 sn'lik pencerenin başı
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def hits(limiter, count, rule="login", **kwargs):
+    async def main():
+        allowed = 0
+        for _ in range(count):
+            try:
+                await limiter.check(rule, **kwargs)
+                allowed += 1
+            except RateLimited as e:
+                return allowed, e
+        return allowed, None
+    return asyncio.run(main())
+
+
+def test_limit_within_one_window(clock):
+    limiter = RateLimiter({"login": [Limit("ip", 3, 60)]})
+    allowed, error = hits(limiter, 5, ip="1.1.1.1")
+    assert allowed == 3
+    assert (error.rule, error.scope, error.retry_after) == ("login", "ip", 60)
+    assert limiter.stats()["rejected"] == {"login:ip": 1}
+
+
+def test_previous_window_is_weighted(clock):
+    limiter = RateLimiter({"login": [Limit("ip", 3, 60)]})
+    hits(limiter, 4, ip="1.1.1.1")      # 3 izin + 1 red, pencerede 4 sayım
+    clock.now += 90                      # sonraki pencerenin yarısı: 4 x 0.5 = 2 sayılır
+    allowed, error = hits(limiter, 2, ip="1.1.1.1")
+    assert allowed == 1
+    # 2 + 2 = 4 > 3; önceki pencerenin ağırlığı 1 azalana kadar: 1 / 4 x 60 = 15 sn
+    assert error.retry_after == 15
+
+
+def test_old_windows_stop_counting(clock):
+    limiter = RateLimiter({"login": [Limit("ip", 3, 60)]})
+    hits(limiter, 4, ip="1.1.1.1")
+    clock.now += 120
+    assert hits(limiter, 3, ip="1.1.1.1") == (3, None)
+
+
+def test_keys_and_scopes_are_independent(clock):
+    limiter = RateLimiter({"login": [Limit("ip", 100, 60), Limit("email", 2, 600)]})
+    assert hits(limiter, 2, ip="1.1.1.1", email="Ali@Taptaze.com ")[0] == 2
+    # E-posta büyük/küçük harf ve boşluktan bağımsız sayılır
+    allowed, error = hits(limiter, 1, ip="2.2.2.2", email="ali@taptaze.com")
+    assert allowed == 0 and error.scope == "email"
+    assert hits(limiter, 2, ip="2.2.2.2", email="veli@taptaze.com") == (2, None)
+
+
+def test_route_limit_applies_to_everyone(clock):
+    limiter = RateLimiter({"register": [Limit("route", 2, 60)]})
+    assert hits(limiter, 1, rule="register", ip="1.1.1.1")[0] == 1
+    assert hits(limiter, 1, rule="register", ip="2.2.2.2")[0] == 1
+    assert hits(limiter, 1, rule="register", ip="3.3.3.3")[1].scope == "route"
+
+
+def test_disabled_and_unknown_rules_pass(clock):
+    limiter = RateLimiter({"login": [Limit("ip", 1, 60)]}, enabled=False)
+    assert hits(limiter, 10, ip="1.1.1.1") == (10, None)
+    assert hits(RateLimiter({}), 10, rule="yok", ip="1.1.1.1") == (10, None)
+
+
+def test_parse_rules():
+    assert parse_rules("ip=20/60, email=10/600") == [Limit("ip", 20, 60), Limit("email", 10, 600)]
+
+
+def test_local_store_sweeps_expired_windows(clock):
+    store = LocalStore(sweep_every=1000)
+
+    async def main():
+        await store.incr("a", 98, 60)       # iki pencere önce
+        await store.incr("b", 99, 60)       # bir önceki pencere
+        store._sweep()
+
+    asyncio.run(main())
+    assert len(store) == 1
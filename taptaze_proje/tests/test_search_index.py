@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from search_index import SearchIndex, fold, tokenize
+
+PRODUCTS = [
+    {"id": "1", "name": "SOĞAN", "description": "Kuru soğan, file", "category_id": "sebze"},
+    {"id": "2", "name": "Domates", "description": "Salkım", "category_id": "sebze"},
+    {"id": "3", "name": "Karpuz", "description": "Diyarbakır", "category_id": "meyve"},
+    {"id": "4", "name": "IHLAMUR", "description": "Kurutulmuş", "category_id": "bakliyat"},
+    {"id": "5", "name": "Kuru İNCİR", "description": "Aydın", "category_id": "meyve"},
+    {"id": "6", "name": "Köy Biberi", "description": "Sivri, domates ile iyi gider", "category_id": "sebze"},
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.sync(PRODUCTS)
+    return index
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("SOĞAN", "sogan"),
+    ("IHLAMUR", "ihlamur"),
+    ("ıhlamur", "ihlamur"),
+    ("İNCİR", "incir"),
+    ("Çiğ Köfte ŞÜPHE", "cig kofte suphe"),
+])
+def test_turkish_folding(text, expected):
+    assert fold(text) == expected
+
+
+def test_tokenize_drops_punctuation():
+    assert tokenize("Köy Biberi (1 kg)") == ["koy", "biberi", "1", "kg"]
+    assert tokenize(None) == []
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("sogan", "1"),
+    ("SOĞAN", "1"),
+    ("ıhlamur", "4"),
+    ("ihlamur", "4"),
+    ("incir", "5"),
+    ("İNCİR", "5"),
+])
+def test_search_ignores_case_and_accents(index, query, expected):
+    assert index.search(query) == [expected]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("domtes", "2"),     # eksik harf
+    ("karpz", "3"),
+    ("karupz", "3"),     # yer değiştirmiş harfler
+    ("ihlamır", "4"),
+])
+def test_typo_tolerance(index, query, expected):
+    assert expected in index.search(query)
+
+
+def test_short_terms_are_not_fuzzy(index):
+    # 4 harften kısa kelimelerde yazım hatası toleransı yok, "kur" sadece önek
+    assert index.search("kyu") == []
+    assert set(index.search("kur")) == {"1", "4", "5"}
+
+
+def test_prefix_and_all_terms_must_match(index):
+    assert index.search("dom") == ["2", "6"]
+    assert index.search("köy bib") == ["6"]
+    assert index.search("kuru karpuz") == []
+
+
+def test_name_matches_rank_above_description(index):
+    # "domates" 2'nin isminde, 6'nın açıklamasında geçiyor
+    assert index.search("domates") == ["2", "6"]
+
+
+def test_category_filter_and_limit(index):
+    assert index.search("kuru", category_id="meyve") == ["5"]
+    assert len(index.search("kur", limit=2)) == 2
+
+
+def test_incremental_sync_updates_and_removes(index):
+    index.sync([
+        {**PRODUCTS[0], "name": "Arpacık Soğan"},
+        *PRODUCTS[1:4],
+    ])
+    assert index.search("arpacik") == ["1"]
+    assert index.search("incir") == []
+    assert index.search("biber") == []
+    assert len(index) == 4
+
+
+def test_schedule_sync_builds_in_background():
+    async def main():
+        index = SearchIndex()
+        index.schedule_sync(PRODUCTS)
+        await index.wait_ready()
+        first = index.search("sogan")
+
+        # Art arda gelen yüklemelerde sadece sonuncusu uygulanır
+        index.schedule_sync(PRODUCTS[:2])
+        index.schedule_sync(PRODUCTS[:3])
+        await index._sync_task
+        result = first, index.search("karpuz"), len(index)
+        await index.stop()
+        return result
+
+    assert asyncio.run(main()) == (["1"], ["3"], 3)
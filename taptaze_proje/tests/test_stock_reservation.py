@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from stock_reservation import InvalidProduct, OutOfStock, StockReservation
+from tests.fakes import FakeCollection
+
+
+def stock(*levels):
+    ids = [ObjectId() for _ in levels]
+    return ids, FakeCollection([{"_id": oid, "stock": level} for oid, level in zip(ids, levels)])
+
+
+@pytest.mark.parametrize("coalesce", [True, False])
+def test_concurrent_orders_never_oversell(coalesce):
+    (tomato,), products = stock(10)
+    reservation = StockReservation(products, coalesce=coalesce)
+
+    async def order():
+        try:
+            await reservation.reserve([(str(tomato), 1)])
+            return True
+        except OutOfStock:
+            return False
+
+    async def main():
+        return await asyncio.gather(*[order() for _ in range(25)])
+
+    results = asyncio.run(main())
+    assert results.count(True) == 10
+    assert products.docs[tomato]["stock"] == 0
+    assert reservation.stats()["reserved"] == 10
+    assert reservation.stats()["rejected"] == 15
+
+
+def test_coalescing_batches_concurrent_requests():
+    (tomato,), products = stock(100)
+    reservation = StockReservation(products)
+
+    async def main():
+        await asyncio.gather(*[reservation.reserve([(str(tomato), 2)]) for _ in range(20)])
+
+    asyncio.run(main())
+    assert products.docs[tomato]["stock"] == 60
+    assert reservation.stats()["batches"] < 20
+
+
+def test_failed_line_releases_the_others():
+    (tomato, pepper), products = stock(5, 1)
+    reservation = StockReservation(products)
+    with pytest.raises(OutOfStock) as e:
+        asyncio.run(reservation.reserve([(str(tomato), 3), (str(pepper), 2)]))
+    assert e.value.product_ids == [str(pepper)]
+    assert products.docs[tomato]["stock"] == 5
+    assert products.docs[pepper]["stock"] == 1
+
+
+def test_duplicate_lines_are_merged():
+    (tomato,), products = stock(3)
+    reservation = StockReservation(products)
+    with pytest.raises(OutOfStock):
+        asyncio.run(reservation.reserve([(str(tomato), 2), (str(tomato), 2)]))
+    assert products.docs[tomato]["stock"] == 3
+
+    reserved = asyncio.run(reservation.reserve([(str(tomato), 1), (str(tomato), 1.5)]))
+    assert reserved == {str(tomato): 2.5}
+    assert products.docs[tomato]["stock"] == 0.5
+
+
+@pytest.mark.parametrize("product_id, quantity", [("bozuk-id", 1), (str(ObjectId()), 0), (str(ObjectId()), -1)])
+def test_invalid_lines_are_rejected(product_id, quantity):
+    _, products = stock()
+    with pytest.raises(InvalidProduct):
+        asyncio.run(StockReservation(products).reserve([(product_id, quantity)]))
+    assert products.calls == 0